@@ -1,7 +1,8 @@
-from pyais.messages import NMEAMessage, ANY_MESSAGE, AISSentence
+from pyais.messages import NMEAMessage, ANY_MESSAGE, AISSentence, LazyPayload
 from pyais.stream import TCPConnection, FileReaderStream, IterMessages
 from pyais.encode import encode_dict, encode_msg, ais_to_nmea_0183
 from pyais.decode import decode
+from pyais.batch import decode_batch
 from pyais.tracker import AISTracker, AISTrack
 
 __license__ = 'MIT'
@@ -15,10 +16,12 @@ __all__ = (
     'NMEAMessage',
     'AISSentence',
     'ANY_MESSAGE',
+    'LazyPayload',
     'TCPConnection',
     'IterMessages',
     'FileReaderStream',
     'decode',
+    'decode_batch',
     'AISTracker',
     'AISTrack',
 )
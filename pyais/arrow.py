@@ -0,0 +1,209 @@
+"""Export of decoded AIS messages to Apache Arrow record batches and Parquet files.
+Every message class has its own schema, which is derived from the bit fields
+of the class. Each schema also has nullable columns for the metadata
+of tag blocks and Gatehouse wrappers.
+
+This module requires pyarrow: pip install pyais[arrow]
+"""
+import os
+import typing
+
+from pyais.exceptions import UnknownMessageException, UnknownPartNoException
+from pyais.messages import MSG_CLASS, AISSentence, FieldDecoder, Payload, INT_FIELD, BOOL_FIELD, FLOAT_FIELD, STR_FIELD
+from pyais.stream import AssembleMessages, IterMessages
+from pyais.util import from_bytes
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover
+    HAS_PYARROW = False
+
+DEFAULT_BATCH_SIZE = 65536
+
+# Metadata columns of tag blocks (see TagBlock)
+TAG_BLOCK_COLUMNS = (
+    'receiver_timestamp',
+    'source_station',
+    'destination_station',
+    'line_count',
+    'relative_time',
+    'text',
+)
+
+# Metadata columns of Gatehouse wrappers (see GatehouseSentence)
+GATEHOUSE_COLUMNS = (
+    'country',
+    'region',
+    'pss',
+    'online_data',
+    'timestamp',
+)
+
+
+def require_pyarrow() -> None:
+    """Raise an ImportError if pyarrow is not installed."""
+    if not HAS_PYARROW:
+        raise ImportError("pyarrow is required for the Arrow/Parquet export. Install it with: pip install pyais[arrow]")
+
+
+def arrow_type(decoder: FieldDecoder) -> "pa.DataType":
+    """
+    The Arrow data type of a given field.
+    The smallest integer type that can hold all values of the field is used.
+    Floats that fit into 16 bits are stored as float32, everything else as float64.
+    """
+    if decoder.kind == INT_FIELD:
+        for bits in (8, 16, 32, 64):
+            if decoder.width <= bits:
+                return getattr(pa, f'int{bits}' if decoder.sign_bit else f'uint{bits}')()
+        return pa.binary()
+    elif decoder.kind == BOOL_FIELD:
+        return pa.bool_()
+    elif decoder.kind == FLOAT_FIELD:
+        return pa.float32() if decoder.width <= 16 else pa.float64()
+    elif decoder.kind == STR_FIELD:
+        return pa.string()
+    return pa.binary()
+
+
+def arrow_schema(payload_class: typing.Type[Payload]) -> "pa.Schema":
+    """The Arrow schema for a given message class including the metadata columns."""
+    require_pyarrow()
+    fields = [pa.field(name, arrow_type(decoder)) for name, decoder in payload_class.decoding_plan().items()]
+    fields += [pa.field(f'tag_block_{name}', pa.string()) for name in TAG_BLOCK_COLUMNS]
+    fields += [
+        pa.field('gatehouse_country', pa.string()),
+        pa.field('gatehouse_region', pa.string()),
+        pa.field('gatehouse_pss', pa.string()),
+        pa.field('gatehouse_online_data', pa.uint8()),
+        pa.field('gatehouse_timestamp', pa.timestamp('ms')),
+    ]
+    return pa.schema(fields, metadata={'message_class': payload_class.__name__})
+
+
+class RecordBatchBuilder:
+    """Collects the decoded fields and metadata of many messages of the same message class."""
+
+    def __init__(self, payload_class: typing.Type[Payload]) -> None:
+        self.payload_class = payload_class
+        self.schema = arrow_schema(payload_class)
+        self.decoders = list(payload_class.decoding_plan().values())
+        self.columns: typing.List[typing.List[typing.Any]] = [[] for _ in self.schema]
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def append(self, msg: AISSentence) -> None:
+        """Decode a single message and append its fields and metadata to the columns."""
+        bit_arr = msg.bit_array
+        raw = bit_arr.tobytes()
+        value = from_bytes(raw)
+        n_bits = len(raw) * 8
+
+        columns = iter(self.columns)
+        for decoder, column in zip(self.decoders, columns):
+            column.append(decoder.decode(bit_arr, value, n_bits))
+
+        for column, val in zip(columns, self.metadata(msg)):
+            column.append(val)
+
+    @staticmethod
+    def metadata(msg: AISSentence) -> typing.List[typing.Any]:
+        """Values of the tag block and Gatehouse columns for a given message."""
+        values: typing.List[typing.Any] = [None, ] * (len(TAG_BLOCK_COLUMNS) + len(GATEHOUSE_COLUMNS))
+
+        tag_block = msg.tag_block
+        if tag_block is not None:
+            try:
+                if not tag_block.initialized:
+                    tag_block.init()
+                values[:len(TAG_BLOCK_COLUMNS)] = (getattr(tag_block, name) for name in TAG_BLOCK_COLUMNS)
+            except ValueError:
+                # Be gentle and ignore malformed tag blocks
+                pass
+
+        wrapper = msg.wrapper_msg
+        if wrapper is not None:
+            values[len(TAG_BLOCK_COLUMNS):] = (getattr(wrapper, name) for name in GATEHOUSE_COLUMNS)
+
+        return values
+
+    def flush(self) -> "pa.RecordBatch":
+        """Build a record batch from all collected messages and start over."""
+        arrays = [pa.array(column, type=field.type) for column, field in zip(self.columns, self.schema)]
+        self.columns = [[] for _ in self.schema]
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+
+def iter_record_batches(
+    messages: typing.Union[typing.Iterable[bytes], AssembleMessages],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> typing.Generator[typing.Tuple[typing.Type[Payload], "pa.RecordBatch"], None, None]:
+    """
+    Decode a stream of AIS messages into Arrow record batches.
+    Multipart messages are assembled. Invalid and unsupported messages are skipped.
+
+    :param messages:    NMEA sentences as bytes or any stream of messages (e.g. FileReaderStream, TCPConnection)
+    :param batch_size:  the maximum number of rows of each record batch
+    :returns:           tuples of (message class, record batch). Record batches of the same class share a schema.
+    """
+    require_pyarrow()
+    stream = messages if isinstance(messages, AssembleMessages) else IterMessages(messages)
+    builders: typing.Dict[typing.Type[Payload], RecordBatchBuilder] = {}
+
+    for msg in stream:
+        try:
+            payload_class = MSG_CLASS[msg.ais_id].payload_class(msg.bit_array)
+        except (KeyError, UnknownMessageException, UnknownPartNoException):
+            continue
+
+        try:
+            builder = builders[payload_class]
+        except KeyError:
+            builder = builders[payload_class] = RecordBatchBuilder(payload_class)
+
+        builder.append(msg)
+        if len(builder) >= batch_size:
+            yield payload_class, builder.flush()
+
+    for payload_class, builder in builders.items():
+        if len(builder):
+            yield payload_class, builder.flush()
+
+
+def write_parquet(
+    messages: typing.Union[typing.Iterable[bytes], AssembleMessages],
+    directory: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **kwargs: typing.Any,
+) -> typing.Dict[typing.Type[Payload], str]:
+    """
+    Decode a stream of AIS messages and write them to Parquet files. One file per message class is
+    created in `directory`, e.g. MessageType1.parquet. The files are written incrementally, so the
+    memory usage does not depend on the size of the stream.
+
+    :param messages:    NMEA sentences as bytes or any stream of messages (e.g. FileReaderStream, TCPConnection)
+    :param directory:   existing directory to write the files to
+    :param batch_size:  the maximum number of rows of each record batch (and therefore row group)
+    :param kwargs:      additional keyword arguments passed to pyarrow.parquet.ParquetWriter (e.g. compression)
+    :returns:           the path of the file for each message class
+    """
+    require_pyarrow()
+    writers: typing.Dict[typing.Type[Payload], pq.ParquetWriter] = {}
+    paths: typing.Dict[typing.Type[Payload], str] = {}
+
+    try:
+        for payload_class, batch in iter_record_batches(messages, batch_size):
+            try:
+                writer = writers[payload_class]
+            except KeyError:
+                paths[payload_class] = os.path.join(directory, f'{payload_class.__name__}.parquet')
+                writer = writers[payload_class] = pq.ParquetWriter(paths[payload_class], batch.schema, **kwargs)
+            writer.write_batch(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return paths
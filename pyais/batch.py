@@ -0,0 +1,383 @@
+"""Batch decoding of AIS messages into columns.
+Instead of creating a Python object for every decoded message, the fields
+of all messages are collected in compact typed buffers and returned as
+NumPy arrays. Each message class has its own set of columns.
+
+This module requires NumPy: pip install pyais[numpy]
+"""
+import array
+import typing
+
+from bitarray import bitarray
+
+from pyais.exceptions import UnknownMessageException, UnknownPartNoException, NonPrintableCharacterException
+from pyais.messages import MSG_CLASS, Payload, FieldDecoder, INT_FIELD, BOOL_FIELD, FLOAT_FIELD, STR_FIELD, BYTES_FIELD, \
+    MessageType1, MessageType2, MessageType3, MessageType18, to_lat_lon, to_speed, to_10th, to_turn
+from pyais.stream import AssembleMessages, IterMessages
+from pyais.optional import HAS_NUMPY, require_numpy  # noqa: F401 (HAS_NUMPY is part of the API of this module)
+from pyais.util import from_bytes, BASE64_ALPHABET, DEARMOR_TABLE
+
+if typing.TYPE_CHECKING:
+    import numpy as np
+
+COLUMNS = typing.Dict[str, "np.ndarray[typing.Any, typing.Any]"]
+
+
+def typecode(decoder: FieldDecoder) -> typing.Optional[str]:
+    """
+    The array/NumPy typecode of the column for a given field or None, if the values
+    can not be stored in a typed buffer (e.g. str or bytes).
+    The smallest integer type that can hold all values of the field is used.
+    Floats that fit into 16 bits are stored as float32, everything else as float64.
+    """
+    if decoder.kind == INT_FIELD:
+        for code, bits in (('b', 8), ('h', 16), ('i', 32), ('q', 64)):
+            if decoder.width <= bits:
+                return code if decoder.sign_bit else code.upper()
+        return None
+    elif decoder.kind == BOOL_FIELD:
+        return 'B'
+    elif decoder.kind == FLOAT_FIELD:
+        return 'f' if decoder.width <= 16 else 'd'
+    return None
+
+
+class Column:
+    """
+    Growable buffer for the values of a single field.
+    Missing values (e.g. for truncated messages) are replaced by a fill value and masked.
+    """
+
+    __slots__ = ('decoder', 'typecode', 'values', 'mask', 'fill_value')
+
+    def __init__(self, decoder: FieldDecoder) -> None:
+        self.decoder = decoder
+        self.typecode = typecode(decoder)
+        self.mask = bytearray()
+        self.values: typing.Union["array.array[typing.Any]", typing.List[typing.Any]]
+
+        if self.typecode is None:
+            self.values = []
+            self.fill_value: typing.Any = '' if decoder.kind == STR_FIELD else b''
+        else:
+            self.values = array.array(self.typecode)
+            self.fill_value = float('nan') if decoder.kind == FLOAT_FIELD else 0
+
+    def __len__(self) -> int:
+        return len(self.mask)
+
+    def append(self, val: typing.Any) -> None:
+        if val is None:
+            self.values.append(self.fill_value)
+            self.mask.append(1)
+        else:
+            self.values.append(val)
+            self.mask.append(0)
+
+    def to_numpy(self) -> "np.ndarray[typing.Any, typing.Any]":
+        """Convert the column into a NumPy array. Columns with missing values become masked arrays."""
+        require_numpy()
+        import numpy as np
+        data: "np.ndarray[typing.Any, typing.Any]"
+        if self.typecode is None:
+            if self.decoder.kind == STR_FIELD:
+                data = np.array(self.values, dtype=f'U{max(1, self.decoder.width // 6)}')
+            else:
+                data = np.empty(len(self.values), dtype=object)
+                data[:] = self.values
+        else:
+            buffer = typing.cast("array.array[typing.Any]", self.values)
+            if self.decoder.kind == BOOL_FIELD:
+                data = np.frombuffer(buffer, dtype=np.uint8).astype(bool)
+            else:
+                data = np.frombuffer(buffer, dtype=self.typecode)
+
+        if 1 in self.mask:
+            return np.ma.MaskedArray(data, mask=np.frombuffer(bytes(self.mask), dtype=bool))
+        return data
+
+
+class ColumnBatch:
+    """Collects the decoded fields of many messages of the same message class."""
+
+    __slots__ = ('payload_class', 'columns')
+
+    def __init__(self, payload_class: typing.Type[Payload]) -> None:
+        self.payload_class = payload_class
+        self.columns = [Column(decoder) for decoder in payload_class.decoding_plan().values()]
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def append(self, bit_arr: bitarray) -> None:
+        """Decode a single message and append each field to its column."""
+        raw = bit_arr.tobytes()
+        value = from_bytes(raw)
+        n_bits = len(raw) * 8
+
+        for column in self.columns:
+            column.append(column.decoder.decode(bit_arr, value, n_bits))
+
+    def to_numpy(self) -> COLUMNS:
+        return {column.decoder.name: column.to_numpy() for column in self.columns}
+
+
+def decode_batch(
+    lines: typing.Union[typing.Iterable[bytes], AssembleMessages]
+) -> typing.Dict[typing.Type[Payload], COLUMNS]:
+    """
+    Decode many AIS messages at once into typed NumPy columns.
+    Multipart messages are assembled. Invalid and unsupported messages are skipped.
+
+    :param lines:   NMEA sentences as bytes or any stream of messages (e.g. FileReaderStream)
+    :returns:       The decoded columns grouped by message class: { MessageType1: { 'mmsi': array(...), ... }, ... }
+
+    >>> columns = decode_batch([b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23"])
+    >>> columns[MessageType1]['mmsi']
+    array([227006760], dtype=uint32)
+    """
+    require_numpy()
+    messages = lines if isinstance(lines, AssembleMessages) else IterMessages(lines)
+    batches: typing.Dict[typing.Type[Payload], ColumnBatch] = {}
+
+    for msg in messages:
+        try:
+            payload_class = MSG_CLASS[msg.ais_id].payload_class(msg.bit_array)
+        except (KeyError, UnknownMessageException, UnknownPartNoException):
+            continue
+
+        try:
+            batch = batches[payload_class]
+        except KeyError:
+            batch = batches[payload_class] = ColumnBatch(payload_class)
+
+        batch.append(msg.bit_array)
+
+    return {payload_class: batch.to_numpy() for payload_class, batch in batches.items()}
+
+
+def hex_lookup() -> "np.ndarray[typing.Any, typing.Any]":
+    """Lookup table that maps each hex digit to its value or -1 if it is not a hex digit."""
+    import numpy as np
+    values = np.full(256, -1, dtype=np.int16)
+    for i, digit in enumerate(b'0123456789abcdef'):
+        values[digit] = values[ord(chr(digit).upper())] = i
+    return values
+
+
+def validate_checksums(sentences: typing.Sequence[bytes]) -> "np.ndarray[typing.Any, typing.Any]":
+    """
+    Validate the checksums of many NMEA sentences at once.
+    The checksum covers everything between the leading delimiter and the first '*'.
+    It must be followed by exactly two hex digits. Tag blocks are not supported.
+
+    :param sentences:   single NMEA sentences without line breaks
+    :returns:           boolean array that is True for every sentence with a valid checksum
+
+    >>> validate_checksums([b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23", b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*24"])
+    array([ True, False])
+    """
+    require_numpy()
+    import numpy as np
+    if not len(sentences):
+        return np.zeros(0, dtype=bool)
+
+    # A trailing line break after every sentence. Each line ends at one of them.
+    chars = np.frombuffer(b'\n'.join(sentences) + b'\n', dtype=np.uint8)
+    ends = np.flatnonzero(chars == ord('\n'))
+    if len(ends) != len(sentences):
+        raise ValueError("sentences must not contain line breaks")
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+
+    # The first '*' of every line
+    stars = np.append(np.flatnonzero(chars == ord('*')), len(chars))
+    first_star = stars[np.searchsorted(stars, starts)]
+    valid = (first_star == ends - 3) & (first_star > starts + 1)
+
+    # XOR all bytes between the delimiter and the '*' with a single reduceat call.
+    # Lines without a valid '*' are reduced over a dummy range.
+    body_start = np.where(valid, starts + 1, 0)
+    body_end = np.where(valid, first_star, 1)
+    bounds = np.empty(2 * len(sentences), dtype=np.intp)
+    bounds[0::2] = body_start
+    bounds[1::2] = body_end
+    computed = np.bitwise_xor.reduceat(chars, bounds)[0::2]
+
+    hex_values = hex_lookup()
+    high = hex_values[chars[np.minimum(first_star + 1, len(chars) - 1)]]
+    low = hex_values[chars[np.minimum(first_star + 2, len(chars) - 1)]]
+    expected = (high << 4) | low
+
+    result: "np.ndarray[typing.Any, typing.Any]" = valid & (high >= 0) & (low >= 0) & (computed == expected)
+    return result
+
+
+# Message classes supported by decode_position_reports()
+POSITION_REPORTS = (MessageType1, MessageType2, MessageType3, MessageType18)
+
+
+def to_lat_lon_vectorized(v: "np.ndarray[typing.Any, typing.Any]") -> "np.ndarray[typing.Any, typing.Any]":
+    import numpy as np
+    return np.round(v / 600000.0, 6)
+
+
+def to_10th_vectorized(v: "np.ndarray[typing.Any, typing.Any]") -> "np.ndarray[typing.Any, typing.Any]":
+    return v / 10.0
+
+
+def to_turn_vectorized(turn: "np.ndarray[typing.Any, typing.Any]") -> "np.ndarray[typing.Any, typing.Any]":
+    import numpy as np
+    # The special values 127, -127 and -128 (see TurnRate) are passed through as is
+    rate = np.copysign(np.trunc((turn / 4.733) ** 2), turn)
+    return np.where(np.abs(turn) >= 127, turn, rate).astype(np.float64)
+
+
+# Vectorized counterparts of the scalar to_converters. Enum converters are omitted: enums are stored as ints.
+VECTORIZED_CONVERTERS: typing.Dict[typing.Any, typing.Callable[[typing.Any], typing.Any]] = {
+    to_lat_lon: to_lat_lon_vectorized,
+    to_speed: to_10th_vectorized,
+    to_10th: to_10th_vectorized,
+    to_turn: to_turn_vectorized,
+}
+
+
+def six_bit_lookup() -> "np.ndarray[typing.Any, typing.Any]":
+    """Lookup table that maps each armored character to its six-bit value or 0xFF if it can not be dearmored."""
+    import numpy as np
+    values = np.full(256, 0xFF, dtype=np.uint8)
+    values[np.frombuffer(BASE64_ALPHABET, dtype=np.uint8)] = np.arange(64, dtype=np.uint8)
+    return values[np.frombuffer(DEARMOR_TABLE, dtype=np.uint8)]
+
+
+def dearmor_packed(payloads: typing.Sequence[bytes]) -> "np.ndarray[typing.Any, typing.Any]":
+    """
+    Dearmor many AIS payloads of the same length at once.
+    :param payloads:    armored payloads (e.g. AISSentence.payload) that all have the same length
+    :returns:           2-D matrix of bytes with one row per payload. The bits of each row are packed and zero padded.
+    """
+    require_numpy()
+    import numpy as np
+    length = len(payloads[0]) if payloads else 0
+    if len(set(map(len, payloads))) > 1:
+        raise ValueError("all payloads must have the same length")
+
+    chars = np.frombuffer(b''.join(payloads), dtype=np.uint8).reshape(len(payloads), length)
+    six_bits = six_bit_lookup()[chars]
+
+    invalid = six_bits == 0xFF
+    if invalid.any():
+        raise NonPrintableCharacterException(f"Non printable character: '{hex(chars[invalid][0])}'")
+
+    # Four six-bit values make up three bytes
+    padding = -length % 4
+    if padding:
+        six_bits = np.pad(six_bits, ((0, 0), (0, padding)))
+    quads = six_bits.reshape(len(payloads), -1, 4)
+
+    packed = np.empty((len(payloads), quads.shape[1], 3), dtype=np.uint8)
+    packed[..., 0] = (quads[..., 0] << 2) | (quads[..., 1] >> 4)
+    packed[..., 1] = (quads[..., 1] << 4) | (quads[..., 2] >> 2)
+    packed[..., 2] = (quads[..., 2] << 6) | quads[..., 3]
+
+    return packed.reshape(len(payloads), -1)[:, :(length * 6 + 7) // 8]
+
+
+def dearmor(payloads: typing.Sequence[bytes]) -> "np.ndarray[typing.Any, typing.Any]":
+    """
+    Dearmor many AIS payloads of the same length at once.
+    :param payloads:    armored payloads (e.g. AISSentence.payload) that all have the same length
+    :returns:           2-D matrix of bits with one row per payload
+    """
+    require_numpy()
+    import numpy as np
+    length = len(payloads[0]) if payloads else 0
+    return np.unpackbits(dearmor_packed(payloads), axis=1)[:, :length * 6]
+
+
+# Cache of bytes objects for all possible single byte values
+SINGLE_BYTES = [bytes([i]) for i in range(256)]
+
+
+def extract_column(packed: "np.ndarray[typing.Any, typing.Any]", decoder: FieldDecoder) -> "np.ndarray[typing.Any, typing.Any]":
+    """
+    Extract a single field of up to 57 bits from a matrix of packed bits (see dearmor_packed()) for all rows at once.
+    The bytes that contain the field are interpreted as a big endian integer. The field is then shifted and masked out.
+    """
+    import numpy as np
+    n_rows = len(packed)
+    first, last = decoder.offset // 8, (decoder.offset + decoder.width - 1) // 8
+    window = np.zeros((n_rows, 8), dtype=np.uint8)
+    window[:, 7 - (last - first):] = packed[:, first: last + 1]
+
+    shift = (last + 1) * 8 - (decoder.offset + decoder.width)
+    values = (window.view('>u8').ravel() >> np.uint64(shift)) & np.uint64(decoder.mask)
+
+    if decoder.kind == BYTES_FIELD:
+        # Left align the bits and split them into bytes again
+        n_bytes = (decoder.width + 7) // 8
+        values = values << np.uint64(n_bytes * 8 - decoder.width)
+        data = np.empty(n_rows, dtype=object)
+        if n_bytes == 1:
+            data[:] = np.array(SINGLE_BYTES, dtype=object)[values]
+        else:
+            chunks = values.astype('>u8').view(np.uint8).reshape(n_rows, 8)[:, 8 - n_bytes:]
+            data[:] = [row.tobytes() for row in chunks]
+        return data
+
+    if decoder.sign_bit:
+        values = values.astype(np.int64)
+        values[values >= decoder.sign_bit] -= decoder.sign_bit << 1
+
+    try:
+        values = VECTORIZED_CONVERTERS[decoder.converter](values)
+    except KeyError:
+        pass
+
+    if decoder.kind == BOOL_FIELD:
+        return values.astype(bool)
+    return values.astype(typecode(decoder))
+
+
+def decode_position_reports(
+    payloads: typing.Sequence[bytes],
+    chunk_size: int = 65536
+) -> typing.Dict[typing.Type[Payload], COLUMNS]:
+    """
+    Vectorized decoder for position reports of class A (types 1, 2 and 3) and class B (type 18).
+    The payloads are dearmored into a 2-D matrix of (packed) bits and each field is extracted
+    for all messages at once using shifts and masks. The result is the same as for decode_batch(). Payloads of other message
+    types are skipped.
+
+    :param payloads:    armored payloads (e.g. AISSentence.payload) that all have the same length
+    :param chunk_size:  number of payloads that are dearmored at once. Limits the memory usage.
+    :returns:           The decoded columns grouped by message class: { MessageType1: { 'mmsi': array(...), ... }, ... }
+    """
+    require_numpy()
+    import numpy as np
+    chunks: typing.Dict[typing.Type[Payload], typing.List[COLUMNS]] = {}
+
+    for start in range(0, len(payloads), chunk_size):
+        chunk = payloads[start: start + chunk_size]
+        packed = dearmor_packed(chunk)
+        n_bits = len(chunk[0]) * 6
+        msg_types = packed[:, 0] >> 2
+
+        for payload_class in POSITION_REPORTS:
+            ais_ids = [ais_id for ais_id, cls in MSG_CLASS.items() if cls is payload_class]
+            rows = packed[np.isin(msg_types, ais_ids)]
+            if not len(rows):
+                continue
+
+            plan = payload_class.decoding_plan()
+            if n_bits < sum(decoder.width for decoder in plan.values()):
+                raise ValueError(f"payloads are too short for {payload_class.__name__}")
+
+            columns = {name: extract_column(rows, decoder) for name, decoder in plan.items()}
+            chunks.setdefault(payload_class, []).append(columns)
+
+    return {
+        payload_class: {name: np.concatenate([c[name] for c in columns]) for name in columns[0]}
+        for payload_class, columns in chunks.items()
+    }
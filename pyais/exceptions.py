@@ -38,3 +38,7 @@ class NonPrintableCharacterException(AISBaseException):
 
 class TagBlockNotInitializedException(Exception):
     """The TagBlock is not initialized"""
+
+
+class InvalidSnapshotException(AISBaseException):
+    """A snapshot or journal of the AISTracker is corrupt or of an unsupported version"""
@@ -3,6 +3,7 @@ import datetime
 import functools
 import json
 import math
+import operator
 import typing
 from typing import Any, Dict, Optional, Sequence, Union
 
@@ -13,9 +14,9 @@ from pyais.constants import TalkerID, NavigationStatus, ManeuverIndicator, EpfdT
     TransmitMode, StationIntervals, TurnRate
 from pyais.exceptions import InvalidNMEAMessageException, TagBlockNotInitializedException, UnknownMessageException, UnknownPartNoException, \
     InvalidDataTypeException
-from pyais.util import checksum, decode_into_bit_array, compute_checksum, get_itdma_comm_state, get_sotdma_comm_state, int_to_bin, str_to_bin, \
-    encode_ascii_6, from_bytes, from_bytes_signed, decode_bin_as_ascii6, get_int, chk_to_int, coerce_val, \
-    bits2bytes, bytes2bits, b64encode_str
+from pyais.util import checksum, decode_into_bit_array, get_itdma_comm_state, get_sotdma_comm_state, int_to_bin, str_to_bin, \
+    encode_ascii_6, from_bytes, decode_bin_as_ascii6, get_int, coerce_val, tokenize, SENTENCE_TOKENS, \
+    bytes2bits, b64encode_str, armored_mmsi, check_printable, six_bit_value
 
 NMEA_VALUE = typing.Union[str, float, int, bool, bytes]
 
@@ -29,6 +30,8 @@ B_GH = b"HP"
 TAG_BLOCK_START = b'\\'
 MAX_FRAG_CNT = 100
 MAX_PAYLOAD_LEN = 200
+# Sort key for the fragments of multipart messages
+FRAG_NUM = operator.attrgetter('frag_num')
 
 
 def bit_field(width: int, d_type: typing.Type[typing.Any],
@@ -64,6 +67,150 @@ def bit_field(width: int, d_type: typing.Type[typing.Any],
     )
 
 
+# Kinds of fields. The numeric kinds come first so they can be checked by a single comparison.
+INT_FIELD, BOOL_FIELD, FLOAT_FIELD, STR_FIELD, BYTES_FIELD = range(5)
+
+FIELD_KINDS = {
+    int: INT_FIELD,
+    bool: BOOL_FIELD,
+    float: FLOAT_FIELD,
+    str: STR_FIELD,
+    bytes: BYTES_FIELD,
+}
+
+
+class FieldDecoder(typing.NamedTuple):
+    """
+    Precomputed decoding instructions for a single bit field.
+    Everything that does not depend on the actual message is computed only once.
+    """
+    name: str
+    offset: int
+    width: int
+    kind: int
+    mask: int
+    sign_bit: int
+    converter: typing.Optional[typing.Callable[[typing.Any], typing.Any]]
+    # Converter that attrs applies in __init__, if any. Needed when a field is decoded on its own.
+    init_converter: typing.Optional[typing.Callable[[typing.Any], typing.Any]]
+
+    @classmethod
+    def from_field(cls, field: typing.Any, offset: int) -> "FieldDecoder":
+        width = field.metadata['width']
+        d_type = field.metadata['d_type']
+
+        try:
+            kind = FIELD_KINDS[d_type]
+        except KeyError as err:
+            raise InvalidDataTypeException(d_type) from err
+
+        sign_bit = (1 << (width - 1)) if field.metadata['signed'] else 0
+        return cls(
+            field.name, offset, width, kind, (1 << width) - 1, sign_bit,
+            field.metadata['to_converter'], field.converter,
+        )
+
+    def decode(self, bit_arr: bitarray, value: int, n_bits: int) -> typing.Any:
+        """
+        Decode this field from a bitarray, just like it is stored by the message class.
+        Same as extract(), but also applies the converter that attrs would apply in __init__.
+        """
+        val = self.extract(bit_arr, value, n_bits)
+        if self.init_converter is not None and val is not None:
+            val = self.init_converter(val)
+        return val
+
+    def extract(self, bit_arr: bitarray, value: int, n_bits: int) -> typing.Any:
+        """
+        Extract the value of this field from a bitarray.
+        Numeric fields are extracted from `value` using shifts and masks.
+        `value` is the bitarray as integer, zero padded to `n_bits` bits by tobytes().
+        Fields that do not fit into the bitarray are None. The last field may be shorter than its width.
+        """
+        # Unpacking the tuple at once is much faster than accessing its fields by name
+        _, cur, width, kind, mask, sign_bit, converter, _ = self
+        length = len(bit_arr)
+        if cur >= length:
+            return None
+
+        end = cur + width
+        if end > length:
+            end = length
+            mask = (1 << (end - cur)) - 1
+            sign_bit = (1 << (end - cur - 1)) if sign_bit else 0
+
+        val: typing.Any
+        if kind <= FLOAT_FIELD:
+            val = (value >> (n_bits - end)) & mask
+            if val & sign_bit:
+                val -= sign_bit << 1
+
+            if kind == FLOAT_FIELD:
+                val = float(val)
+            elif kind == BOOL_FIELD:
+                val = bool(val)
+
+        elif kind == STR_FIELD:
+            val = decode_bin_as_ascii6(bit_arr[cur: end])
+        else:
+            val = bit_arr[cur: end].tobytes()
+
+        if converter is not None:
+            val = converter(val)
+        return val
+
+
+# Decoding plans for each message class: { Payload subclass: { field name: FieldDecoder(), ...} }
+DECODING_PLANS: typing.Dict[type, typing.Dict[str, FieldDecoder]] = {}
+
+# Generated decoders for each message class: { Payload subclass: (number of bits, decoder function) }
+DECODERS: typing.Dict[type, typing.Tuple[int, typing.Callable[[bitarray], typing.Any]]] = {}
+
+
+def compile_decoder(cls: type, plan: typing.Dict[str, FieldDecoder]) -> typing.Tuple[int, typing.Callable[[bitarray], typing.Any]]:
+    """
+    Generate the source of a function, that decodes all fields of a message class at once.
+    Offsets, shifts and masks are written into the source as constants.
+    The function can only be used, if the bitarray has at least the returned number of bits.
+    """
+    n_bits = sum(decoder.width for decoder in plan.values())
+    namespace: typing.Dict[str, typing.Any] = {
+        'cls': cls, 'from_bytes': from_bytes, 'decode_bin_as_ascii6': decode_bin_as_ascii6,
+    }
+    args = []
+    for decoder in plan.values():
+        name, cur, width, kind, mask, sign_bit, converter, _ = decoder
+        end = cur + width
+        if kind <= FLOAT_FIELD:
+            expr = f'(value >> {n_bits - end}) & {mask}'
+            if sign_bit:
+                # Two's complement of the masked value
+                expr = f'(({expr}) ^ {sign_bit}) - {sign_bit}'
+            if kind == FLOAT_FIELD:
+                expr = f'float({expr})'
+            elif kind == BOOL_FIELD:
+                expr = f'bool({expr})'
+        elif kind == STR_FIELD:
+            expr = f'decode_bin_as_ascii6(bit_arr[{cur}:{end}])'
+        else:
+            expr = f'bit_arr[{cur}:{end}].tobytes()'
+
+        if converter is not None:
+            namespace[f'convert_{name}'] = converter
+            expr = f'convert_{name}({expr})'
+        args.append(f'        {name}={expr},\n')
+
+    source = (
+        'def decode(bit_arr):\n'
+        '    raw = bit_arr.tobytes()\n'
+        # The bitarray is zero padded to the next byte boundary by tobytes()
+        f'    value = from_bytes(raw) >> (len(raw) * 8 - {n_bits})\n'
+        '    return cls(\n' + ''.join(args) + '    )\n'
+    )
+    exec(compile(source, f'<decoder of {cls.__name__}>', 'exec'), namespace)
+    return n_bits, namespace['decode']
+
+
 ENUM_FIELDS = {'status', 'maneuver', 'epfd', 'ship_type', 'aid_type', 'station_type', 'txrx', 'interval'}
 
 
@@ -112,18 +259,18 @@ class NMEASentenceFactory:
 
     @classmethod
     def _produce(cls, raw: bytes) -> "NMEASentence":
-        # Parse the first comma separated field
-        fields = raw.split(COMMA)
-        first_field = fields[0]
+        # Split the sentence once and pass its parts on to the sentence class
+        tokens = tokenize(raw)
+        first_field = tokens[0][0]
         delimiter = first_field[:1]
         type_code = first_field[3:]
         type_code = type_code.upper()
 
         if type_code == B_VDM or type_code == B_VDO:
-            return AISSentence(raw)
+            return AISSentence(raw, tokens)
         if delimiter == B_DOLLAR_SIGN:
             if type_code == B_GH:
-                return GatehouseSentence(raw)
+                return GatehouseSentence(raw, tokens)
 
         raise UnknownMessageException(raw)
 
@@ -298,18 +445,21 @@ class NMEASentence(object):
 
     TYPE = "UNDEFINED"
 
-    def __init__(self, raw: bytes) -> None:
+    def __init__(self, raw: bytes, tokens: typing.Optional[SENTENCE_TOKENS] = None) -> None:
+        """
+        @param raw: The raw sentence.
+        @param tokens: The result of `tokenize(raw)`, if the sentence was split already.
+        """
         if not isinstance(raw, bytes):
             raise ValueError(f"'NMEAMessage' only accepts bytes, but got '{type(raw)}'")
 
-        # Initial values
-        self.checksum: int = -1
-
         # Store raw data
         self.raw: bytes = raw
 
         # A NMEA message consists of comma separated parts
-        fields = raw.split(b",")
+        if tokens is None:
+            tokens = tokenize(raw)
+        fields, fill, check, body = tokens
 
         # The first field of a sentence is called the "tag" and normally consists
         # of a two-letter talker ID followed by a three-letter type code.
@@ -318,14 +468,12 @@ class NMEASentence(object):
         self.talker_id = first_field[1:3].decode('ascii')
         self.type = first_field[3:].decode('ascii')
 
-        checksum = fields[-1]
-        fill, check = chk_to_int(checksum)
         # Fill bits (0 to 5)
         self.fill_bits: int = fill
         # Message Checksum (hex value)
-        self.checksum = check
+        self.checksum: int = check
         # Set the checksum valid field
-        self.is_valid = self.checksum == compute_checksum(self.raw)
+        self.is_valid = check == checksum(body)
 
         self.data_fields = fields[1:-1]
 
@@ -375,8 +523,8 @@ class GatehouseSentence(NMEASentence):
         'timestamp',
     )
 
-    def __init__(self, raw: bytes) -> None:
-        super().__init__(raw)
+    def __init__(self, raw: bytes, tokens: typing.Optional[SENTENCE_TOKENS] = None) -> None:
+        super().__init__(raw, tokens)
 
         fields = self.data_fields
         try:
@@ -413,13 +561,13 @@ class AISSentence(NMEASentence):
         'frag_num',
         'seq_id',
         'payload',
-        'bit_array',
+        '_bit_array',
         'ais_id',
         'channel',
     )
 
-    def __init__(self, raw: bytes) -> None:
-        super().__init__(raw)
+    def __init__(self, raw: bytes, tokens: typing.Optional[SENTENCE_TOKENS] = None) -> None:
+        super().__init__(raw, tokens)
 
         try:
             # Unpack NMEA message parts
@@ -454,9 +602,21 @@ class AISSentence(NMEASentence):
         if self.frag_cnt > MAX_FRAG_CNT or self.frag_num > MAX_FRAG_CNT:
             raise InvalidNMEAMessageException("Too many fragments")
 
-        # Finally decode bytes into bits
-        self.bit_array: bitarray = decode_into_bit_array(self.payload, self.fill_bits)
-        self.ais_id: int = get_int(self.bit_array, 0, 6)
+        # The payload is decoded into bits, when it is needed for the first time
+        check_printable(payload)
+        self._bit_array: Optional[bitarray] = None
+        self.ais_id: int = six_bit_value(payload[0])
+
+    @property
+    def bit_array(self) -> bitarray:
+        """The decoded payload. Computed from payload and fill_bits on first access."""
+        if self._bit_array is None:
+            self._bit_array = decode_into_bit_array(self.payload, self.fill_bits)
+        return self._bit_array
+
+    @bit_array.setter
+    def bit_array(self, bit_array: bitarray) -> None:
+        self._bit_array = bit_array
 
     def asdict(self) -> Dict[str, Any]:
         """
@@ -507,22 +667,22 @@ class AISSentence(NMEASentence):
         :param messages: Sequence of NMEA messages
         :return: Single message
         """
-        raw = b''
-        data = b''
-        bit_array = bitarray()
+        raw = []
+        data = []
         is_valid = True
 
-        for i, msg in enumerate(sorted(messages, key=lambda m: m.frag_num)):
-            if i > 0:
-                raw += b'\n'
-            raw += msg.raw
-            data += msg.payload
-            bit_array += msg.bit_array
-            is_valid &= msg.is_valid
-
-        messages[0].raw = raw
-        messages[0].payload = data
-        messages[0].bit_array = bit_array
+        # Collect all parts and join them at once
+        for msg in sorted(messages, key=FRAG_NUM):
+            raw.append(msg.raw)
+            data.append(msg.payload)
+            is_valid = is_valid and msg.is_valid
+
+        # The bits are decoded from the joined payload on demand.
+        # Only the last fragment may contain fill bits.
+        messages[0].raw = b'\n'.join(raw)
+        messages[0].payload = b''.join(data)
+        messages[0].fill_bits = msg.fill_bits
+        messages[0]._bit_array = None
         messages[0].is_valid = is_valid
         return messages[0]
 
@@ -538,6 +698,14 @@ class AISSentence(NMEASentence):
     def fragment_count(self) -> int:
         return self.frag_cnt
 
+    @property
+    def mmsi(self) -> int:
+        """
+        The MMSI of the sender, read from the raw payload without decoding it.
+        Only meaningful for single or assembled messages.
+        """
+        return armored_mmsi(self.payload)
+
     def decode(self) -> "ANY_MESSAGE":
         """
         Decode the AIS message.
@@ -551,6 +719,22 @@ class AISSentence(NMEASentence):
         except KeyError as e:
             raise UnknownMessageException(f"The message {self} is not supported!") from e
 
+    def decode_lazy(self) -> "LazyPayload":
+        """
+        Decode the AIS message lazily.
+        Fields are only decoded when they are accessed for the first time.
+        @return: A lazy view on the message that behaves like the decoded message class.
+
+        >>> lazy = NMEAMessage(b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23").decode_lazy()
+        >>> lazy.mmsi
+        227006760
+        """
+        try:
+            payload_class = MSG_CLASS[self.ais_id]
+        except KeyError as e:
+            raise UnknownMessageException(f"The message {self} is not supported!") from e
+        return LazyPayload(payload_class, self.bit_array)
+
 
 @attr.s(slots=True)
 class Payload(abc.ABC):
@@ -660,52 +844,49 @@ class Payload(abc.ABC):
         return cls(**args)  # type:ignore
 
     @classmethod
-    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
-        cur: int = 0
-        end: int = 0
-        length: int = len(bit_arr)
-        kwargs: typing.Dict[str, typing.Any] = {}
-
-        # Iterate over the bits until the last bit of the bitarray or all fields are fully decoded
-        for field in cls.fields():
-
-            if end >= length:
-                # All fields that did not fit into the bit array are None
-                kwargs[field.name] = None
-                continue
-
-            width = field.metadata['width']
-            d_type = field.metadata['d_type']
-            converter = field.metadata['to_converter']
-
-            end = min(length, cur + width)
-            bits = bit_arr[cur: end]
-
-            val: typing.Any
-            # Get the correct data type and decoding function
-            if d_type == int or d_type == bool or d_type == float:
-                shift = (8 - ((end - cur) % 8)) % 8
-                if field.metadata['signed']:
-                    val = from_bytes_signed(bits) >> shift
-                else:
-                    val = from_bytes(bits) >> shift
-
-                if d_type == float:
-                    val = float(val)
-                elif d_type == bool:
-                    val = bool(val)
-
-            elif d_type == str:
-                val = decode_bin_as_ascii6(bits)
-            elif d_type == bytes:
-                val = bits2bytes(bits)
-            else:
-                raise InvalidDataTypeException(d_type)
+    def decoding_plan(cls) -> typing.Dict[str, FieldDecoder]:
+        """
+        The precompiled decoding plan of this class: a FieldDecoder for each field in order.
+        The plan is built only once per class, when it is first needed.
+        """
+        try:
+            return DECODING_PLANS[cls]
+        except KeyError:
+            plan = {}
+            offset = 0
+            for field in cls.fields():
+                plan[field.name] = FieldDecoder.from_field(field, offset)
+                offset += field.metadata['width']
+            DECODING_PLANS[cls] = plan
+            return plan
 
-            val = converter(val) if converter is not None else val
-            kwargs[field.name] = val
-            cur = end
+    @classmethod
+    def payload_class(cls, bit_arr: bitarray) -> typing.Type["Payload"]:
+        """
+        The class that is used to decode a given bitarray.
+        Some messages (e.g. type 22 or 24) encode different fields depending on the value of a bit.
+        """
+        return cls
 
+    @classmethod
+    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+        try:
+            n_bits, decode = DECODERS[cls]
+        except KeyError:
+            n_bits, decode = DECODERS[cls] = compile_decoder(cls, cls.decoding_plan())
+        if len(bit_arr) >= n_bits:
+            return decode(bit_arr)  # type:ignore
+
+        # Truncated payloads are decoded field by field.
+        # Numeric fields are extracted from a single integer using shifts and masks.
+        # The bitarray is zero padded to the next byte boundary by tobytes().
+        raw = bit_arr.tobytes()
+        value = from_bytes(raw)
+        n_bits = len(raw) * 8
+
+        # The converters of attrs are applied by __init__
+        extract = FieldDecoder.extract
+        kwargs = {name: extract(decoder, bit_arr, value, n_bits) for name, decoder in cls.decoding_plan().items()}
         return cls(**kwargs)  # type:ignore
 
     def asdict(self, enum_as_int: bool = False) -> typing.Dict[str, typing.Optional[NMEA_VALUE]]:
@@ -729,6 +910,73 @@ class Payload(abc.ABC):
         return JSONEncoder(indent=4).encode(self.asdict())
 
 
+class LazyPayload:
+    """
+    Lazy view on an AIS message.
+    Instead of decoding all fields at once, each field is decoded on first access and then memoized.
+    This is useful if only a few fields (e.g. mmsi, lat and lon) of each message are of interest.
+
+    The view supports attribute access, `asdict()` and `to_json()` just like an actual Payload.
+    Call `materialize()` to get a fully decoded Payload instance.
+    """
+
+    __slots__ = ('payload_class', 'bit_array', '_value', '_n_bits', '_decoded')
+
+    def __init__(self, payload_class: typing.Type[Payload], bit_arr: bitarray) -> None:
+        # Resolve the actual class for messages whose structure depends on the content (e.g. type 24)
+        self.payload_class: typing.Type[Payload] = payload_class.payload_class(bit_arr)
+        self.bit_array: bitarray = bit_arr
+
+        raw = bit_arr.tobytes()
+        self._value: int = from_bytes(raw)
+        self._n_bits: int = len(raw) * 8
+        self._decoded: typing.Dict[str, typing.Any] = {}
+
+    def __getattr__(self, name: str) -> typing.Any:
+        # Only called if there is no regular attribute with this name.
+        # Private and special names are never fields. Looking them up would recurse forever on instances
+        # whose slots are not set yet, e.g. while copy or pickle look for __setstate__.
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self._decoded[name]
+        except KeyError:
+            pass
+
+        try:
+            decoder = self.payload_class.decoding_plan()[name]
+        except KeyError:
+            raise AttributeError(f"'{self.payload_class.__name__}' has no field '{name}'") from None
+
+        val = decoder.decode(self.bit_array, self._value, self._n_bits)
+        self._decoded[name] = val
+        return val
+
+    def __repr__(self) -> str:
+        return f"LazyPayload<{self.payload_class.__name__}>"
+
+    def materialize(self) -> "ANY_MESSAGE":
+        """Decode all fields and return the actual message."""
+        return self.payload_class.from_bitarray(self.bit_array)
+
+    def asdict(self, enum_as_int: bool = False) -> typing.Dict[str, typing.Optional[NMEA_VALUE]]:
+        """
+        Convert the message to a dictionary. This decodes all fields.
+        @param enum_as_int: If set to True all Enum values will be returned as raw ints.
+        @return: The message as a dictionary.
+        """
+        d: typing.Dict[str, typing.Optional[NMEA_VALUE]] = {}
+        for name in self.payload_class.decoding_plan():
+            val = getattr(self, name)
+            if enum_as_int and val is not None and name in ENUM_FIELDS:
+                val = int(val)
+            d[name] = val
+        return d
+
+    def to_json(self) -> str:
+        return JSONEncoder(indent=4).encode(self.asdict())
+
+
 #
 # Conversion functions
 #
@@ -1345,11 +1593,15 @@ class MessageType22(Payload):
             return MessageType22Broadcast.create(**kwargs)
 
     @classmethod
-    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+    def payload_class(cls, bit_arr: bitarray) -> typing.Type[Payload]:
         if get_int(bit_arr, 139, 140):
-            return MessageType22Addressed.from_bitarray(bit_arr)
+            return MessageType22Addressed
         else:
-            return MessageType22Broadcast.from_bitarray(bit_arr)
+            return MessageType22Broadcast
+
+    @classmethod
+    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+        return cls.payload_class(bit_arr).from_bitarray(bit_arr)
 
 
 @attr.s(slots=True)
@@ -1435,15 +1687,19 @@ class MessageType24(Payload):
             raise UnknownPartNoException(f"Partno {partno} is not allowed!")
 
     @classmethod
-    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+    def payload_class(cls, bit_arr: bitarray) -> typing.Type[Payload]:
         partno: int = get_int(bit_arr, 38, 40)
         if partno == 0:
-            return MessageType24PartA.from_bitarray(bit_arr)
+            return MessageType24PartA
         elif partno == 1:
-            return MessageType24PartB.from_bitarray(bit_arr)
+            return MessageType24PartB
         else:
             raise UnknownPartNoException(f"Partno {partno} is not allowed!")
 
+    @classmethod
+    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+        return cls.payload_class(bit_arr).from_bitarray(bit_arr)
+
 
 @attr.s(slots=True)
 class MessageType25AddressedStructured(Payload):
@@ -1524,20 +1780,24 @@ class MessageType25(Payload):
                 return MessageType25BroadcastUnstructured.create(**kwargs)
 
     @classmethod
-    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+    def payload_class(cls, bit_arr: bitarray) -> typing.Type[Payload]:
         addressed: int = get_int(bit_arr, 38, 39)
         structured: int = get_int(bit_arr, 39, 40)
 
         if addressed:
             if structured:
-                return MessageType25AddressedStructured.from_bitarray(bit_arr)
+                return MessageType25AddressedStructured
             else:
-                return MessageType25AddressedUnstructured.from_bitarray(bit_arr)
+                return MessageType25AddressedUnstructured
         else:
             if structured:
-                return MessageType25BroadcastStructured.from_bitarray(bit_arr)
+                return MessageType25BroadcastStructured
             else:
-                return MessageType25BroadcastUnstructured.from_bitarray(bit_arr)
+                return MessageType25BroadcastUnstructured
+
+    @classmethod
+    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+        return cls.payload_class(bit_arr).from_bitarray(bit_arr)
 
 
 @attr.s(slots=True)
@@ -1624,20 +1884,24 @@ class MessageType26(Payload):
                 return MessageType26BroadcastUnstructured.create(**kwargs)
 
     @classmethod
-    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+    def payload_class(cls, bit_arr: bitarray) -> typing.Type[Payload]:
         addressed: int = get_int(bit_arr, 38, 39)
         structured: int = get_int(bit_arr, 39, 40)
 
         if addressed:
             if structured:
-                return MessageType26AddressedStructured.from_bitarray(bit_arr)
+                return MessageType26AddressedStructured
             else:
-                return MessageType26BroadcastStructured.from_bitarray(bit_arr)
+                return MessageType26BroadcastStructured
         else:
             if structured:
-                return MessageType26AddressedUnstructured.from_bitarray(bit_arr)
+                return MessageType26AddressedUnstructured
             else:
-                return MessageType26BroadcastUnstructured.from_bitarray(bit_arr)
+                return MessageType26BroadcastUnstructured
+
+    @classmethod
+    def from_bitarray(cls, bit_arr: bitarray) -> "ANY_MESSAGE":
+        return cls.payload_class(bit_arr).from_bitarray(bit_arr)
 
 
 @attr.s(slots=True)
@@ -0,0 +1,13 @@
+"""Optional dependencies.
+Modules that offer features based on optional packages check here, if the packages are installed.
+The packages are only imported by the features that need them, so that importing pyais stays fast.
+"""
+import importlib.util
+
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+
+
+def require_numpy(feature: str = "batch decoding") -> None:
+    """Raise an ImportError if NumPy is not installed."""
+    if not HAS_NUMPY:
+        raise ImportError(f"NumPy is required for {feature}. Install it with: pip install pyais[numpy]")
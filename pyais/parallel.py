@@ -0,0 +1,217 @@
+"""
+Decode large NMEA files on multiple cores.
+The file is split into byte ranges at line boundaries. Every range is decoded by a separate process.
+Fragments of multipart messages that can not be assembled within a single range are handed back
+to the parent process, which assembles them in the original order. This way the messages are
+yielded in exactly the same order as by FileReaderStream.
+"""
+import collections
+import os
+import typing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from pyais.exceptions import (InvalidNMEAMessageException, MissingMultipartMessageException, NonPrintableCharacterException,
+                              TooManyMessagesException, UnknownMessageException, UnknownPartNoException)
+from pyais.messages import ANY_MESSAGE, AISSentence, NMEASentenceFactory
+from pyais.stream import MultipartBuffer, should_parse
+
+# Exceptions that cause a single message to be skipped
+SKIPPED_EXCEPTIONS = (
+    InvalidNMEAMessageException,
+    NonPrintableCharacterException,
+    UnknownMessageException,
+    UnknownPartNoException,
+    MissingMultipartMessageException,
+    TooManyMessagesException,
+)
+
+SLOT = typing.Tuple[int, str]
+
+
+class Fragment(typing.NamedTuple):
+    """A single fragment of a multipart message."""
+    slot: SLOT
+    raw: bytes
+    # True, if the fragment could not be assembled within its chunk
+    leftover: bool
+
+
+class Assembled(typing.NamedTuple):
+    """A multipart message that was assembled and decoded within a single chunk."""
+    slot: SLOT
+    decoded: ANY_MESSAGE
+
+
+# Single messages are passed as decoded messages
+ENTRY = typing.Union[ANY_MESSAGE, Fragment, Assembled]
+
+
+def decode_sentence(msg: AISSentence) -> typing.Optional[ANY_MESSAGE]:
+    """Decode a single message or return None if it can not be decoded."""
+    try:
+        return msg.decode()
+    except SKIPPED_EXCEPTIONS:
+        return None
+
+
+def produce_ais_sentence(line: bytes) -> typing.Optional[AISSentence]:
+    """Parse a single line or return None if it is not a valid AIS sentence."""
+    if not should_parse(line):
+        return None
+    try:
+        sentence = NMEASentenceFactory.produce(line)
+    except (InvalidNMEAMessageException, NonPrintableCharacterException, UnknownMessageException):
+        return None
+    if sentence.TYPE != AISSentence.TYPE:
+        return None
+    return typing.cast(AISSentence, sentence)
+
+
+def decode_chunk(filename: str, start: int, end: int) -> typing.List[ENTRY]:
+    """
+    Decode all messages between two byte offsets of a file.
+    Both offsets must be at line boundaries.
+
+    All fragments of multipart messages are returned at their original position.
+    Multipart messages are assembled, if all of their fragments are part of the chunk.
+    The decoded message is placed right after its last fragment.
+    """
+    with open(filename, 'rb') as fd:
+        fd.seek(start)
+        data = fd.read(end - start)
+
+    entries: typing.List[ENTRY] = []
+    buffer = MultipartBuffer()
+    positions: typing.Dict[SLOT, typing.List[int]] = collections.defaultdict(list)
+
+    # Split like readlines() does: a bare \r does not end a line
+    for line in data.split(b'\n'):
+        msg = produce_ais_sentence(line)
+        if msg is None:
+            continue
+
+        if msg.is_single:
+            decoded = decode_sentence(msg)
+            if decoded is not None:
+                entries.append(decoded)
+            continue
+
+        slot = buffer.slot(msg)
+        positions[slot].append(len(entries))
+        entries.append(Fragment(slot, msg.raw, True))
+
+        assembled = buffer.add(msg)
+        if assembled is not None:
+            for pos in positions.pop(slot):
+                entries[pos] = typing.cast(Fragment, entries[pos])._replace(leftover=False)
+
+            decoded = decode_sentence(assembled)
+            if decoded is not None:
+                entries.append(Assembled(slot, decoded))
+
+    return entries
+
+
+def chunk_boundaries(filename: str, chunk_size: int) -> typing.List[typing.Tuple[int, int]]:
+    """Split a file into byte ranges of roughly chunk_size bytes that start and end at line boundaries."""
+    size = os.path.getsize(filename)
+    boundaries = []
+    start = 0
+
+    with open(filename, 'rb') as fd:
+        while start < size:
+            fd.seek(start + chunk_size)
+            # Move forward to the end of the current line
+            fd.readline()
+            end = min(fd.tell(), size)
+            boundaries.append((start, end))
+            start = end
+
+    return boundaries
+
+
+class ParallelFileDecoder:
+    """
+    Decode a NMEA file on multiple cores.
+    Iterating over the decoder yields the decoded messages in the same order as FileReaderStream.
+    Messages that can not be decoded are skipped.
+
+    Because only the decoded messages are passed between the processes,
+    tag blocks and Gatehouse wrappers are not available.
+    """
+
+    def __init__(self, filename: str, workers: typing.Optional[int] = None, chunk_size: int = 1 << 24) -> None:
+        """
+        @param filename: The file to decode.
+        @param workers: Number of processes. Defaults to the number of CPUs. A single worker decodes in process.
+        @param chunk_size: Number of bytes that are decoded by a single task.
+        """
+        if not os.path.isfile(filename):
+            raise FileNotFoundError(f"Could not open file {filename}")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+
+        self.filename: str = filename
+        self.workers: int = workers or os.cpu_count() or 1
+        self.chunk_size: int = chunk_size
+
+    def __enter__(self) -> "ParallelFileDecoder":
+        return self
+
+    def __exit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        return None
+
+    def __iter__(self) -> typing.Generator[ANY_MESSAGE, None, None]:
+        buffer = MultipartBuffer()
+
+        for entries in self._iter_chunks():
+            # A worker does not know about fragments from previous chunks.
+            # Therefore, all fragments of streams that were incomplete at the start of the chunk are assembled here.
+            dirty = set(buffer)
+
+            for entry in entries:
+                if isinstance(entry, Fragment):
+                    if entry.leftover or entry.slot in dirty:
+                        decoded = self._assemble(buffer, entry.raw)
+                        if decoded is not None:
+                            yield decoded
+                elif isinstance(entry, Assembled):
+                    if entry.slot not in dirty:
+                        yield entry.decoded
+                else:
+                    yield entry
+
+    @staticmethod
+    def _assemble(buffer: MultipartBuffer, raw: bytes) -> typing.Optional[ANY_MESSAGE]:
+        msg = produce_ais_sentence(raw)
+        if msg is None:
+            return None
+        assembled = buffer.add(msg)
+        if assembled is None:
+            return None
+        return decode_sentence(assembled)
+
+    def _iter_chunks(self) -> typing.Generator[typing.List[ENTRY], None, None]:
+        boundaries = chunk_boundaries(self.filename, self.chunk_size)
+
+        if self.workers == 1 or len(boundaries) <= 1:
+            for start, end in boundaries:
+                yield decode_chunk(self.filename, start, end)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            # Only keep a limited number of chunks in flight to keep the memory usage bounded
+            pending: typing.Deque[Future[typing.List[ENTRY]]] = collections.deque()
+            remaining = iter(boundaries)
+
+            for start, end in remaining:
+                pending.append(executor.submit(decode_chunk, self.filename, start, end))
+                if len(pending) >= 2 * self.workers:
+                    break
+
+            while pending:
+                entries = pending.popleft().result()
+                for start, end in remaining:
+                    pending.append(executor.submit(decode_chunk, self.filename, start, end))
+                    break
+                yield entries
@@ -0,0 +1,246 @@
+import asyncio
+import collections
+import threading
+import typing
+
+from pyais.exceptions import InvalidNMEAMessageException, NonPrintableCharacterException, UnknownMessageException
+from pyais.messages import AISSentence, GatehouseSentence, NMEASentenceFactory
+from pyais.stream import AssembleMessages, AsyncSocketStream, MultipartBuffer
+
+SOURCE = typing.Union[AssembleMessages, AsyncSocketStream]
+FILTER = typing.Callable[[AISSentence], bool]
+
+
+class _ClientProtocol(asyncio.Protocol):
+    """Registers a downstream client at the NMEAServer. Data sent by clients is ignored."""
+
+    def __init__(self, server: "NMEAServer") -> None:
+        self.server = server
+        self.transport: typing.Optional[asyncio.WriteTransport] = None
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = typing.cast(asyncio.WriteTransport, transport)
+        self.server.clients.add(self.transport)
+
+    def connection_lost(self, exc: typing.Optional[Exception]) -> None:
+        self.server.clients.discard(typing.cast(asyncio.WriteTransport, self.transport))
+
+
+class _Relay:
+    """
+    Passes the raw lines of a single source on, exactly as they were received (including tag blocks).
+    Without a filter, every line is passed on at once.
+    With a filter, the lines are grouped into messages first: Gatehouse wrappers are kept with the
+    following sentence and the fragments of multipart messages are held back until the message is complete.
+    Lines that are not AIS messages can not be filtered and are dropped.
+    """
+
+    def __init__(self, filter: typing.Optional[FILTER], buffer: MultipartBuffer) -> None:
+        self.filter = filter
+        self.buffer = buffer
+        # The last Gatehouse wrapper line, that belongs to the next sentence
+        self.wrapper: typing.Optional[bytes] = None
+        # The lines of incomplete multipart messages: { slot: { sentence: line, ...}, ...}
+        self.fragments: typing.Dict[typing.Tuple[int, str], typing.Dict[bytes, bytes]] = {}
+
+    def feed(self, line: bytes) -> typing.Optional[bytes]:
+        """Returns the data to send for a line, if any."""
+        if not line.endswith(b'\n'):
+            line += b'\r\n'
+        if self.filter is None:
+            return line
+
+        try:
+            sentence = NMEASentenceFactory.produce(line)
+        except (InvalidNMEAMessageException, NonPrintableCharacterException, UnknownMessageException):
+            return None
+        if sentence.TYPE == GatehouseSentence.TYPE:
+            self.wrapper = line
+            return None
+        if sentence.TYPE != AISSentence.TYPE:
+            return None
+
+        msg = typing.cast(AISSentence, sentence)
+        if self.wrapper is not None:
+            line, self.wrapper = self.wrapper + line, None
+        if msg.is_single:
+            return line if self.filter(msg) else None
+
+        slot = self.buffer.slot(msg)
+        if slot not in self.buffer:
+            # Older fragments of this slot were dropped by the buffer
+            self.fragments[slot] = {}
+        self.fragments.setdefault(slot, {})[msg.raw] = line
+
+        assembled = self.buffer.add(msg)
+        if assembled is None:
+            return None
+        lines = self.fragments.pop(slot)
+        if not self.filter(assembled):
+            return None
+        # The assembled message consists of the sentences of all fragments in order
+        return b''.join(lines[raw] for raw in assembled.raw.split(b'\n'))
+
+
+class NMEAServer:
+    """
+    Serves NMEA sentences of one or more upstream streams to many downstream TCP clients.
+
+    Every client has a bounded send queue. A client that does not keep up with the
+    upstream feed is disconnected as soon as its queue overflows,
+    so that a single slow consumer can neither block nor exhaust the server.
+
+    Synchronous streams are read in background threads. Asynchronous streams share the event loop.
+    Lines are relayed exactly as they were received, including tag blocks and Gatehouse wrappers.
+    Only a line terminator is added, if it is missing.
+    If there is a filter, multipart messages are forwarded as a whole and lines that are not AIS messages are dropped.
+    """
+
+    def __init__(
+            self,
+            *sources: SOURCE,
+            host: str = '0.0.0.0',
+            port: int = 5631,
+            max_queue_size: int = 1 << 20,
+            filter: typing.Optional[FILTER] = None,
+    ) -> None:
+        """
+        @param sources: The upstream streams.
+        @param host: Address to listen on.
+        @param port: Port to listen on. If 0, a free port is chosen.
+        @param max_queue_size: Maximum number of bytes queued per client, before the client is disconnected.
+        @param filter: Optional callable that returns True for every AIS message that should be served.
+        """
+        if not sources:
+            raise ValueError("at least one source is required")
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be positive")
+
+        self.sources = sources
+        self.host = host
+        self.port = port
+        self.max_queue_size = max_queue_size
+        self.filter = filter
+
+        # Connected clients
+        self.clients: typing.Set[asyncio.WriteTransport] = set()
+        # Number of lines (sentences) served
+        self.sentences: int = 0
+        # Number of clients that were disconnected, because they did not keep up
+        self.slow_consumers: int = 0
+
+        self._server: typing.Optional[asyncio.AbstractServer] = None
+        # Data read by background threads, that was not broadcast yet
+        self._pending: typing.Deque[bytes] = collections.deque()
+
+    async def __aenter__(self) -> "NMEAServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Start listening for clients. The actual port is available as `port` afterwards."""
+        if self._server is None:
+            loop = asyncio.get_running_loop()
+            self._server = await loop.create_server(lambda: _ClientProtocol(self), self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        """Stop listening and close all clients after their queued data was sent."""
+        if self._server is not None:
+            self._server.close()
+            for client in list(self.clients):
+                client.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve(self) -> None:
+        """Serve all sources until they are exhausted."""
+        await self.start()
+        try:
+            await asyncio.gather(*(self._serve_source(source) for source in self.sources))
+        finally:
+            await self.close()
+
+    def run(self) -> None:
+        """Blocking variant of `serve()`."""
+        asyncio.run(self.serve())
+
+    def broadcast(self, data: bytes) -> None:
+        """Send raw data to all clients. Clients whose queue would overflow are disconnected."""
+        limit = self.max_queue_size - len(data)
+        for client in list(self.clients):
+            if client.is_closing():
+                continue
+            if client.get_write_buffer_size() > limit:
+                # Close the connection without sending the queued data
+                client.abort()
+                self.slow_consumers += 1
+            else:
+                client.write(data)
+
+    def _send(self, chunks: typing.List[bytes]) -> None:
+        data = b''.join(chunks)
+        self.sentences += data.count(b'\n')
+        self.broadcast(data)
+
+    def _flush(self) -> None:
+        # Broadcast everything that background threads read in the meantime at once
+        pending = self._pending
+        chunks = []
+        while pending:
+            chunks.append(pending.popleft())
+        if chunks:
+            self._send(chunks)
+
+    async def _serve_source(self, source: SOURCE) -> None:
+        if isinstance(source, AsyncSocketStream):
+            feed = _Relay(self.filter, source.buffer).feed
+            async with source:
+                async for lines in source.line_batches():
+                    chunks = [data for data in map(feed, lines) if data is not None]
+                    if chunks:
+                        self._send(chunks)
+        else:
+            await self._serve_in_thread(source)
+
+    async def _serve_in_thread(self, source: AssembleMessages) -> None:
+        loop = asyncio.get_running_loop()
+        done: "asyncio.Future[None]" = loop.create_future()
+        pending = self._pending
+        flush = self._flush
+
+        def finish(exc: typing.Optional[BaseException]) -> None:
+            if not done.done():
+                if exc is None:
+                    done.set_result(None)
+                else:
+                    done.set_exception(exc)
+
+        def read() -> None:
+            exc: typing.Optional[BaseException] = None
+            feed = _Relay(self.filter, source.buffer).feed
+            try:
+                with source:
+                    for line in source.lines():
+                        data = feed(line)
+                        if data is None:
+                            continue
+                        pending.append(data)
+                        # Only wake up the event loop, if it has nothing to do yet
+                        if len(pending) == 1:
+                            loop.call_soon_threadsafe(flush)
+            except Exception as e:
+                exc = e
+            try:
+                loop.call_soon_threadsafe(flush)
+                loop.call_soon_threadsafe(finish, exc)
+            except RuntimeError:
+                # The event loop is closed already
+                pass
+
+        # Daemon threads do not prevent the interpreter from exiting, if a source blocks forever
+        threading.Thread(target=read, daemon=True).start()
+        await done
@@ -1,16 +1,29 @@
+import asyncio
+import collections
+import io
+import itertools
+import mmap
+import os
+import random
+import selectors
+import socket as _socket
+import time
 import typing
 from abc import ABC, abstractmethod
-from socket import AF_INET, SOCK_DGRAM, SOCK_STREAM, socket
+from socket import AF_INET, IPPROTO_TCP, SO_KEEPALIVE, SO_RCVBUF, SOCK_DGRAM, SOCK_STREAM, SOL_SOCKET, create_connection, socket
 from typing import BinaryIO, Generator, Generic, Iterable, List, TypeVar, cast
 
 from pyais.exceptions import InvalidNMEAMessageException, NonPrintableCharacterException, UnknownMessageException
 from pyais.messages import AISSentence, GatehouseSentence, NMEAMessage, NMEASentenceFactory
+from pyais.util import armored_mmsi
 
 T = TypeVar("T")
 F = TypeVar("F", BinaryIO, socket, None)
 DOLLAR_SIGN = ord("$")
 EXCLAMATION_POINT = ord("!")
 BACKSLASH = ord("\\")
+# Not available on Windows
+MSG_DONTWAIT: int = getattr(_socket, 'MSG_DONTWAIT', 0)
 
 
 def should_parse(byte_str: bytes) -> bool:
@@ -22,6 +35,147 @@ def should_parse(byte_str: bytes) -> bool:
     return len(byte_str) > 0 and byte_str[0] in (DOLLAR_SIGN, EXCLAMATION_POINT, BACKSLASH)
 
 
+class _Slot:
+    """The fragments of a single multipart message."""
+    __slots__ = ('fragments', 'received', 'complete', 'updated_at', 'updated_seq')
+
+    def __init__(self, fragment_count: int) -> None:
+        self.fragments: typing.List[typing.Optional[AISSentence]] = [None, ] * fragment_count
+        # Bitmask of the received fragments: bit i is set, if fragment i + 1 was received
+        self.received: int = 0
+        self.complete: int = (1 << fragment_count) - 1
+        self.updated_at: float = 0.0
+        self.updated_seq: int = 0
+
+    @property
+    def size(self) -> int:
+        """Number of fragments received so far."""
+        return bin(self.received).count('1')
+
+
+class MultipartBuffer:
+    """
+    Collects the fragments of multipart messages until all fragments of a message are received.
+
+    The buffer is bounded: if there are more than `max_slots` incomplete messages,
+    the least recently updated message is evicted. Incomplete messages also expire,
+    if they were not updated for `timeout` seconds or if `timeout_fragments` other
+    fragments were received since their last update. Dropped fragments are counted.
+    """
+
+    def __init__(
+            self,
+            max_slots: int = 1024,
+            timeout: typing.Optional[float] = None,
+            timeout_fragments: typing.Optional[int] = None,
+            clock: typing.Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        @param max_slots: Maximum number of incomplete messages.
+        @param timeout: Seconds after which incomplete messages expire.
+        @param timeout_fragments: Number of received fragments after which incomplete messages expire.
+        @param clock: Function that returns the current time in seconds.
+        """
+        if max_slots < 1:
+            raise ValueError("max_slots must be positive")
+
+        self.max_slots = max_slots
+        self.timeout = timeout
+        self.timeout_fragments = timeout_fragments
+        self.clock = clock
+
+        # Number of fragments that were dropped, because their message expired
+        self.expired: int = 0
+        # Number of fragments that were dropped, because the buffer was full
+        self.evicted: int = 0
+        # Number of fragments that were dropped, because they did not fit to the other fragments of their slot
+        self.discarded: int = 0
+
+        self._seq: int = 0
+        # Slots are ordered by their last update: least recently updated first
+        self._slots: typing.OrderedDict[typing.Tuple[int, str], _Slot] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    @staticmethod
+    def slot(msg: AISSentence) -> typing.Tuple[int, str]:
+        """seq_id and channel make a unique stream. Instead of None use -1 as a seq_id."""
+        seq_id = msg.seq_id
+        if seq_id is None:
+            seq_id = -1
+        return seq_id, msg.channel
+
+    def __contains__(self, slot: object) -> bool:
+        return slot in self._slots
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[int, str]]:
+        return iter(self._slots)
+
+    def expire(self) -> int:
+        """
+        Drop all expired messages. This is done automatically whenever a fragment is added.
+        @return: The number of dropped fragments.
+        """
+        if self.timeout is None and self.timeout_fragments is None:
+            return 0
+
+        deadline = self.clock() - self.timeout if self.timeout is not None else None
+        min_seq = self._seq - self.timeout_fragments if self.timeout_fragments is not None else None
+        dropped = 0
+
+        # The least recently updated slot is always the first one
+        while self._slots:
+            entry = next(iter(self._slots.values()))
+            if (deadline is None or entry.updated_at > deadline) and (min_seq is None or entry.updated_seq > min_seq):
+                break
+            self._slots.popitem(last=False)
+            dropped += entry.size
+
+        self.expired += dropped
+        return dropped
+
+    def add(self, msg: AISSentence) -> typing.Optional[AISSentence]:
+        """
+        Add a single fragment to the buffer.
+        @param msg: A fragment of a multipart message.
+        @return: The assembled message, if all fragments are complete. Otherwise None.
+        """
+        self.expire()
+
+        fragment_count = msg.fragment_count
+        index = msg.frag_num - 1
+        if not 0 <= index < fragment_count:
+            self.discarded += 1
+            return None
+
+        slot = self.slot(msg)
+        entry = self._slots.pop(slot, None)
+        if entry is None or len(entry.fragments) != fragment_count:
+            if entry is not None:
+                # The fragment count changed. Therefore, the old fragments belong to another message.
+                self.discarded += entry.size
+            entry = _Slot(fragment_count)
+
+        self._seq += 1
+        entry.fragments[index] = msg
+        entry.received |= 1 << index
+
+        # Check if all fragments are found
+        if entry.received == entry.complete:
+            return NMEAMessage.assemble_from_iterable(typing.cast(typing.List[AISSentence], entry.fragments))
+
+        self._slots[slot] = entry
+        entry.updated_seq = self._seq
+        # Always keep the time, so that a timeout can be configured later on
+        entry.updated_at = self.clock()
+
+        if len(self._slots) > self.max_slots:
+            _, evicted = self._slots.popitem(last=False)
+            self.evicted += evicted.size
+        return None
+
+
 class AssembleMessages(ABC):
     """
     Base class that assembles multiline messages.
@@ -30,6 +184,8 @@ class AssembleMessages(ABC):
 
     def __init__(self) -> None:
         self.wrapper_msg: typing.Optional[GatehouseSentence] = None
+        # Fragments of incomplete multipart messages. Replace it to configure its limits.
+        self.buffer: MultipartBuffer = MultipartBuffer()
 
     def __enter__(self) -> "AssembleMessages":
         # Enables use of with statement
@@ -45,6 +201,10 @@ class AssembleMessages(ABC):
         """Returns the next decoded NMEA message."""
         return next(iter(self))
 
+    def lines(self) -> Generator[bytes, None, None]:
+        """Iterate over the raw lines (including tag blocks) as they were received, without parsing them."""
+        return self._iter_messages()
+
     def __set_last_wrapper_msg(self, wrapper_msg: GatehouseSentence) -> None:
         self.wrapper_msg = wrapper_msg
 
@@ -59,50 +219,64 @@ class AssembleMessages(ABC):
             msg.wrapper_msg = wrapper_msg
         return msg
 
-    def _assemble_messages(self) -> Generator[NMEAMessage, None, None]:
-        buffer: typing.Dict[typing.Tuple[int, str], typing.List[typing.Optional[NMEAMessage]]] = {}
-        messages = self._iter_messages()
-        msg: AISSentence
+    def filter(
+            self,
+            types: typing.Optional[Iterable[int]] = None,
+            mmsis: typing.Optional[Iterable[int]] = None,
+    ) -> Generator[NMEAMessage, None, None]:
+        """
+        Iterate over the messages of the given types and/or MMSIs.
+        Messages are filtered before they are decoded, so that skipped messages cost next to nothing.
+        @param types: Message types to keep. None keeps all types.
+        @param mmsis: MMSIs to keep. None keeps all MMSIs.
+        """
+        type_set = frozenset(types) if types is not None else None
+        mmsi_set = frozenset(mmsis) if mmsis is not None else None
 
-        for line in messages:
-            try:
-                sentence = NMEASentenceFactory.produce(line)
-                if sentence.TYPE == GatehouseSentence.TYPE:
-                    sentence = cast(GatehouseSentence, sentence)
-                    self.__set_last_wrapper_msg(sentence)
-                    continue
-            except (InvalidNMEAMessageException, NonPrintableCharacterException, UnknownMessageException):
-                # Be gentle and just skip invalid messages
+        for msg in self:
+            if type_set is not None and msg.ais_id not in type_set:
                 continue
-
-            if not sentence.TYPE == AISSentence.TYPE:
+            if mmsi_set is not None and armored_mmsi(msg.payload) not in mmsi_set:
                 continue
-            msg = typing.cast(AISSentence, sentence)
+            yield msg
 
-            if msg.is_single:
-                yield self.__insert_wrapper_msg(msg)
-            else:
-                # Instead of None use -1 as a seq_id
-                seq_id = msg.seq_id
-                if seq_id is None:
-                    seq_id = -1
+    def _assemble_messages(self) -> Generator[NMEAMessage, None, None]:
+        buffer = self.buffer
+        assemble = self._assemble_line
 
-                # seq_id and channel make a unique stream
-                slot = (seq_id, msg.channel)
+        for line in self._iter_messages():
+            msg = assemble(line, buffer)
+            if msg is not None:
+                yield msg
 
-                if slot not in buffer:
-                    # Create a new array in the buffer that has enough space for all fragments
-                    buffer[slot] = [None, ] * max(msg.fragment_count, 0xff)
+    def _assemble_line(self, line: bytes, buffer: MultipartBuffer) -> typing.Optional[NMEAMessage]:
+        """
+        Parse a single line.
+        @param line: A single NMEA sentence.
+        @param buffer: The buffer that holds the fragments of incomplete multipart messages.
+        @return: The (assembled) AIS message or None, if the line does not complete a message.
+        """
+        try:
+            sentence = NMEASentenceFactory.produce(line)
+            if sentence.TYPE == GatehouseSentence.TYPE:
+                sentence = cast(GatehouseSentence, sentence)
+                self.__set_last_wrapper_msg(sentence)
+                return None
+        except (InvalidNMEAMessageException, NonPrintableCharacterException, UnknownMessageException):
+            # Be gentle and just skip invalid messages
+            return None
 
-                buffer[slot][msg.frag_num - 1] = msg
-                msg_parts = buffer[slot][0:msg.fragment_count]
+        if not sentence.TYPE == AISSentence.TYPE:
+            return None
+        msg = typing.cast(AISSentence, sentence)
 
-                # Check if all fragments are found
-                not_none_parts = [m for m in msg_parts if m is not None]
-                if len(not_none_parts) == msg.fragment_count:
-                    msg = NMEAMessage.assemble_from_iterable(not_none_parts)
-                    yield self.__insert_wrapper_msg(msg)
-                    del buffer[slot]
+        if msg.is_single:
+            return self.__insert_wrapper_msg(msg)
+
+        assembled = buffer.add(msg)
+        if assembled is not None:
+            return self.__insert_wrapper_msg(assembled)
+        return None
 
     @abstractmethod
     def _iter_messages(self) -> Generator[bytes, None, None]:
@@ -160,6 +334,9 @@ class Stream(AssembleMessages, Generic[F], ABC):
         # Do not parse lines, that are obviously not NMEA messages
         yield from (line for line in self.read() if should_parse(line))
 
+    def lines(self) -> Generator[bytes, None, None]:
+        return self.read()
+
     @abstractmethod
     def read(self) -> Generator[bytes, None, None]:
         raise NotImplementedError()
@@ -172,13 +349,20 @@ class BinaryIOStream(Stream[BinaryIO]):
         super().__init__(file)
 
     def read(self) -> Generator[bytes, None, None]:
-        yield from self._fobj.readlines()
+        # Read line by line instead of readlines() to keep the memory usage constant
+        readline = self._fobj.readline
+        line = readline()
+        while line:
+            yield line
+            line = readline()
 
 
 class FileReaderStream(BinaryIOStream):
     """
     Read NMEA messages from file
     """
+    # Number of bytes that are split into lines at once
+    CHUNK_SIZE = 1 << 20
 
     def __init__(self, filename: str, mode: str = "rb") -> None:
         self.filename: str = filename
@@ -191,6 +375,33 @@ class FileReaderStream(BinaryIOStream):
             raise FileNotFoundError(f"Could not open file {self.filename}") from e
         super().__init__(file)
 
+    def read(self) -> Generator[bytes, None, None]:
+        """
+        Map the file into memory and scan it for line breaks in place.
+        Pages are loaded lazily by the OS, so the memory usage does not depend on the size of the file.
+        """
+        try:
+            mapped = mmap.mmap(self._fobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and special files (e.g. pipes) can not be mapped
+            yield from super().read()
+            return
+
+        with mapped:
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+            # Scanning line by line in Python is slow. Instead, split chunks that end at a line break.
+            start, size, chunk_size = 0, len(mapped), self.CHUNK_SIZE
+            while start < size:
+                end = mapped.rfind(b'\n', start, start + chunk_size) + 1
+                if end <= start:
+                    # The line is longer than a chunk or the file does not end with a line break
+                    end = mapped.find(b'\n', start + chunk_size) + 1 or size
+                # Unlike bytes.splitlines(), readlines() only splits at \n, just like reading the file line by line
+                yield from io.BytesIO(mapped[start:end]).readlines()
+                start = end
+
 
 class ByteStream(Stream[None]):
     """
@@ -208,41 +419,217 @@ class ByteStream(Stream[None]):
         yield from self.iterable
 
 
+class LineSplitter:
+    """
+    Splits chunks of bytes received from a socket into lines.
+    Lines are terminated by \\n or \\r\\n. Incomplete lines are kept until the next chunk arrives.
+    """
+
+    def __init__(self) -> None:
+        self.partial: bytes = b''
+
+    def split(self, body: bytes) -> List[bytes]:
+        """Return all complete and non empty lines."""
+        if self.partial:
+            body = self.partial + body
+
+        end = body.rfind(b'\n')
+        if end < 0:
+            self.partial = body
+            return []
+
+        self.partial = body[end + 1:]
+        return [line for line in body[:end].splitlines() if line]
+
+
+class LineReader:
+    """
+    Receives data into a reusable buffer and splits it into lines.
+    Lines are terminated by \\n or \\r\\n. Incomplete lines are kept at the front of the buffer.
+    Lines that do not fit into the buffer are dropped.
+    """
+
+    def __init__(self, recv_into: typing.Callable[[memoryview], int], buf_size: int, ring_size: int) -> None:
+        """
+        @param recv_into: Function that receives up to buf_size bytes into a given buffer and returns the number of bytes.
+        @param buf_size: Minimum free space that is needed to receive data.
+        @param ring_size: Size of the buffer.
+        """
+        self.recv_into = recv_into
+        self.buf_size = buf_size
+        self._buf = bytearray(max(ring_size, 2 * buf_size))
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+        # Whether the incomplete line is discarded after the next receive
+        self._discard = False
+        # Number of bytes that were dropped, because a line was too long or incomplete
+        self.dropped: int = 0
+
+    def discard(self) -> None:
+        """
+        Discard the incomplete line, e.g. because it belongs to a connection that was lost.
+        Can be called from recv_into: the data received by this call is kept.
+        """
+        self._discard = True
+
+    def read_lines(self) -> typing.Optional[List[bytes]]:
+        """
+        Receive data once.
+        @return: All complete and non empty lines or None, if the connection was closed.
+        """
+        buf, start, end = self._buf, self._start, self._end
+
+        if len(buf) - end < self.buf_size:
+            # Move the incomplete line to the front of the buffer
+            pending = end - start
+            if pending > len(buf) - self.buf_size:
+                self.dropped += pending
+                pending = 0
+            else:
+                buf[:pending] = buf[start:end]
+            start, end = 0, pending
+
+        received = self.recv_into(self._view[end:])
+        if self._discard:
+            self._discard = False
+            self.dropped += end - start
+            start = end
+        if not received:
+            self._start, self._end = start, end
+            return None
+        end += received
+
+        last = buf.rfind(b'\n', start, end)
+        if last < 0:
+            self._start, self._end = start, end
+            return []
+
+        lines = bytes(self._view[start:last]).splitlines()
+        start = last + 1
+        if start == end:
+            start = end = 0
+        self._start, self._end = start, end
+        return [line for line in lines if line]
+
+
 class SocketStream(Stream[socket]):
+    # Maximum number of bytes received at once
     BUF_SIZE = 4096
+    # Size of the buffer that holds the received data until it is split into lines
+    RING_SIZE = 1 << 16
 
     def recv(self) -> bytes:
         return b""
 
+    def recv_into(self, view: memoryview) -> int:
+        """
+        Receive data into a given buffer.
+        @param view: The buffer. It has room for at least BUF_SIZE bytes.
+        @return: The number of received bytes. 0, if the connection was closed.
+        """
+        data = self.recv()
+        view[:len(data)] = data
+        return len(data)
+
+    def line_reader(self) -> LineReader:
+        return LineReader(self.recv_into, self.BUF_SIZE, self.RING_SIZE)
+
     def read(self) -> Generator[bytes, None, None]:
-        partial: bytes = b''
+        read_lines = self.line_reader().read_lines
         while True:
-            body = self.recv()
+            lines = read_lines()
 
             # Server closed connection
-            if not body:
+            if lines is None:
                 return None
 
-            lines = body.split(b'\r\n')
-
-            line = partial + lines[0]
-            if line:
-                yield line
-
-            yield from (line for line in lines[1:-1] if line)
-
-            partial = lines[-1]
+            yield from lines
 
 
 class UDPReceiver(SocketStream):
-
-    def __init__(self, host: str, port: int) -> None:
+    """
+    Receive AIS data over UDP.
+    All datagrams that are queued in the kernel are received at once. Datagrams are truncated to BUF_SIZE bytes.
+    """
+    RING_SIZE = 1 << 18
+
+    def __init__(
+            self,
+            host: str,
+            port: int,
+            rcvbuf: typing.Optional[int] = None,
+            buf_size: typing.Optional[int] = None,
+    ) -> None:
+        """
+        @param host: Address to listen on.
+        @param port: Port to listen on.
+        @param rcvbuf: Size of the receive buffer of the socket (SO_RCVBUF) in bytes.
+        @param buf_size: Maximum size of a single datagram. Defaults to BUF_SIZE.
+        """
         sock: socket = socket(AF_INET, SOCK_DGRAM)
+        if rcvbuf is not None:
+            sock.setsockopt(SOL_SOCKET, SO_RCVBUF, rcvbuf)
         sock.bind((host, port))
         super().__init__(sock)
 
+        if buf_size is not None:
+            self.BUF_SIZE = buf_size
+        self._view: typing.Optional[memoryview] = None
+        # Number of datagrams received so far
+        self.datagrams: int = 0
+
+    @property
+    def rcvbuf(self) -> int:
+        """The actual size of the receive buffer. Linux doubles the requested size."""
+        return int(self._fobj.getsockopt(SOL_SOCKET, SO_RCVBUF))
+
+    @property
+    def drops(self) -> typing.Optional[int]:
+        """
+        Number of datagrams that were dropped by the kernel, e.g. because the receive buffer was full.
+        This is only available on Linux. Otherwise None is returned.
+        """
+        inode = str(os.fstat(self._fobj.fileno()).st_ino)
+        for path in ('/proc/net/udp', '/proc/net/udp6'):
+            try:
+                with open(path) as fd:
+                    for line in fd:
+                        # sl local_address rem_address st tx_queue:rx_queue tr:tm->when retrnsmt uid timeout inode ref pointer drops
+                        fields = line.split()
+                        if len(fields) > 12 and fields[9] == inode:
+                            return int(fields[12])
+            except OSError:
+                continue
+        return None
+
     def recv(self) -> bytes:
-        return self._fobj.recvfrom(self.BUF_SIZE)[0]
+        if self._view is None:
+            self._view = memoryview(bytearray(max(self.RING_SIZE, self.BUF_SIZE)))
+        return bytes(self._view[:self.recv_into(self._view)])
+
+    def recv_into(self, view: memoryview) -> int:
+        sock, buf_size = self._fobj, self.BUF_SIZE
+
+        # Block until the first datagram arrives
+        offset = sock.recv_into(view, buf_size)
+        if not offset:
+            return 0
+        count = 1
+
+        # Drain all other queued datagrams without blocking
+        if MSG_DONTWAIT:
+            limit = len(view) - buf_size
+            while offset <= limit:
+                try:
+                    size = sock.recv_into(view[offset:], buf_size, MSG_DONTWAIT)
+                except BlockingIOError:
+                    break
+                offset += size
+                count += 1
+
+        self.datagrams += count
+        return offset
 
 
 class TCPConnection(SocketStream):
@@ -254,11 +641,402 @@ class TCPConnection(SocketStream):
     def recv(self) -> bytes:
         return self._fobj.recv(self.BUF_SIZE)
 
-    def __init__(self, host: str, port: int = 80) -> None:
+    def recv_into(self, view: memoryview) -> int:
+        return self._fobj.recv_into(view, self.BUF_SIZE)
+
+    def __init__(self, host: str, port: int = 80, buf_size: typing.Optional[int] = None) -> None:
+        self.host: str = host
+        self.port: int = port
+        super().__init__(self._connect())
+
+        if buf_size is not None:
+            self.BUF_SIZE = buf_size
+
+    def _connect(self) -> socket:
         sock: socket = socket(AF_INET, SOCK_STREAM)
         try:
-            sock.connect((host, port))
+            sock.connect((self.host, self.port))
         except ConnectionRefusedError as e:
             sock.close()
-            raise ConnectionRefusedError(f"Failed to connect to {host}:{port}") from e
-        super().__init__(sock)
+            raise ConnectionRefusedError(f"Failed to connect to {self.host}:{self.port}") from e
+        return sock
+
+
+class ReconnectingTCPConnection(TCPConnection):
+    """
+    Read AIS data from a remote TCP server and reconnect automatically, if the connection is lost.
+    Reconnects are delayed with exponential backoff and jitter.
+    Incomplete multipart messages are kept across reconnects.
+
+    The connection is considered lost, if the server closes it, if an error occurs
+    or if no data was received for `timeout` seconds.
+    The initial connection is not retried: like TCPConnection, the constructor raises a
+    ConnectionRefusedError at once, if the server can not be reached within `connect_timeout` seconds.
+    Because the underlying socket is replaced on reconnect, this stream can not be used with MultiStream.
+    """
+
+    def __init__(
+            self,
+            host: str,
+            port: int = 80,
+            buf_size: typing.Optional[int] = None,
+            timeout: typing.Optional[float] = 60.0,
+            connect_timeout: typing.Optional[float] = 10.0,
+            keepalive: typing.Optional[int] = 30,
+            initial_delay: float = 1.0,
+            max_delay: float = 60.0,
+            max_retries: typing.Optional[int] = None,
+    ) -> None:
+        """
+        @param host: The remote host.
+        @param port: The remote port.
+        @param buf_size: Maximum number of bytes received at once. Defaults to BUF_SIZE.
+        @param timeout: Seconds without any data after which the connection is considered lost. None waits forever.
+        @param connect_timeout: Timeout for establishing a connection in seconds.
+        @param keepalive: Seconds of idle time before TCP keepalive probes are sent. None disables keepalive.
+        @param initial_delay: Delay before the first reconnect attempt in seconds.
+        @param max_delay: Maximum delay between two reconnect attempts in seconds.
+        @param max_retries: Maximum number of failed reconnect attempts in a row. None retries forever.
+        """
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.keepalive = keepalive
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+
+        # The reader of the current iteration. Its incomplete line is discarded on reconnect.
+        self._line_reader: typing.Optional[LineReader] = None
+        # Number of successful reconnects
+        self.reconnects: int = 0
+        # Total number of seconds without a connection
+        self.downtime: float = 0.0
+        # The error that caused the last disconnect (if any)
+        self.last_error: typing.Optional[BaseException] = None
+
+        super().__init__(host, port, buf_size)
+
+    def backoff(self, attempt: int) -> float:
+        """The delay in seconds before a given (zero based) attempt. Jitter avoids that many clients reconnect at once."""
+        delay = min(self.max_delay, self.initial_delay * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def _connect(self) -> socket:
+        """A single connection attempt, that takes at most connect_timeout seconds."""
+        try:
+            sock = create_connection((self.host, self.port), timeout=self.connect_timeout)
+        except OSError as e:
+            self.last_error = e
+            raise ConnectionRefusedError(f"Failed to connect to {self.host}:{self.port}") from e
+
+        sock.settimeout(self.timeout)
+        if self.keepalive is not None:
+            sock.setsockopt(SOL_SOCKET, SO_KEEPALIVE, 1)
+            # These options are not available on all systems
+            for option, value in (('TCP_KEEPIDLE', self.keepalive), ('TCP_KEEPINTVL', self.keepalive), ('TCP_KEEPCNT', 3)):
+                if hasattr(_socket, option):
+                    sock.setsockopt(IPPROTO_TCP, getattr(_socket, option), value)
+        return sock
+
+    def _connect_with_retries(self) -> socket:
+        attempt = 0
+        while True:
+            try:
+                return self._connect()
+            except ConnectionRefusedError:
+                if self.max_retries is not None and attempt >= self.max_retries:
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+
+    def recv(self) -> bytes:
+        data = bytearray(self.BUF_SIZE)
+        return bytes(data[:self.recv_into(memoryview(data))])
+
+    def line_reader(self) -> LineReader:
+        reader = self._line_reader = super().line_reader()
+        return reader
+
+    def recv_into(self, view: memoryview) -> int:
+        while True:
+            try:
+                received = self._fobj.recv_into(view, self.BUF_SIZE)
+            except OSError as e:
+                self.last_error = e
+                received = 0
+
+            if received:
+                return received
+            if not self._reconnect():
+                # Give up and end the stream
+                return 0
+
+    def _reconnect(self) -> bool:
+        self._fobj.close()
+        lost_at = time.monotonic()
+        try:
+            self._fobj = self._connect_with_retries()
+        except ConnectionRefusedError:
+            return False
+        finally:
+            self.downtime += time.monotonic() - lost_at
+
+        self.reconnects += 1
+        # The incomplete line of the previous connection is never completed
+        if self._line_reader is not None:
+            self._line_reader.discard()
+        return True
+
+
+class MultiStream(AssembleMessages):
+    """
+    Merge many streams (e.g. TCPConnection, UDPReceiver, FileReaderStream) into a single stream.
+    Sockets are multiplexed with selectors in a single thread. All other streams are read in turns.
+
+    Every source keeps its own buffer for multipart messages and its own Gatehouse wrapper state,
+    so that fragments of different sources never mix.
+
+    ReconnectingTCPConnection is not supported: it replaces its socket and blocks while it reconnects.
+    """
+    # Number of lines read from a non socket source before switching to the next source
+    LINES_PER_TURN = 64
+
+    def __init__(self, *sources: AssembleMessages) -> None:
+        for source in sources:
+            if isinstance(source, ReconnectingTCPConnection):
+                raise TypeError("MultiStream does not support ReconnectingTCPConnection, because it replaces its socket")
+        super().__init__()
+        self.sources: typing.Tuple[AssembleMessages, ...] = sources
+
+    def __exit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        for source in self.sources:
+            source.__exit__(exc_type, exc_val, exc_tb)
+
+    def _assemble_messages(self) -> Generator[NMEAMessage, None, None]:
+        for _, msg in self.iter_with_source():
+            yield msg
+
+    def _iter_messages(self) -> Generator[bytes, None, None]:
+        # Raw lines of all sources in the order they are received
+        for _, line in self._iter_lines():
+            yield line
+
+    def iter_with_source(self) -> Generator[typing.Tuple[AssembleMessages, NMEAMessage], None, None]:
+        """Iterate over all messages. Yields tuples of (source, message)."""
+        for source, line in self._iter_lines():
+            # Use the source to assemble the message, so that every source keeps its own state
+            msg = source._assemble_line(line, source.buffer)
+            if msg is not None:
+                yield source, msg
+
+    def _iter_lines(self) -> Generator[typing.Tuple[AssembleMessages, bytes], None, None]:
+        selector = selectors.DefaultSelector()
+        iterators: typing.Dict[AssembleMessages, typing.Iterator[bytes]] = {}
+
+        for source in self.sources:
+            if isinstance(source, SocketStream):
+                selector.register(source._fobj, selectors.EVENT_READ, (source, source.line_reader()))
+            else:
+                iterators[source] = source._iter_messages()
+
+        try:
+            while selector.get_map() or iterators:
+                # Do not block on sockets as long as there are other sources to read from
+                timeout = 0 if iterators else None
+                for key, _ in selector.select(timeout):
+                    source, reader = key.data
+                    lines = reader.read_lines()
+
+                    # Server closed connection
+                    if lines is None:
+                        selector.unregister(key.fileobj)
+                        continue
+
+                    for line in lines:
+                        if should_parse(line):
+                            yield source, line
+
+                for source, lines in list(iterators.items()):
+                    n = 0
+                    for n, line in enumerate(itertools.islice(lines, self.LINES_PER_TURN), start=1):
+                        yield source, line
+                    if n < self.LINES_PER_TURN:
+                        del iterators[source]
+        finally:
+            selector.close()
+
+
+class AsyncSocketStream(AssembleMessages, ABC):
+    """
+    Base class of asyncio based streams. Many streams can share a single thread.
+    Use `async for msg in stream` to iterate over the messages.
+    """
+    # Pause reading from the transport, if that many chunks are not consumed yet
+    MAX_PENDING_CHUNKS = 1024
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._transport: typing.Optional[asyncio.BaseTransport] = None
+        self._queue: typing.Optional["asyncio.Queue[typing.Optional[List[bytes]]]"] = None
+        self._splitter = LineSplitter()
+        self._paused = False
+        self._exc: typing.Optional[BaseException] = None
+
+    async def __aenter__(self) -> "AsyncSocketStream":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        self.close()
+
+    def __aiter__(self) -> typing.AsyncGenerator[NMEAMessage, None]:
+        return self._assemble_messages_async()
+
+    def __iter__(self) -> Generator[NMEAMessage, None, None]:
+        raise TypeError(f"{type(self).__name__} is asynchronous. Use 'async for' instead.")
+
+    def _iter_messages(self) -> Generator[bytes, None, None]:
+        raise TypeError(f"{type(self).__name__} is asynchronous. Use 'async for' instead.")
+
+    async def open(self) -> None:
+        """Create the underlying transport, if it is not open yet."""
+        if self._transport is None:
+            self._queue = asyncio.Queue()
+            self._transport = await self._create_transport()
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+    @abstractmethod
+    async def _create_transport(self) -> asyncio.BaseTransport:
+        raise NotImplementedError()
+
+    def _feed_data(self, data: bytes) -> None:
+        """Called by the protocol for every chunk of data that was received."""
+        lines = self._splitter.split(data)
+        if not lines or self._queue is None:
+            return
+        self._queue.put_nowait(lines)
+
+        if not self._paused and self._queue.qsize() >= self.MAX_PENDING_CHUNKS:
+            pause_reading = getattr(self._transport, 'pause_reading', None)
+            if pause_reading is not None:
+                pause_reading()
+                self._paused = True
+
+    def _feed_eof(self, exc: typing.Optional[BaseException] = None) -> None:
+        """Called by the protocol if the connection was closed."""
+        self._exc = exc
+        if self._queue is not None:
+            self._queue.put_nowait(None)
+
+    async def line_batches(self) -> typing.AsyncGenerator[List[bytes], None]:
+        """Iterate over the raw lines as they were received, without parsing them. Lines are batched per chunk of data."""
+        await self.open()
+        queue = typing.cast("asyncio.Queue[typing.Optional[List[bytes]]]", self._queue)
+
+        while True:
+            lines = await queue.get()
+
+            # Connection closed
+            if lines is None:
+                if self._exc is not None:
+                    raise self._exc
+                return
+
+            if self._paused and queue.qsize() <= self.MAX_PENDING_CHUNKS // 2:
+                self._paused = False
+                typing.cast(asyncio.ReadTransport, self._transport).resume_reading()
+            yield lines
+
+    async def _assemble_messages_async(self) -> typing.AsyncGenerator[NMEAMessage, None]:
+        buffer = self.buffer
+        assemble = self._assemble_line
+
+        async for lines in self.line_batches():
+            for line in lines:
+                # Do not parse lines, that are obviously not NMEA messages
+                if should_parse(line):
+                    msg = assemble(line, buffer)
+                    if msg is not None:
+                        yield msg
+
+
+class _StreamProtocol(asyncio.Protocol):
+    """Passes the data received over a TCP connection to an AsyncSocketStream."""
+
+    def __init__(self, stream: AsyncSocketStream) -> None:
+        self.stream = stream
+
+    def data_received(self, data: bytes) -> None:
+        self.stream._feed_data(data)
+
+    def eof_received(self) -> bool:
+        # Let the transport close itself
+        return False
+
+    def connection_lost(self, exc: typing.Optional[Exception]) -> None:
+        self.stream._feed_eof(exc)
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    """Passes the datagrams received over UDP to an AsyncSocketStream."""
+
+    def __init__(self, stream: AsyncSocketStream) -> None:
+        self.stream = stream
+
+    def datagram_received(self, data: bytes, addr: typing.Tuple[str, int]) -> None:
+        self.stream._feed_data(data)
+
+    def error_received(self, exc: Exception) -> None:
+        # Errors (e.g. ICMP port unreachable) are not fatal for a receiver
+        pass
+
+    def connection_lost(self, exc: typing.Optional[Exception]) -> None:
+        self.stream._feed_eof(exc)
+
+
+class AsyncUDPReceiver(AsyncSocketStream):
+    """
+    Receive AIS data over UDP using asyncio.
+
+    async with AsyncUDPReceiver('0.0.0.0', 12345) as stream:
+        async for msg in stream:
+            ...
+    """
+
+    def __init__(self, host: str, port: int) -> None:
+        self.host: str = host
+        self.port: int = port
+        super().__init__()
+
+    async def _create_transport(self) -> asyncio.BaseTransport:
+        loop = asyncio.get_event_loop()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _DatagramProtocol(self), local_addr=(self.host, self.port)
+        )
+        return transport
+
+
+class AsyncTCPConnection(AsyncSocketStream):
+    """
+    Read AIS data from a remote TCP server using asyncio.
+
+    async with AsyncTCPConnection('153.44.253.27', 5631) as stream:
+        async for msg in stream:
+            ...
+    """
+
+    def __init__(self, host: str, port: int = 80) -> None:
+        self.host: str = host
+        self.port: int = port
+        super().__init__()
+
+    async def _create_transport(self) -> asyncio.BaseTransport:
+        loop = asyncio.get_event_loop()
+        try:
+            transport, _ = await loop.create_connection(lambda: _StreamProtocol(self), self.host, self.port)
+        except ConnectionRefusedError as e:
+            raise ConnectionRefusedError(f"Failed to connect to {self.host}:{self.port}") from e
+        return transport
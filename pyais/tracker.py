@@ -4,10 +4,29 @@ necessary because several messages can give different information
 about a ship. In addition, the data changes constantly (position, speed).
 Each track (or vessel) is solely identified by its MMSI.
 """
+import array
+import contextlib
+import mmap
+import os
+import struct
+import sys
 import typing
 import time
 import dataclasses
+import heapq
+import itertools
+import math
+from pyais.constants import ShipType, TurnRate
+from pyais.exceptions import InvalidSnapshotException
 from pyais.messages import ANY_MESSAGE, AISSentence
+from pyais.optional import require_numpy
+
+if typing.TYPE_CHECKING:
+    import numpy as np
+
+# Mean radius of the earth in nautical miles
+EARTH_RADIUS_NM = 3440.065
+CELL = typing.Tuple[int, int]
 
 
 def now() -> float:
@@ -15,6 +34,24 @@ def now() -> float:
     return time.time()
 
 
+C = typing.TypeVar('C', bound=type)
+
+
+def add_slots(cls: C) -> C:
+    """Recreate a dataclass with __slots__, so that its instances have no __dict__.
+    Same as dataclass(slots=True), which is only available since Python 3.10."""
+    cls_dict = dict(cls.__dict__)
+    names = tuple(field.name for field in dataclasses.fields(typing.cast(typing.Any, cls)))
+    cls_dict['__slots__'] = names
+    for name in names:
+        # Defaults are part of the generated __init__ and would clash with the slots
+        cls_dict.pop(name, None)
+    cls_dict.pop('__dict__', None)
+    cls_dict.pop('__weakref__', None)
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
+@add_slots
 @dataclasses.dataclass(eq=True, order=True)
 class AISTrack:
     """Each track holds some consolidated information about a vessel.
@@ -41,6 +78,31 @@ class AISTrack:
 
 # compute a set of all fields only once
 FIELDS = dataclasses.fields(AISTrack)
+FIELD_NAMES = tuple(field.name for field in FIELDS if field.name != 'last_updated')
+TRACK_FIELD_NAMES = tuple(field.name for field in FIELDS)
+
+# The fields of AISTrack that a message class provides: { MessageType1: ('mmsi', 'turn', ...), ...}
+MESSAGE_FIELDS: typing.Dict[type, typing.Tuple[str, ...]] = {}
+
+
+def message_fields(msg: typing.Union[ANY_MESSAGE, AISTrack]) -> typing.Tuple[str, ...]:
+    """The names of all fields of AISTrack that a message has."""
+    try:
+        return MESSAGE_FIELDS[type(msg)]
+    except KeyError:
+        names = MESSAGE_FIELDS[type(msg)] = tuple(name for name in FIELD_NAMES if hasattr(msg, name))
+        return names
+
+
+def update_from_message(track: AISTrack, msg: typing.Union[ANY_MESSAGE, AISTrack]) -> AISTrack:
+    """Updates all fields of a track in place with the values of a message, that are not None.
+    :param track: the AISTrack to update.
+    :param msg:   any decoded AIS message of type AISMessage or another AISTrack."""
+    for name in message_fields(msg):
+        val = getattr(msg, name)
+        if val is not None:
+            setattr(track, name, val)
+    return track
 
 
 def msg_to_track(msg: ANY_MESSAGE, ts_epoch_ms: typing.Optional[float] = None) -> AISTrack:
@@ -55,27 +117,499 @@ def msg_to_track(msg: ANY_MESSAGE, ts_epoch_ms: typing.Optional[float] = None) -
     else:
         track = AISTrack(mmsi=msg.mmsi, last_updated=ts_epoch_ms)
 
-    for field in FIELDS:
-        if not hasattr(msg, field.name):
-            continue
-        val = getattr(msg, field.name)
-        if val is not None:
-            setattr(track, field.name, val)
-
-    return track
+    return update_from_message(track, msg)
 
 
 def update_track(old: AISTrack, new: AISTrack) -> AISTrack:
     """Updates all fields of old with the values of new.
     :param old: the old AISTrack to update.
     :param new: the new AISTrack to update old with."""
-    for field in FIELDS:
-        new_val = getattr(new, field.name)
+    for name in TRACK_FIELD_NAMES:
+        new_val = getattr(new, name)
         if new_val is not None:
-            setattr(old, field.name, new_val)
+            setattr(old, name, new_val)
     return old
 
 
+def is_valid_position(lat: typing.Optional[float], lon: typing.Optional[float]) -> bool:
+    """AIS uses lat=91 and lon=181 if the position is not available."""
+    return lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great circle distance between two positions in nautical miles (haversine formula)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """
+    Spatial index that assigns positions to the cells of a regular lat/lon grid.
+    Only the cells that intersect a bounding box need to be looked at, instead of all positions.
+    Keys without a valid position are not indexed.
+    """
+
+    def __init__(self, cell_size: float = 1.0) -> None:
+        """
+        :param cell_size: the width and height of a cell in degrees.
+        """
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        self._cells: typing.Dict[CELL, typing.Set[int]] = {}  # { (row, col): {key, ...}, ...}
+        self._keys: typing.Dict[int, CELL] = {}  # { key: (row, col), ...}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def cell(self, lat: float, lon: float) -> CELL:
+        """The cell of a given position."""
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def update(self, key: int, lat: typing.Optional[float], lon: typing.Optional[float]) -> None:
+        """Insert or move a key. Keys are removed from the index, if the position is not valid."""
+        cell = None
+        if is_valid_position(lat, lon):
+            cell = self.cell(typing.cast(float, lat), typing.cast(float, lon))
+        old = self._keys.get(key)
+        if cell == old:
+            return
+        if old is not None:
+            self.remove(key)
+        if cell is not None:
+            self._keys[key] = cell
+            try:
+                self._cells[cell].add(key)
+            except KeyError:
+                self._cells[cell] = {key}
+
+    def remove(self, key: int) -> None:
+        """Remove a key from the index, if it exists."""
+        cell = self._keys.pop(key, None)
+        if cell is not None:
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def query(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> typing.Iterator[int]:
+        """
+        All keys in cells that intersect a bounding box. The result may contain keys outside of the box.
+        If min_lon is greater than max_lon, the box crosses the antimeridian.
+        """
+        if min_lon > max_lon:
+            yield from self.query(min_lat, min_lon, max_lat, 180)
+            yield from self.query(min_lat, -180, max_lat, max_lon)
+            return
+
+        min_row, min_col = self.cell(min_lat, min_lon)
+        max_row, max_col = self.cell(max_lat, max_lon)
+
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+            # Large boxes: it is cheaper to look at all non-empty cells
+            for (row, col), keys in self._cells.items():
+                if min_row <= row <= max_row and min_col <= col <= max_col:
+                    yield from keys
+            return
+
+        cells = self._cells
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                found = cells.get((row, col))
+                if found:
+                    yield from found
+
+
+HISTORY_COLUMNS = ('ts', 'lat', 'lon', 'speed', 'course')
+
+
+# The maximum number of consecutive positions, that a TrackHistory drops because of its tolerance
+MAX_DROPPED = 64
+
+
+class TrackHistory:
+    """
+    Recent positions of a single track in a ring buffer of fixed capacity.
+    Timestamps and positions are stored as doubles, speed and course as floats (NaN if unknown).
+    Once the buffer is full, the oldest positions are overwritten.
+
+    Positions can be downsampled while they are added:
+    - min_interval: positions that follow the last stored position within less seconds are skipped.
+    - tolerance: if the last stored position and all positions it replaced before are less than tolerance
+      nautical miles away from the segment between the position before and the new position,
+      the last position is replaced by the new one.
+      This is an online variant of the Douglas-Peucker algorithm, that drops positions on straight courses.
+      At most MAX_DROPPED positions are replaced in a row, which bounds the cost of an append.
+    """
+
+    __slots__ = ('capacity', 'min_interval', 'tolerance', 'ts', 'lat', 'lon', 'speed', 'course', '_end', '_dropped')
+
+    def __init__(self, capacity: int = 256, min_interval: float = 0.0, tolerance: float = 0.0) -> None:
+        """
+        :param capacity: the maximum number of positions.
+        :param min_interval: the minimum number of seconds between two positions.
+        :param tolerance: the maximum distance in nautical miles of a dropped position to the trajectory.
+        """
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self.min_interval = min_interval
+        self.tolerance = tolerance
+        # The buffers grow until the capacity is reached
+        self.ts = array.array('d')
+        self.lat = array.array('d')
+        self.lon = array.array('d')
+        self.speed = array.array('f')
+        self.course = array.array('f')
+        # Index after the newest position
+        self._end = 0
+        # Positions replaced since the position before the last one
+        self._dropped: typing.List[typing.Tuple[float, float]] = []
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[float, float, float, float, float]]:
+        """Iterate over (ts, lat, lon, speed, course) tuples, oldest first."""
+        for i in self._order():
+            yield self.ts[i], self.lat[i], self.lon[i], self.speed[i], self.course[i]
+
+    def _order(self) -> typing.Iterable[int]:
+        n = len(self.ts)
+        if n < self.capacity:
+            return range(n)
+        return itertools.chain(range(self._end, n), range(self._end))
+
+    def _prev(self, i: int, steps: int = 1) -> int:
+        return (i - steps) % len(self.ts)
+
+    def append(self, ts: float, lat: float, lon: float,
+               speed: typing.Optional[float] = None, course: typing.Optional[float] = None) -> bool:
+        """Add a position. Returns False, if it was skipped by downsampling."""
+        n = len(self.ts)
+        if n and ts - self.ts[self._prev(self._end)] < self.min_interval:
+            return False
+
+        speed = math.nan if speed is None else speed
+        course = math.nan if course is None else course
+
+        if n >= 2 and self.tolerance > 0:
+            anchor = self._prev(self._end, 2)
+            if len(self._dropped) < MAX_DROPPED and self._within_tolerance(anchor, lat, lon):
+                # The last position lies on the way. Replace it.
+                last = self._prev(self._end)
+                self._dropped.append((self.lat[last], self.lon[last]))
+                self._set(last, ts, lat, lon, speed, course)
+                return True
+
+        # The last position becomes the new anchor
+        self._dropped.clear()
+        if n < self.capacity:
+            for column, value in zip((self.ts, self.lat, self.lon, self.speed, self.course), (ts, lat, lon, speed, course)):
+                column.append(value)
+        else:
+            self._set(self._end, ts, lat, lon, speed, course)
+        self._end = (self._end + 1) % self.capacity
+        return True
+
+    def _set(self, i: int, ts: float, lat: float, lon: float, speed: float, course: float) -> None:
+        self.ts[i], self.lat[i], self.lon[i], self.speed[i], self.course[i] = ts, lat, lon, speed, course
+
+    def _within_tolerance(self, anchor: int, lat: float, lon: float) -> bool:
+        """True, if the last position and all positions dropped since the anchor are less than tolerance
+        nautical miles away from the segment between the anchor and (lat, lon).
+        Uses a local flat projection around the anchor, which is accurate for short distances."""
+        lat0, lon0 = self.lat[anchor], self.lon[anchor]
+        scale = math.cos(math.radians(lat0))
+
+        def project(lat_: float, lon_: float) -> typing.Tuple[float, float]:
+            d_lon = (lon_ - lon0 + 180) % 360 - 180
+            return d_lon * scale * 60, (lat_ - lat0) * 60
+
+        ex, ey = project(lat, lon)
+        length = ex * ex + ey * ey
+        last = self._prev(self._end)
+        for position in itertools.chain(((self.lat[last], self.lon[last]),), self._dropped):
+            mx, my = project(*position)
+            # Closest point on the segment
+            t = 0.0 if length == 0 else min(max((mx * ex + my * ey) / length, 0.0), 1.0)
+            if math.hypot(mx - t * ex, my - t * ey) >= self.tolerance:
+                return False
+        return True
+
+    def to_numpy(self) -> typing.Dict[str, "np.ndarray[typing.Any, typing.Any]"]:
+        """The positions as NumPy arrays, oldest first: { 'ts': array(...), 'lat': ..., 'lon': ..., 'speed': ..., 'course': ...}"""
+        require_numpy("the export of track histories")
+        import numpy as np
+        columns = {}
+        for name in HISTORY_COLUMNS:
+            column = np.frombuffer(getattr(self, name), dtype=np.float64 if name in ('ts', 'lat', 'lon') else np.float32)
+            columns[name] = np.roll(column, -self._end) if len(column) == self.capacity else column.copy()
+        return columns
+
+
+PATH = typing.Union[str, "os.PathLike[str]"]
+
+# Snapshot files start with a header followed by a directory of columns.
+# Every column is a packed little-endian array, aligned to 8 bytes, so that it can be memory-mapped.
+SNAPSHOT_MAGIC = b'PYAISTRK'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<8sHHI')  # magic, version, number of columns, number of tracks
+SNAPSHOT_COLUMN = struct.Struct('<32sc7xQQ')  # name, typecode, offset, number of items
+
+# Journals start with a header followed by one record per change of a track
+JOURNAL_MAGIC = b'PYAISJNL'
+JOURNAL_VERSION = 1
+JOURNAL_HEADER = struct.Struct('<8sH')  # magic, version
+JOURNAL_RECORD = struct.Struct('<HIHd')  # size of the rest of the record, mmsi, fields, last_updated
+JOURNAL_DELETE = 1 << 15
+
+# Integers that are None
+INT_NULL = -(1 << 63)
+
+
+def to_turn_rate(turn: float) -> typing.Union[float, TurnRate]:
+    """Special rates of turn are decoded as TurnRate. Other rates stay floats."""
+    try:
+        return TurnRate(turn)
+    except ValueError:
+        return turn
+
+
+# Snapshots and journals store the plain values of enums.
+# These converters restore the types that decoded messages have: { field: converter }
+VALUE_CONVERTERS: typing.Dict[str, typing.Callable[[typing.Any], typing.Any]] = {
+    'turn': to_turn_rate,
+    'ship_type': ShipType.from_value,
+}
+
+
+def _typecode(field: typing.Any) -> str:
+    if field.name == 'mmsi':
+        return 'I'
+    args = getattr(field.type, '__args__', None)
+    # Optional[X] is Union[X, None]
+    return {float: 'd', int: 'q', str: 's'}[args[0] if args else field.type]
+
+
+# How each field is stored: d = double (NaN if None), q = int64 (INT_NULL if None), I = uint32, s = UTF-8 string
+TYPECODES = {field.name: _typecode(field) for field in FIELDS}
+# The fields of a journal record. The n-th bit of the record flags tells if the n-th field is present.
+JOURNAL_FIELDS = tuple(name for name in FIELD_NAMES if name != 'mmsi')
+JOURNAL_BITS = {name: 1 << i for i, name in enumerate(JOURNAL_FIELDS)}
+VALUE_STRUCTS = {'d': struct.Struct('<d'), 'q': struct.Struct('<q'), 's': struct.Struct('<B')}
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_snapshot(path: PATH, columns: typing.Sequence[typing.Tuple[str, "array.array[typing.Any]"]], n_rows: int) -> None:
+    """Write columns to a snapshot file. The file is replaced atomically."""
+    offset = SNAPSHOT_HEADER.size + len(columns) * SNAPSHOT_COLUMN.size
+    directory, offsets = [], []
+    for name, values in columns:
+        offset = _align(offset)
+        directory.append(SNAPSHOT_COLUMN.pack(name.encode(), values.typecode.encode(), offset, len(values)))
+        offsets.append(offset)
+        offset += len(values) * values.itemsize
+
+    tmp = os.fspath(path) + '.tmp'
+    with open(tmp, 'wb') as fd:
+        fd.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(columns), n_rows))
+        fd.write(b''.join(directory))
+        for (_, values), offset in zip(columns, offsets):
+            fd.write(b'\0' * (offset - fd.tell()))
+            if sys.byteorder == 'big':  # pragma: no cover
+                values = array.array(values.typecode, values)
+                values.byteswap()
+            fd.write(values.tobytes())
+        fd.flush()
+        os.fsync(fd.fileno())
+    os.replace(tmp, path)
+
+
+def _parse_snapshot(data: memoryview, path: PATH) -> typing.Dict[str, memoryview]:
+    """Split the data of a snapshot file into its columns. The columns share the memory of data."""
+    try:
+        magic, version, n_columns, _ = SNAPSHOT_HEADER.unpack_from(data)
+        if magic != SNAPSHOT_MAGIC:
+            raise InvalidSnapshotException(f"{os.fspath(path)} is not a snapshot")
+        if version > SNAPSHOT_VERSION:
+            raise InvalidSnapshotException(f"unsupported snapshot version {version}")
+
+        columns = {}
+        for i in range(n_columns):
+            name, code, offset, count = SNAPSHOT_COLUMN.unpack_from(data, SNAPSHOT_HEADER.size + i * SNAPSHOT_COLUMN.size)
+            typecode = code.decode()
+            end = offset + count * array.array(typecode).itemsize
+            if end > len(data):
+                raise InvalidSnapshotException(f"{os.fspath(path)} is truncated")
+            column = data[offset:end].cast(typecode)
+            if sys.byteorder == 'big':  # pragma: no cover
+                values = array.array(typecode, column)
+                values.byteswap()
+                column = memoryview(values)
+            columns[name.rstrip(b'\0').decode()] = column
+        return columns
+    except (struct.error, ValueError) as e:
+        raise InvalidSnapshotException(f"{os.fspath(path)} is corrupt") from e
+
+
+def read_snapshot(path: PATH) -> typing.Dict[str, memoryview]:
+    """Read all columns of a snapshot file into memory.
+    The columns can be passed to numpy.frombuffer() for further processing.
+    :param path: the snapshot file written by AISTracker.snapshot()."""
+    with open(path, 'rb') as fd:
+        data = memoryview(fd.read())
+    return _parse_snapshot(data, path)
+
+
+@contextlib.contextmanager
+def open_snapshot(path: PATH) -> typing.Iterator[typing.Dict[str, memoryview]]:
+    """Memory-map a snapshot file and get its columns without copying any data.
+    The columns are only valid inside of the with block, because the file is unmapped at its end.
+    Copy everything that is needed afterwards.
+    :param path: the snapshot file written by AISTracker.snapshot()."""
+    with open(path, 'rb') as fd:
+        try:
+            mapped = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            raise InvalidSnapshotException(f"{os.fspath(path)} is empty") from e
+
+    with mapped:
+        data = memoryview(mapped)
+        columns: typing.Dict[str, memoryview] = {}
+        try:
+            columns = _parse_snapshot(data, path)
+            yield columns
+        finally:
+            # The file can only be unmapped, once no view on it is left
+            for column in columns.values():
+                column.release()
+            data.release()
+
+
+def _column(columns: typing.Dict[str, memoryview], name: str, path: PATH) -> memoryview:
+    try:
+        return columns[name]
+    except KeyError:
+        raise InvalidSnapshotException(f"{os.fspath(path)} has no column '{name}'") from None
+
+
+def encode_record(mmsi: int, ts: float, values: typing.Iterable[typing.Tuple[str, typing.Any]], flags: int = 0) -> bytes:
+    """Encode a journal record.
+    :param values: (name, value) pairs of fields that are not None, in the order of JOURNAL_FIELDS."""
+    parts = []
+    for name, value in values:
+        flags |= JOURNAL_BITS[name]
+        code = TYPECODES[name]
+        if code == 's':
+            encoded = value.encode()
+            if len(encoded) > 255:
+                # Do not cut a character in half
+                encoded = encoded[:255].decode(errors='ignore').encode()
+            parts.append(VALUE_STRUCTS['s'].pack(len(encoded)))
+            parts.append(encoded)
+        else:
+            parts.append(VALUE_STRUCTS[code].pack(value))
+    body = b''.join(parts)
+    return JOURNAL_RECORD.pack(JOURNAL_RECORD.size - 2 + len(body), mmsi, flags, ts) + body
+
+
+def decode_records(data: bytes) -> typing.Iterator[typing.Tuple[int, int, float, typing.Dict[str, typing.Any]]]:
+    """Decode the records of a journal: (mmsi, flags, last_updated, {field: value, ...}).
+    A truncated record at the end (e.g. after a crash while writing) is ignored."""
+    if data[:len(JOURNAL_MAGIC)] != JOURNAL_MAGIC:
+        raise InvalidSnapshotException("not a journal")
+    try:
+        _, version = JOURNAL_HEADER.unpack_from(data)
+    except struct.error as e:
+        raise InvalidSnapshotException("truncated journal header") from e
+    if version > JOURNAL_VERSION:
+        raise InvalidSnapshotException(f"unsupported journal version {version}")
+
+    pos, size = JOURNAL_HEADER.size, len(data)
+    try:
+        while pos + JOURNAL_RECORD.size <= size:
+            length, mmsi, flags, ts = JOURNAL_RECORD.unpack_from(data, pos)
+            end = pos + 2 + length
+            if end > size:
+                break
+            pos += JOURNAL_RECORD.size
+            values = {}
+            for name in JOURNAL_FIELDS:
+                if flags & JOURNAL_BITS[name]:
+                    code = TYPECODES[name]
+                    value: typing.Any = VALUE_STRUCTS[code].unpack_from(data, pos)[0]
+                    pos += VALUE_STRUCTS[code].size
+                    if code == 's':
+                        length = value
+                        value = data[pos:pos + length].decode()
+                        pos += length
+                    values[name] = value
+            if pos != end:
+                raise InvalidSnapshotException("corrupt journal record")
+            yield mmsi, flags, ts, values
+    except (struct.error, UnicodeDecodeError) as e:
+        raise InvalidSnapshotException("corrupt journal record") from e
+
+
+class Journal:
+    """
+    Append-only file of track changes, written by an AISTracker (see AISTracker.open_journal()).
+    By default, every record is flushed at once, so that it survives a crash of the process.
+    Use it as a context manager or call close().
+    """
+
+    def __init__(self, path: PATH, flush: bool = True) -> None:
+        """
+        :param path: the journal file. It is created, if it does not exist.
+        :param flush: flush every record. If False, records are buffered until flush() or close() is called.
+        """
+        self.path = path
+        self.flush_records = flush
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION))
+            self._file.flush()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def write(self, record: bytes) -> None:
+        """Append a single record (see encode_record())."""
+        self._file.write(record)
+        if self.flush_records:
+            self._file.flush()
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def reset(self) -> None:
+        """Remove all records."""
+        self._file.truncate(0)
+        self._file.write(JOURNAL_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION))
+        self._file.flush()
+
+    def close(self) -> None:
+        """Flush all records and close the file."""
+        self._file.close()
+
+
 class AISTracker:
     """
     An AIS tracker receives AIS messages and maintains a collection of known tracks.
@@ -88,18 +622,43 @@ class AISTracker:
     and/or different kinds of metadata.
     """
 
-    def __init__(self, ttl_in_seconds: typing.Optional[int] = 600) -> None:
+    def __init__(
+            self,
+            ttl_in_seconds: typing.Optional[int] = 600,
+            cell_size: float = 1.0,
+            history_size: typing.Optional[int] = None,
+            history_interval: float = 0.0,
+            history_tolerance: float = 0.0,
+    ) -> None:
         """Creates a new tracker instance.
-        :param ttl_in_seconds: the ttl in seconds before expired tracks are pruned."""
+        :param ttl_in_seconds: the ttl in seconds before expired tracks are pruned.
+        :param cell_size: the cell size of the spatial index in degrees.
+        :param history_size: the number of positions kept per track. None (default) keeps no history.
+        :param history_interval: the minimum number of seconds between two positions of the history.
+        :param history_tolerance: positions closer than this (in nautical miles) to the trajectory are dropped."""
+        if history_size is not None and history_size < 2:
+            raise ValueError("history_size must be at least 2")
+        self.history_size = history_size
+        self.history_interval = history_interval
+        self.history_tolerance = history_tolerance
+        self._histories: typing.Dict[int, TrackHistory] = {}  # { mmsi: TrackHistory(), ...}
         self._tracks: typing.Dict[int, AISTrack] = {}  # { mmsi: AISTrack(), ...}
+        self._index = GridIndex(cell_size)
+        # Heaps ordered by last_updated (oldest first and youngest first) with lazy deletion.
+        # An entry is only valid as long as its sequence number is the current version of its track.
+        self._expiry: typing.List[typing.Tuple[float, int, int]] = []  # [(last_updated, seq, mmsi), ...]
+        self._latest: typing.List[typing.Tuple[float, int, int]] = []  # [(-last_updated, -seq, mmsi), ...]
+        self._versions: typing.Dict[int, int] = {}  # { mmsi: seq, ...}
+        self._seq = itertools.count()
         self.ttl_in_seconds: typing.Optional[int] = ttl_in_seconds  # in seconds or None
         self.oldest_timestamp: typing.Optional[float] = None
+        self._journal: typing.Optional[Journal] = None
 
     def __enter__(self) -> "AISTracker":
         return self
 
     def __exit__(self, exc_type: object, exc_val: object, exc_tb: object) -> None:
-        return None
+        self.close_journal()
 
     def __set_oldest_timestamp(self, ts: float) -> None:
         if self.oldest_timestamp is None:
@@ -118,8 +677,12 @@ class AISTracker:
         :param ts_epoch_ms: an optional timestamp to tell when the message was originally received."""
         decoded = msg.decode()
         mmsi = int(decoded.mmsi)
-        track = msg_to_track(decoded, ts_epoch_ms)
-        self.insert_or_update(mmsi, track)
+        ts = now() if ts_epoch_ms is None else ts_epoch_ms
+        if mmsi in self._tracks:
+            self.update_track(mmsi, decoded, ts)
+        else:
+            self.insert_track(mmsi, msg_to_track(decoded, ts))
+        self.__set_oldest_timestamp(ts)
         self.cleanup()
 
     def get_track(self, mmsi: typing.Union[str, int]) -> typing.Optional[AISTrack]:
@@ -135,23 +698,99 @@ class AISTracker:
             mmsi = int(mmsi)
             track = self._tracks[mmsi]
             del self._tracks[mmsi]
+            self._index.remove(mmsi)
+            del self._versions[mmsi]
+            self._histories.pop(mmsi, None)
+            if self._journal is not None:
+                self.__log(mmsi, track.last_updated, (), JOURNAL_DELETE)
             return track
         except KeyError:
             return None
 
+    def get_history(self, mmsi: typing.Union[str, int]) -> typing.Optional[TrackHistory]:
+        """Get the position history of a track. Returns None if there is none."""
+        return self._histories.get(int(mmsi))
+
+    def export_history(self) -> typing.Dict[str, "np.ndarray[typing.Any, typing.Any]"]:
+        """The position histories of all tracks as NumPy arrays.
+        The positions are grouped by MMSI (in the 'mmsi' column) and sorted by time per track."""
+        require_numpy("the export of track histories")
+        import numpy as np
+        parts = [(mmsi, history.to_numpy()) for mmsi, history in self._histories.items() if len(history)]
+        columns = {'mmsi': np.concatenate([np.full(len(c['ts']), mmsi, dtype=np.uint32) for mmsi, c in parts] or [np.zeros(0, np.uint32)])}
+        for name in HISTORY_COLUMNS:
+            dtype = np.float64 if name in ('ts', 'lat', 'lon') else np.float32
+            columns[name] = np.concatenate([c[name] for _, c in parts] or [np.zeros(0, dtype)])
+        return columns
+
+    def __record(self, mmsi: int, track: AISTrack, new: typing.Union[ANY_MESSAGE, AISTrack]) -> None:
+        """Add the position of a track to its history, if the update reports a valid position."""
+        if self.history_size is None or not is_valid_position(getattr(new, 'lat', None), getattr(new, 'lon', None)):
+            return
+        try:
+            history = self._histories[mmsi]
+        except KeyError:
+            history = self._histories[mmsi] = TrackHistory(self.history_size, self.history_interval, self.history_tolerance)
+        history.append(
+            track.last_updated, typing.cast(float, track.lat), typing.cast(float, track.lon), track.speed, track.course
+        )
+
     def n_latest_tracks(self, n: int) -> typing.List[AISTrack]:
         """Return the latest N tracks. These are the tracks with the youngest timestamps.
         E.g. the tracks that were updated most recently."""
-        n_latest = []
-        n = min(n, len(self._tracks))
-        tracks = sorted(self._tracks.values(), key=lambda track: track.last_updated)
-        for i, track in enumerate(reversed(tracks)):
-            if n <= i:
-                break
-            n_latest.append(track)
-
+        n_latest: typing.List[AISTrack] = []
+        valid = []
+        latest, versions = self._latest, self._versions
+        while latest and len(n_latest) < n:
+            entry = heapq.heappop(latest)
+            if versions.get(entry[2]) == -entry[1]:
+                n_latest.append(self._tracks[entry[2]])
+                valid.append(entry)
+
+        # Outdated entries are dropped for good
+        for entry in valid:
+            heapq.heappush(latest, entry)
         return n_latest
 
+    def tracks_in_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> typing.List[AISTrack]:
+        """Return all tracks whose position is inside of a bounding box.
+        If min_lon is greater than max_lon, the box crosses the antimeridian."""
+        wraps = min_lon > max_lon
+        tracks = []
+        for mmsi in self._index.query(min_lat, min_lon, max_lat, max_lon):
+            track = self._tracks[mmsi]
+            lat, lon = typing.cast(float, track.lat), typing.cast(float, track.lon)
+            if not min_lat <= lat <= max_lat:
+                continue
+            if (min_lon <= lon or lon <= max_lon) if wraps else (min_lon <= lon <= max_lon):
+                tracks.append(track)
+        return tracks
+
+    def tracks_near(self, lat: float, lon: float, radius: float) -> typing.List[AISTrack]:
+        """Return all tracks within a radius (in nautical miles) around a position.
+        The tracks are sorted by their distance, nearest first."""
+        # The bounding box of the circle
+        angle = radius / EARTH_RADIUS_NM
+        d_lat = math.degrees(angle)
+        min_lat, max_lat = lat - d_lat, lat + d_lat
+        sin_angle, cos_lat = math.sin(angle), math.cos(math.radians(lat))
+        if min_lat <= -90 or max_lat >= 90 or angle >= math.pi / 2 or sin_angle >= cos_lat:
+            # The circle contains a pole
+            min_lat, max_lat, min_lon, max_lon = max(min_lat, -90), min(max_lat, 90), -180.0, 180.0
+        else:
+            d_lon = math.degrees(math.asin(sin_angle / cos_lat))
+            min_lon = (lon - d_lon + 180) % 360 - 180
+            max_lon = (lon + d_lon + 180) % 360 - 180
+
+        near = []
+        for mmsi in self._index.query(min_lat, min_lon, max_lat, max_lon):
+            track = self._tracks[mmsi]
+            dist = distance(lat, lon, typing.cast(float, track.lat), typing.cast(float, track.lon))
+            if dist <= radius:
+                near.append((dist, track))
+        near.sort(key=lambda item: item[0])
+        return [track for _, track in near]
+
     def insert_or_update(self, mmsi: int, track: AISTrack) -> None:
         """Insert or update a track."""
         # Does the track already exist?
@@ -164,14 +803,192 @@ class AISTracker:
     def insert_track(self, mmsi: int, new: AISTrack) -> None:
         """Creates a new track records in memory"""
         self._tracks[mmsi] = new
-
-    def update_track(self, mmsi: int, new: AISTrack) -> None:
-        """Updates an existing track in memory"""
-        old = self._tracks[mmsi]
-        if new.last_updated < old.last_updated:
+        self._index.update(mmsi, new.lat, new.lon)
+        self.__push(mmsi, new.last_updated)
+        self._histories.pop(mmsi, None)
+        self.__record(mmsi, new, new)
+        if self._journal is not None:
+            self.__log(mmsi, new.last_updated, ((name, getattr(new, name)) for name in JOURNAL_FIELDS))
+
+    def update_track(
+            self, mmsi: int, new: typing.Union[ANY_MESSAGE, AISTrack], ts: typing.Optional[float] = None
+    ) -> None:
+        """Updates an existing track in memory. The track is updated in place.
+        :param mmsi: the mmsi of the track.
+        :param new:  a decoded message or an AISTrack. Only values, that are not None, are applied.
+        :param ts:   when the message was received. Defaults to last_updated of an AISTrack or the current time."""
+        if ts is None:
+            ts = new.last_updated if isinstance(new, AISTrack) else now()
+        track = self._tracks[mmsi]
+        if ts < track.last_updated:
             raise ValueError('cannot update track with older message')
-        updated = update_track(old, new)
-        self._tracks[mmsi] = updated
+        update_from_message(track, new)
+        track.last_updated = ts
+        self._index.update(mmsi, track.lat, track.lon)
+        self.__push(mmsi, ts)
+        self.__record(mmsi, track, new)
+        if self._journal is not None:
+            self.__log(mmsi, ts, ((name, getattr(new, name)) for name in message_fields(new) if name != 'mmsi'))
+
+    def __log(self, mmsi: int, ts: float, values: typing.Iterable[typing.Tuple[str, typing.Any]], flags: int = 0) -> None:
+        """Append the fields of a track, that are not None, to the journal."""
+        journal = typing.cast(Journal, self._journal)
+        if journal.closed:
+            # The journal was closed by its owner
+            self._journal = None
+            return
+        journal.write(encode_record(mmsi, ts, ((name, value) for name, value in values if value is not None), flags))
+
+    def snapshot(self, path: PATH) -> None:
+        """Write all tracks (and their histories) to a snapshot file.
+        The file is columnar and can be read without a tracker by read_snapshot().
+        An open journal is emptied, because the snapshot contains all of its changes.
+        :param path: the snapshot file. It is replaced atomically."""
+        tracks = list(self._tracks.values())
+        columns: typing.List[typing.Tuple[str, "array.array[typing.Any]"]] = []
+        for field in FIELDS:
+            name, code = field.name, TYPECODES[field.name]
+            values = [getattr(track, name) for track in tracks]
+            if code == 'd':
+                columns.append((name, array.array('d', [math.nan if v is None else v for v in values])))
+            elif code == 'q':
+                columns.append((name, array.array('q', [INT_NULL if v is None else v for v in values])))
+            elif code == 's':
+                encoded = [None if v is None else v.encode() for v in values]
+                columns.append((name + '.len', array.array('i', [-1 if v is None else len(v) for v in encoded])))
+                columns.append((name, array.array('B', b''.join(v for v in encoded if v))))
+            else:
+                columns.append((name, array.array(code, values)))
+
+        history = [array.array('I')] + [array.array('d') for _ in range(3)] + [array.array('f') for _ in range(2)]
+        for mmsi, positions in self._histories.items():
+            history[0].extend(itertools.repeat(mmsi, len(positions)))
+            for i, name in enumerate(HISTORY_COLUMNS, 1):
+                column = getattr(positions, name)
+                history[i].extend(column[j] for j in positions._order())
+        columns.extend(zip(('history.mmsi',) + tuple('history.' + name for name in HISTORY_COLUMNS), history))
+
+        write_snapshot(path, columns, len(tracks))
+        if self._journal is not None and not self._journal.closed:
+            self._journal.reset()
+
+    def restore(self, path: PATH) -> None:
+        """Load all tracks of a snapshot file. Tracks that are already known with a newer state are kept.
+        Histories are only restored, if the tracker keeps histories.
+        :param path: the snapshot file written by snapshot()."""
+        with open_snapshot(path) as columns:
+            values = self.__read_tracks(columns, path)
+            history = list(zip(*(_column(columns, 'history.' + name, path) for name in ('mmsi',) + HISTORY_COLUMNS)))
+
+        journal, self._journal = self._journal, None
+        try:
+            restored = set()
+            for row in zip(*values):
+                track = AISTrack(*row)
+                existing = self._tracks.get(track.mmsi)
+                if existing is None or existing.last_updated <= track.last_updated:
+                    self.insert_or_update(track.mmsi, track)
+                    restored.add(track.mmsi)
+
+            if self.history_size is not None:
+                histories: typing.Dict[int, TrackHistory] = {}
+                for mmsi, ts, lat, lon, speed, course in history:
+                    if mmsi in restored:
+                        try:
+                            positions = histories[mmsi]
+                        except KeyError:
+                            positions = histories[mmsi] = TrackHistory(self.history_size, self.history_interval, self.history_tolerance)
+                        positions.append(ts, lat, lon, speed, course)
+                self._histories.update(histories)
+        finally:
+            self._journal = journal
+        self.cleanup()
+
+    @staticmethod
+    def __read_tracks(columns: typing.Dict[str, memoryview], path: PATH) -> typing.List[typing.List[typing.Any]]:
+        """The values of all fields of AISTrack in a snapshot: [[mmsi, ...], [turn, ...], ...]"""
+        values: typing.List[typing.List[typing.Any]] = []
+        for field in FIELDS:
+            name, code = field.name, TYPECODES[field.name]
+            column = _column(columns, name, path)
+            if code == 'd':
+                values.append([None if math.isnan(v) else v for v in column])
+            elif code == 'q':
+                values.append([None if v == INT_NULL else v for v in column])
+            elif code == 's':
+                data, pos = column.tobytes(), 0
+                strings: typing.List[typing.Optional[str]] = []
+                for length in _column(columns, name + '.len', path):
+                    if length < 0:
+                        strings.append(None)
+                    else:
+                        try:
+                            strings.append(data[pos:pos + length].decode())
+                        except UnicodeDecodeError as e:
+                            raise InvalidSnapshotException(f"{os.fspath(path)} is corrupt") from e
+                        pos += length
+                values.append(strings)
+            else:
+                values.append(column.tolist())
+            if name in VALUE_CONVERTERS:
+                values[-1] = [None if v is None else VALUE_CONVERTERS[name](v) for v in values[-1]]
+        return values
+
+    def open_journal(self, path: PATH, flush: bool = True) -> Journal:
+        """Append every change of a track (including expired and removed tracks) to a journal file from now on.
+        Replaying the journal after restoring the latest snapshot restores the state of the tracker.
+        The journal is closed by close_journal(), at the end of a with block of the tracker or of the returned journal.
+        :param path: the journal file. It is created, if it does not exist.
+        :param flush: flush every record. If False, records are buffered until the journal is flushed or closed."""
+        self.close_journal()
+        self._journal = Journal(path, flush)
+        return self._journal
+
+    def close_journal(self) -> None:
+        """Flush and close the journal, if there is one."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def replay_journal(self, path: PATH) -> int:
+        """Apply all changes of a journal file. Returns the number of records.
+        Changes that are older than the state of a track are ignored.
+        :param path: the journal file written after open_journal()."""
+        with open(path, 'rb') as fd:
+            data = fd.read()
+
+        n = 0
+        journal, self._journal = self._journal, None
+        try:
+            for mmsi, flags, ts, values in decode_records(data):
+                n += 1
+                if flags & JOURNAL_DELETE:
+                    self.pop_track(mmsi)
+                    continue
+                for name in VALUE_CONVERTERS.keys() & values.keys():
+                    values[name] = VALUE_CONVERTERS[name](values[name])
+                existing = self._tracks.get(mmsi)
+                if existing is None or existing.last_updated <= ts:
+                    self.insert_or_update(mmsi, AISTrack(mmsi=mmsi, last_updated=ts, **values))
+        finally:
+            self._journal = journal
+        self.cleanup()
+        return n
+
+    def __push(self, mmsi: int, last_updated: float) -> None:
+        """Add a new version of a track to the heaps. Older versions become outdated."""
+        seq = next(self._seq)
+        self._versions[mmsi] = seq
+        heapq.heappush(self._expiry, (last_updated, seq, mmsi))
+        heapq.heappush(self._latest, (-last_updated, -seq, mmsi))
+
+        # Rebuild the heaps, once most of their entries are outdated
+        limit = 2 * len(self._tracks) + 64
+        if len(self._expiry) > limit or len(self._latest) > limit:
+            self._expiry = [(self._tracks[m].last_updated, s, m) for m, s in self._versions.items()]
+            self._latest = [(-ts, -s, m) for ts, s, m in self._expiry]
+            heapq.heapify(self._expiry)
+            heapq.heapify(self._latest)
 
     def cleanup(self) -> None:
         """Delete all records whose last update is older than ttl."""
@@ -183,15 +1000,20 @@ class AISTracker:
         if (t - self.ttl_in_seconds) < self.oldest_timestamp:
             return
 
-        to_be_deleted = set()
-
-        tracks = sorted(self._tracks.values(), key=lambda track: track.last_updated)
-        for track in reversed(tracks):
-            if (t - track.last_updated) < self.ttl_in_seconds:
-                self.oldest_timestamp = track.last_updated
-                break
-            # ttl is over. delete it.
-            to_be_deleted.add(track.mmsi)
-
-        for mmsi in to_be_deleted:
-            del self._tracks[mmsi]
+        # Pop tracks from the heap, oldest first, until the first one is still alive
+        expiry, versions = self._expiry, self._versions
+        while expiry:
+            last_updated, seq, mmsi = expiry[0]
+            if versions.get(mmsi) == seq:
+                if (t - last_updated) < self.ttl_in_seconds:
+                    break
+                # ttl is over. delete it.
+                del self._tracks[mmsi]
+                del versions[mmsi]
+                self._index.remove(mmsi)
+                self._histories.pop(mmsi, None)
+                if self._journal is not None:
+                    self.__log(mmsi, last_updated, (), JOURNAL_DELETE)
+            heapq.heappop(expiry)
+
+        self.oldest_timestamp = expiry[0][0] if expiry else None
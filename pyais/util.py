@@ -1,8 +1,8 @@
 import base64
+import binascii
 import typing
 from collections import OrderedDict
-from functools import partial, reduce
-from operator import xor
+from functools import partial
 from typing import Any, Generator, Hashable, TYPE_CHECKING, Union, Dict
 
 from bitarray import bitarray
@@ -21,33 +21,92 @@ from_bytes_signed = partial(int.from_bytes, byteorder="big", signed=True)
 T = typing.TypeVar('T')
 
 
+# Standard BASE64 alphabet in the order of its six-bit values
+BASE64_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+# Placeholder for characters that can not be dearmored. It is not part of the BASE64 alphabet.
+NON_PRINTABLE = ord('!')
+
+
+def _build_dearmor_table() -> bytes:
+    """
+    Build a translation table that maps each armored AIS payload character
+    to the BASE64 character that represents the same six-bit value.
+    Characters outside of 0x20 (space) to 0x7e (~) are mapped to NON_PRINTABLE.
+    """
+    table = bytearray([NON_PRINTABLE, ] * 256)
+    for c in range(0x20, 0x7f):
+        six_bit = (c - (0x30 if c < 0x60 else 0x38)) & 0x3F
+        table[c] = BASE64_ALPHABET[six_bit]
+    return bytes(table)
+
+
+DEARMOR_TABLE = _build_dearmor_table()
+
+# Characters that may occur in an armored AIS payload
+PRINTABLE_CHARS = bytes(range(0x20, 0x7f))
+
+
+def check_printable(data: bytes) -> None:
+    """
+    Make sure that a raw AIS payload can be dearmored without decoding it.
+    :param data:        Raw AIS message in bytes
+    """
+    invalid = data.translate(None, PRINTABLE_CHARS)
+    if invalid:
+        raise NonPrintableCharacterException(f"Non printable character: '{hex(invalid[0])}'")
+
+
+def six_bit_value(char: int) -> int:
+    """Value of a single armored payload character."""
+    return (char - (0x30 if char < 0x60 else 0x38)) & 0x3F
+
+
 def decode_into_bit_array(data: bytes, fill_bits: int = 0) -> bitarray:
     """
     Decodes a raw AIS message into a bitarray.
+    The armored payload is translated into BASE64 using a lookup table.
+    This way the bits can be unpacked in bulk by the (C implemented) BASE64 decoder.
     :param data:        Raw AIS message in bytes
     :param fill_bits:   Number of trailing fill bits to be ignored
     :return:
     """
-    bit_str = ''
     length = len(data)
+    translated = data.translate(DEARMOR_TABLE)
+
+    ix = translated.find(NON_PRINTABLE)
+    if ix >= 0:
+        raise NonPrintableCharacterException(f"Non printable character: '{hex(data[ix])}'")
+
+    # BASE64 requires the input to be a multiple of four characters.
+    # Pad with zero bits ('A') and drop the padding afterwards.
+    padding = -length % 4
+    bit_arr = bitarray(endian='big')
+    bit_arr.frombytes(base64.b64decode(translated + b'A' * padding))
+
+    # The last character may contain fill bits
+    n_bits = length * 6
+    if length and 0 < fill_bits < 6:
+        n_bits -= fill_bits
+    del bit_arr[n_bits:]
+    return bit_arr
 
-    for i, c in enumerate(data):
-        if not 0x20 <= c <= 0x7e:
-            raise NonPrintableCharacterException(f"Non printable character: '{hex(c)}'")
-
-        # Convert 8 bit binary to 6 bit binary
-        c -= 0x30 if (c < 0x60) else 0x38
-        c &= 0x3F
 
-        if i == length - 1 and fill_bits:
-            # The last part be shorter than 6 bits and contain fill bits
-            c = c >> fill_bits
-            bit_str += f'{c:b}'.zfill(6 - fill_bits)
-        else:
-            bit_str += f'{c:06b}'
+def armored_mmsi(data: bytes) -> int:
+    """
+    Read the MMSI (bits 8-37) straight from a raw AIS payload without decoding the whole payload.
+    :param data:        Raw AIS message in bytes
+    :return:            The MMSI
+    """
+    # Eight characters are 48 bits, of which bits 8-39 are the bytes 1-4
+    decoded = binascii.a2b_base64(data[:8].ljust(8, b'0').translate(DEARMOR_TABLE))
+    mmsi: int = from_bytes(decoded[1:5]) >> 2
 
-    bit_arr = bitarray(bit_str)
-    return bit_arr
+    # Like the decoder, use only the available bits of truncated payloads
+    missing = 38 - len(data) * 6
+    if missing > 0:
+        mmsi = mmsi >> missing if missing < 30 else 0
+    return mmsi
 
 
 def chunks(sequence: typing.Sequence[T], n: int) -> Generator[typing.Sequence[T], None, None]:
@@ -107,8 +166,25 @@ def checksum(sentence: bytes) -> int:
     >>> checksum(b's:2573535,c:1671533231')
     8
     """
-    checksum = reduce(xor, sentence)
-    return checksum
+    # XOR all bytes at once by folding a single big integer in halves.
+    # After each step the lower half holds the XOR of both halves.
+    n = int.from_bytes(sentence, 'little')
+    shift = 1024
+    if len(sentence) > 128:
+        shift = 8 << (len(sentence) - 1).bit_length()
+        while shift > 1024:
+            shift >>= 1
+            n ^= n >> shift
+
+    # NMEA sentences are at most 82 characters long. Unroll the remaining steps.
+    n ^= n >> 512
+    n ^= n >> 256
+    n ^= n >> 128
+    n ^= n >> 64
+    n ^= n >> 32
+    n ^= n >> 16
+    n ^= n >> 8
+    return n & 0xFF
 
 
 def compute_checksum(msg: Union[str, bytes]) -> int:
@@ -126,7 +202,7 @@ def compute_checksum(msg: Union[str, bytes]) -> int:
         msg = msg.encode()
 
     msg = msg[1:].split(b'*', 1)[0]
-    return reduce(xor, msg)
+    return checksum(msg)
 
 
 # https://gpsd.gitlab.io/gpsd/AIVDM.html#_aivdmaivdo_payload_armoring
@@ -317,6 +393,40 @@ def chk_to_int(chk_str: bytes) -> typing.Tuple[int, int]:
     return fill_bits, checksum
 
 
+SENTENCE_TOKENS = typing.Tuple[typing.List[bytes], int, int, bytes]
+
+
+def tokenize(sentence: bytes) -> SENTENCE_TOKENS:
+    """
+    Split a NMEA sentence into all of its parts at once.
+    Returns the comma separated fields, the fill bits, the checksum and the part of the sentence
+    that is covered by the checksum. The last field still holds the fill bits and the checksum.
+    Invalid fill bits are returned as 0 and an invalid checksum as -1 (like `chk_to_int`).
+
+    >>> tokenize(b"!AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,0*1B")[1:]
+    (0, 27, b'AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,0')
+    """
+    fields = sentence.split(b',')
+    ix = sentence.find(b'*')
+    body = sentence[1:ix] if ix >= 0 else sentence[1:]
+
+    fill, star, check = fields[-1].partition(b'*')
+    if not star or b'*' in check:
+        return fields, 0, -1, body
+
+    try:
+        fill_bits = int(fill)
+    except ValueError:
+        fill_bits = 0
+
+    try:
+        checksum = int(check, 16)
+    except ValueError:
+        checksum = -1
+
+    return fields, fill_bits, checksum, body
+
+
 SYNC_MASK = 0x03
 TIMEOUT_MASK = 0x07
 MSG_MASK = 0x3fff
@@ -41,7 +41,9 @@ setuptools.setup(
         "attrs"
     ],
     extras_require={
-        'dev': ['mypy', 'flake8', 'coverage', 'twine', 'sphinx', 'pytest', 'pytest-cov']
+        'dev': ['mypy', 'flake8', 'coverage', 'twine', 'sphinx', 'pytest', 'pytest-cov', 'numpy', 'pyarrow'],
+        'numpy': ['numpy'],
+        'arrow': ['pyarrow'],
     },
     entry_points={
         "console_scripts": [
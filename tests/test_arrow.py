@@ -0,0 +1,119 @@
+import collections
+import datetime
+import pathlib
+import tempfile
+import unittest
+
+from pyais.arrow import HAS_PYARROW, arrow_schema, iter_record_batches, write_parquet
+from pyais.messages import MessageType1, MessageType5, MessageType24PartA, MessageType24PartB
+from pyais.stream import FileReaderStream
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+@unittest.skipIf(not HAS_PYARROW, "pyarrow is not installed")
+class TestArrowExport(unittest.TestCase):
+    FILENAME = str(pathlib.Path(__file__).parent.joinpath("nmea_data_sample.txt").absolute())
+
+    def test_arrow_schema(self):
+        schema = arrow_schema(MessageType1)
+
+        self.assertEqual(schema.field('msg_type').type, pa.uint8())
+        self.assertEqual(schema.field('mmsi').type, pa.uint32())
+        self.assertEqual(schema.field('turn').type, pa.float32())
+        self.assertEqual(schema.field('lat').type, pa.float64())
+        self.assertEqual(schema.field('speed').type, pa.float32())
+        self.assertEqual(schema.field('accuracy').type, pa.bool_())
+        self.assertEqual(schema.field('tag_block_source_station').type, pa.string())
+        self.assertEqual(schema.field('gatehouse_timestamp').type, pa.timestamp('ms'))
+        self.assertEqual(schema.metadata, {b'message_class': b'MessageType1'})
+
+        schema = arrow_schema(MessageType5)
+        self.assertEqual(schema.field('shipname').type, pa.string())
+
+    def test_iter_record_batches_groups_by_message_class(self):
+        batches = list(iter_record_batches([
+            b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23",
+            b"!AIVDM,1,1,,A,133sVfPP00PD>hRMDH@jNOvN20S8,0*7F",
+            b"!AIVDM,2,1,0,B,55?MbV02;H;s<HtKP00EHE:0@T4@Dl0000000000L961O5Gf0NSQEp6ClRh0,0*0B",
+            b"!AIVDM,2,2,0,B,00000000000,2*27",
+            b"!AIVDM,1,1,,B,H3`u5VA=VliDp@D000000000000,2*35",
+            b"!AIVDM,1,1,,B,H3`u5VDT47I4dcD@8olnh01P0030,0*2A",
+            b"!AIVDM,1,1,,A,garbage,0*00",
+        ]))
+
+        classes = [payload_class for payload_class, _ in batches]
+        self.assertEqual(classes, [MessageType1, MessageType5, MessageType24PartA, MessageType24PartB])
+
+        batch = batches[0][1]
+        self.assertEqual(batch.num_rows, 2)
+        self.assertEqual(batch.column('mmsi').to_pylist(), [227006760, 205448890])
+        self.assertEqual(batch.column('status').to_pylist(), [0, 0])
+        self.assertEqual(batch.column('tag_block_source_station').to_pylist(), [None, None])
+
+        self.assertEqual(batches[1][1].column('shipname').to_pylist(), ['EVER DIADEM'])
+
+    def test_iter_record_batches_matches_decode(self):
+        expected = collections.defaultdict(list)
+        with FileReaderStream(self.FILENAME) as stream:
+            for msg in stream:
+                decoded = msg.decode()
+                expected[type(decoded)].append(decoded.asdict(enum_as_int=True))
+
+        actual = collections.defaultdict(list)
+        with FileReaderStream(self.FILENAME) as stream:
+            for payload_class, batch in iter_record_batches(stream, batch_size=10):
+                self.assertLessEqual(batch.num_rows, 10)
+                actual[payload_class].extend(batch.to_pylist())
+
+        self.assertEqual(actual.keys(), expected.keys())
+        for payload_class, rows in actual.items():
+            self.assertEqual(len(rows), len(expected[payload_class]))
+            for row, decoded in zip(rows, expected[payload_class]):
+                for key, val in decoded.items():
+                    if isinstance(val, float):
+                        self.assertAlmostEqual(row[key], val, places=4)
+                    else:
+                        self.assertEqual(row[key], val)
+
+    def test_iter_record_batches_metadata(self):
+        batches = list(iter_record_batches([
+            b"\\s:2573535,c:1671533231*08\\!BSVDM,1,1,,A,13nN34?000QFpgRWnQLLSPpF00SO,0*06",
+            b"$PGHP,1,2004,12,21,23,59,58,999,219,219000001,219000002,1,6D*56",
+            b"!AIVDM,1,1,,B,15NBj>PP1gG>1PVKTDTUJOv00<0M,0*09",
+        ]))
+
+        self.assertEqual(len(batches), 1)
+        rows = batches[0][1].to_pylist()
+
+        self.assertEqual(rows[0]['tag_block_source_station'], '2573535')
+        self.assertEqual(rows[0]['tag_block_receiver_timestamp'], '1671533231')
+        self.assertIsNone(rows[0]['gatehouse_country'])
+
+        self.assertIsNone(rows[1]['tag_block_source_station'])
+        self.assertEqual(rows[1]['gatehouse_country'], '219')
+        self.assertEqual(rows[1]['gatehouse_region'], '219000001')
+        self.assertEqual(rows[1]['gatehouse_pss'], '219000002')
+        self.assertEqual(rows[1]['gatehouse_online_data'], 1)
+        self.assertEqual(rows[1]['gatehouse_timestamp'], datetime.datetime(2004, 12, 21, 23, 59, 58, 999000))
+
+    def test_write_parquet(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with FileReaderStream(self.FILENAME) as stream:
+                paths = write_parquet(stream, directory, batch_size=10)
+
+            self.assertIn(MessageType1, paths)
+            self.assertTrue(paths[MessageType1].endswith('MessageType1.parquet'))
+
+            table = pq.read_table(paths[MessageType1])
+            self.assertEqual(table.schema, arrow_schema(MessageType1))
+
+            with FileReaderStream(self.FILENAME) as stream:
+                expected = [msg.mmsi for msg in (m.decode() for m in stream) if type(msg) is MessageType1]
+            self.assertEqual(table.column('mmsi').to_pylist(), expected)
+
+    def test_write_parquet_empty(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(write_parquet([], directory), {})
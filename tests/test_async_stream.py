@@ -0,0 +1,104 @@
+import asyncio
+import socket
+import unittest
+
+from pyais.stream import AsyncTCPConnection, AsyncUDPReceiver
+
+MESSAGES = [
+    b"!AIVDM,1,1,,B,133S0:0P00PCsJ:MECBR0gv:0D8N,0*7F",
+    b"!AIVDM,2,1,1,A,538CQ>02A;h?D9QC800pu8@T>0P4l9E8L0000017Ah:;;5r50Ahm5;C0,0*07",
+    b"!AIVDM,1,1,,A,4h2=a@Quho;O306WMpMIK<Q00826,0*42",
+    b"!AIVDM,2,2,1,A,F@V@00000000000,2*35",
+    b"!AIVDM,1,1,,A,402M3b@000Htt0K0Q0R3T<700t24,0*52",
+]
+
+
+def free_port(kind=socket.SOCK_STREAM):
+    with socket.socket(socket.AF_INET, kind) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestAsyncTCPConnection(unittest.TestCase):
+
+    def test_async_tcp_connection(self):
+        async def handle(reader, writer):
+            data = b"".join(msg + b"\r\n" for msg in MESSAGES)
+            # Send the data in small pieces, so that lines are split between chunks
+            for i in range(0, len(data), 7):
+                writer.write(data[i:i + 7])
+                await writer.drain()
+            writer.close()
+
+        async def main():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+
+            async with server:
+                stream = AsyncTCPConnection("127.0.0.1", port)
+                # Pause and resume reading as often as possible
+                stream.MAX_PENDING_CHUNKS = 1
+                async with stream:
+                    return [msg async for msg in stream]
+
+        messages = asyncio.run(asyncio.wait_for(main(), 5))
+
+        self.assertEqual([msg.decode().msg_type for msg in messages], [1, 4, 5, 4])
+        self.assertEqual(messages[2].raw, MESSAGES[1] + b"\n" + MESSAGES[3])
+
+    def test_many_connections_in_a_single_thread(self):
+        async def handle(reader, writer):
+            writer.write(b"".join(msg + b"\r\n" for msg in MESSAGES))
+            await writer.drain()
+            writer.close()
+
+        async def consume(port):
+            async with AsyncTCPConnection("127.0.0.1", port) as stream:
+                return [msg.decode().msg_type async for msg in stream]
+
+        async def main():
+            server = await asyncio.start_server(handle, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+
+            async with server:
+                return await asyncio.gather(*(consume(port) for _ in range(20)))
+
+        results = asyncio.run(asyncio.wait_for(main(), 5))
+        self.assertEqual(results, [[1, 4, 5, 4]] * 20)
+
+    def test_invalid_endpoint(self):
+        async def main():
+            async with AsyncTCPConnection("127.0.0.1", free_port()):
+                pass
+
+        with self.assertRaises(ConnectionRefusedError):
+            asyncio.run(main())
+
+    def test_sync_iteration_is_not_supported(self):
+        with self.assertRaises(TypeError):
+            iter(AsyncTCPConnection("127.0.0.1", 1234))
+
+
+class TestAsyncUDPReceiver(unittest.TestCase):
+
+    def test_async_udp_receiver(self):
+        port = free_port(socket.SOCK_DGRAM)
+
+        async def send():
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                for msg in MESSAGES:
+                    sock.sendto(msg + b"\r\n", ("127.0.0.1", port))
+                    await asyncio.sleep(0)
+
+        async def main():
+            messages = []
+            async with AsyncUDPReceiver("127.0.0.1", port) as stream:
+                asyncio.ensure_future(send())
+                async for msg in stream:
+                    messages.append(msg)
+                    if len(messages) == 4:
+                        break
+            return messages
+
+        messages = asyncio.run(asyncio.wait_for(main(), 5))
+        self.assertEqual([msg.decode().msg_type for msg in messages], [1, 4, 5, 4])
@@ -0,0 +1,167 @@
+import pathlib
+import subprocess
+import sys
+import unittest
+
+from pyais.batch import HAS_NUMPY, dearmor, decode_batch, decode_position_reports, validate_checksums
+from pyais.exceptions import NonPrintableCharacterException
+from pyais.messages import MessageType1, MessageType3, MessageType5, MessageType18, MessageType24PartA, MessageType24PartB, NMEAMessage
+from pyais.stream import FileReaderStream
+from pyais.util import checksum, compute_checksum, decode_into_bit_array
+
+if HAS_NUMPY:
+    import numpy as np
+
+
+@unittest.skipIf(not HAS_NUMPY, "NumPy is not installed")
+class TestDecodeBatch(unittest.TestCase):
+    FILENAME = str(pathlib.Path(__file__).parent.joinpath("nmea_data_sample.txt").absolute())
+
+    def test_decode_batch_groups_by_message_class(self):
+        columns = decode_batch([
+            b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23",
+            b"!AIVDM,1,1,,A,133sVfPP00PD>hRMDH@jNOvN20S8,0*7F",
+            b"!AIVDM,2,1,0,B,55?MbV02;H;s<HtKP00EHE:0@T4@Dl0000000000L961O5Gf0NSQEp6ClRh0,0*0B",
+            b"!AIVDM,2,2,0,B,00000000000,2*27",
+            b"!AIVDM,1,1,,B,H3`u5VA=VliDp@D000000000000,2*35",
+            b"!AIVDM,1,1,,B,H3`u5VDT47I4dcD@8olnh01P0030,0*2A",
+            b"!AIVDM,1,1,,A,garbage,0*00",
+        ])
+
+        self.assertEqual(set(columns.keys()), {MessageType1, MessageType5, MessageType24PartA, MessageType24PartB})
+
+        type_1 = columns[MessageType1]
+        self.assertEqual(list(type_1.keys()), [f.name for f in MessageType1.fields()])
+        self.assertEqual(type_1['mmsi'].tolist(), [227006760, 205448890])
+        self.assertEqual(type_1['mmsi'].dtype, np.uint32)
+        self.assertEqual(type_1['lat'].dtype, np.float64)
+        self.assertEqual(type_1['speed'].dtype, np.float32)
+        self.assertEqual(type_1['accuracy'].dtype, bool)
+        self.assertEqual(type_1['lat'].tolist(), [49.475577, 51.237658])
+
+        type_5 = columns[MessageType5]
+        self.assertEqual(type_5['shipname'].tolist(), ['EVER DIADEM'])
+        self.assertEqual(type_5['destination'].tolist(), ['NEW YORK'])
+        self.assertEqual(type_5['to_bow'].dtype, np.uint16)
+
+    def test_decode_batch_matches_decode(self):
+        columns = decode_batch(FileReaderStream(self.FILENAME))[MessageType1]
+        decoded = [msg.decode() for msg in FileReaderStream(self.FILENAME) if msg.ais_id == 1]
+
+        self.assertEqual(len(columns['mmsi']), len(decoded))
+        self.assertEqual(columns['mmsi'].tolist(), [msg.mmsi for msg in decoded])
+        self.assertEqual(columns['status'].tolist(), [msg.status for msg in decoded])
+        self.assertEqual(columns['lat'].tolist(), [msg.lat for msg in decoded])
+        self.assertEqual(columns['lon'].tolist(), [msg.lon for msg in decoded])
+        np.testing.assert_allclose(columns['speed'], [msg.speed for msg in decoded], rtol=1e-6)
+
+    def test_decode_batch_masks_missing_values(self):
+        # This type 1 message is too short and only contains the first few fields
+        msg = NMEAMessage(b"!AIVDM,1,1,,A,13HOI:0P0000,0*00")
+        self.assertIsNone(msg.decode().lat)
+
+        columns = decode_batch([msg.raw, b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23"])[MessageType1]
+
+        self.assertIsInstance(columns['lat'], np.ma.MaskedArray)
+        self.assertEqual(columns['lat'].mask.tolist(), [True, False])
+        self.assertEqual(columns['mmsi'].tolist(), [227006760, 227006760])
+        self.assertNotIsInstance(columns['mmsi'], np.ma.MaskedArray)
+
+    def test_import_does_not_import_numpy(self):
+        code = "import sys, pyais; pyais.decode_batch; sys.exit('numpy' in sys.modules)"
+        root = pathlib.Path(__file__).parent.parent.absolute()
+        self.assertEqual(subprocess.run([sys.executable, "-c", code], cwd=root).returncode, 0)
+
+    def test_decode_batch_of_nothing(self):
+        self.assertEqual(decode_batch([]), {})
+
+
+@unittest.skipIf(not HAS_NUMPY, "NumPy is not installed")
+class TestDecodePositionReports(unittest.TestCase):
+    FILENAME = str(pathlib.Path(__file__).parent.joinpath("nmea_data_sample.txt").absolute())
+
+    def test_dearmor(self):
+        payloads = [b"13HOI:0P0000VOHLCnHQKwvL05Ip", b"B5NWV1P0<vSE=I3QdK4bGwoUoP06", b"H3`u5VDT47I4dcD@8olnh01P0030"]
+        bits = dearmor(payloads)
+
+        self.assertEqual(bits.shape, (3, 168))
+        for row, payload in zip(bits, payloads):
+            self.assertEqual(''.join(str(b) for b in row), decode_into_bit_array(payload).to01())
+
+    def test_dearmor_raises_for_invalid_input(self):
+        with self.assertRaises(ValueError):
+            dearmor([b"13HOI:0P0000VOHLCnHQKwvL05Ip", b"13HOI:0P0000"])
+
+        with self.assertRaises(NonPrintableCharacterException):
+            dearmor([b"13HOI:0P0000VOHLCnHQKwvL05Ip", b"13HOI:0P0000VOHLCnHQ\x7fwvL05Ip"])
+
+    def test_decode_position_reports_matches_decode_batch(self):
+        messages = [msg for msg in FileReaderStream(self.FILENAME) if msg.is_single and len(msg.payload) == 28]
+        expected = decode_batch(msg.raw for msg in messages)
+        actual = decode_position_reports([msg.payload for msg in messages], chunk_size=100)
+
+        self.assertEqual(set(actual.keys()), {MessageType1, MessageType3, MessageType18})
+        for payload_class, columns in actual.items():
+            self.assertEqual(list(columns.keys()), list(expected[payload_class].keys()))
+            for name, column in columns.items():
+                self.assertEqual(column.dtype, expected[payload_class][name].dtype)
+                self.assertEqual(column.tolist(), expected[payload_class][name].tolist())
+
+    def test_decode_position_reports_turn(self):
+        payloads = [
+            b"13HOI:0P0000VOHLCnHQKwvL05Ip",  # no turn information (-128)
+            b"13RlIW?OlF1beJ0EFL39bBvL087M",  # turning right (127)
+            b"13RlIW?04F1beOVEFLB9bRvH0L0L",  # 0
+            b"33P;Tw0tjBQO22:E7dm66DrB20UP",  # -7
+            b"14S:lr02j>1Tv?LDi:;5:D8F0H6L",  # 5
+        ]
+        columns = decode_position_reports(payloads)
+
+        self.assertEqual(columns[MessageType1]['turn'].tolist(), [-128.0, 127.0, 0.0, 5.0])
+        self.assertEqual(columns[MessageType3]['turn'].tolist(), [-7.0])
+
+    def test_decode_position_reports_raises_for_short_payloads(self):
+        with self.assertRaises(ValueError):
+            decode_position_reports([b"13HOI:0P0000"])
+
+    def test_decode_position_reports_of_nothing(self):
+        self.assertEqual(decode_position_reports([]), {})
+
+
+class TestChecksum(unittest.TestCase):
+    FILENAME = str(pathlib.Path(__file__).parent.joinpath("nmea_data_sample.txt").absolute())
+
+    def test_checksum_of_any_length(self):
+        for length in (1, 2, 7, 8, 9, 82, 127, 128, 129, 256, 1000):
+            data = bytes((i * 37 + length) % 256 for i in range(length))
+            expected = 0
+            for byte in data:
+                expected ^= byte
+            self.assertEqual(checksum(data), expected)
+
+    @unittest.skipIf(not HAS_NUMPY, "NumPy is not installed")
+    def test_validate_checksums_matches_nmea_message(self):
+        with open(self.FILENAME, "rb") as fd:
+            sentences = [line.strip() for line in fd if line.startswith(b"!")]
+
+        # Break some of the checksums
+        sentences += [sentence[:-1] + b"X" for sentence in sentences[:10]]
+        sentences += [sentence[:-1] for sentence in sentences[:10]]
+        sentences += [sentence.replace(b"*", b"") for sentence in sentences[:10]]
+        sentences += [b"!*00", b"", b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23*23"]
+
+        expected = []
+        for sentence in sentences:
+            star = sentence.find(b"*")
+            expected.append(
+                star > 1 and star == len(sentence) - 3 and sentence[star + 1:].upper() == b"%02X" % compute_checksum(sentence)
+            )
+
+        self.assertEqual(validate_checksums(sentences).tolist(), expected)
+        self.assertGreater(sum(expected), 800)
+
+    @unittest.skipIf(not HAS_NUMPY, "NumPy is not installed")
+    def test_validate_checksums_of_nothing(self):
+        self.assertEqual(len(validate_checksums([])), 0)
+        with self.assertRaises(ValueError):
+            validate_checksums([b"!AIVDM\n"])
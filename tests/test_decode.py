@@ -1,11 +1,15 @@
 import base64
+import copy
 import datetime
 import itertools
 import json
+import pickle
 import textwrap
 import typing
 import unittest
 
+from bitarray import bitarray
+
 from pyais import NMEAMessage, encode_dict
 from pyais.ais_types import AISType
 from pyais.constants import (EpfdType, ManeuverIndicator, NavAid,
@@ -14,7 +18,7 @@ from pyais.constants import (EpfdType, ManeuverIndicator, NavAid,
 from pyais.decode import decode, decode_nmea_line
 from pyais.exceptions import InvalidNMEAChecksum, InvalidNMEAMessageException, MissingMultipartMessageException, UnknownMessageException, NonPrintableCharacterException
 from pyais.messages import (
-    MSG_CLASS, AISSentence, GatehouseSentence, MessageType5, MessageType6,
+    DECODERS, MSG_CLASS, AISSentence, GatehouseSentence, LazyPayload, MessageType1, MessageType2, MessageType5, MessageType6,
     MessageType18, MessageType22Addressed,
     MessageType22Broadcast, MessageType24PartA,
     MessageType24PartB,
@@ -1468,6 +1472,16 @@ class TestAIS(unittest.TestCase):
         with self.assertRaises(NonPrintableCharacterException):
             _ = decode_into_bit_array(payload)
 
+    def test_decode_into_bit_array_with_fill_bits(self):
+        self.assertEqual(decode_into_bit_array(b'').to01(), '')
+        self.assertEqual(decode_into_bit_array(b'0').to01(), '000000')
+        self.assertEqual(decode_into_bit_array(b'w').to01(), '111111')
+        self.assertEqual(decode_into_bit_array(b'0w', fill_bits=2).to01(), '0000001111')
+        self.assertEqual(decode_into_bit_array(b'@`w', fill_bits=5).to01(), '0100001010001')
+        self.assertEqual(decode_into_bit_array(b'15M67FC000G?', fill_bits=0).to01(), (
+            '000001000101011101000110000111010110010011000000000000000000010111001111'
+        ))
+
     def test_gh_ais_message_decode(self):
         a = b"$PGHP,1,2008,5,9,0,0,0,10,338,2,,1,09*17"
         b = b"!AIVDM,1,1,,B,15NBj>PP1gG>1PVKTDTUJOv00<0M,0*09"
@@ -1542,3 +1556,98 @@ class TestAIS(unittest.TestCase):
 
         with self.assertRaises(UnknownMessageException):
             decode_nmea_line(b",n:4,r:35435435435,foo bar 200")
+
+    def test_decoding_plan_is_built_once_per_class(self):
+        plan = MessageType1.decoding_plan()
+
+        self.assertIs(plan, MessageType1.decoding_plan())
+        self.assertIsNot(plan, MessageType2.decoding_plan())
+        self.assertEqual(list(plan), [f.name for f in MessageType1.fields()])
+        self.assertEqual(sum(d.width for d in plan.values()), 168)
+        self.assertEqual(plan['lat'].offset, 89)
+
+    def test_generated_decoder_matches_field_by_field_decoding(self):
+        msgs = [
+            b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23",
+            b"!AIVDM,1,1,,A,15M67FC000G?ufbE`FepT@3n00Sa,0*5C",
+            b"!AIVDM,1,1,,A,402M3b@000Htt0K0Q0R3T<700t24,0*52",
+            b"!AIVDM,1,1,,B,B5NJ;PP005l4ot5Isbl03wsUkP06,0*76",
+            b"!AIVDM,2,1,1,A,538CQ>02A;h?D9QC800pu8@T>0P4l9E8L0000017Ah:;;5r50Ahm5;C0,0*07",
+        ]
+        for raw in msgs[:4]:
+            self.assert_same_as_extract(NMEAMessage(raw))
+        self.assert_same_as_extract(NMEAMessage.assemble_from_iterable(
+            [NMEAMessage(msgs[4]), NMEAMessage(b"!AIVDM,2,2,1,A,F@V@00000000000,2*35")]
+        ))
+
+    def assert_same_as_extract(self, msg):
+        bits = msg.bit_array
+        cls = MSG_CLASS[msg.ais_id].payload_class(bits)
+        decoded = cls.from_bitarray(bits)
+        self.assertIn(cls, DECODERS)
+
+        raw = bits.tobytes()
+        value, n_bits = int.from_bytes(raw, 'big'), len(raw) * 8
+        expected = cls(**{name: d.extract(bits, value, n_bits) for name, d in cls.decoding_plan().items()})
+        self.assertEqual(decoded, expected)
+        self.assertEqual([type(v) for v in decoded.asdict().values()], [type(v) for v in expected.asdict().values()])
+
+    def test_from_bitarray_with_truncated_signed_field(self):
+        # The message ends within the lon field. Its first bit is set so it is negative.
+        bits = bitarray('000001' + '00' + '0' * 30 + '0000' + '00000000' + '0' * 10 + '0' + '1100')
+        msg = MessageType1.from_bitarray(bits)
+
+        self.assertEqual(msg.mmsi, 0)
+        self.assertEqual(msg.lon, round(-4 / 600000.0, 6))
+        self.assertIsNone(msg.lat)
+        self.assertIsNone(msg.radio)
+
+    def test_decode_lazy_decodes_fields_on_access(self):
+        msg = NMEAMessage(b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23")
+        lazy = msg.decode_lazy()
+
+        self.assertIsInstance(lazy, LazyPayload)
+        self.assertIs(lazy.payload_class, MessageType1)
+        self.assertEqual(lazy.mmsi, 227006760)
+        self.assertEqual(lazy.lat, 49.475577)
+        self.assertEqual(lazy.lon, 0.13138)
+        self.assertEqual(lazy.status, NavigationStatus.UnderWayUsingEngine)
+        self.assertIsInstance(lazy.status, NavigationStatus)
+
+        with self.assertRaises(AttributeError):
+            _ = lazy.foo
+
+    def test_decode_lazy_is_compatible_with_decode(self):
+        msgs = [
+            b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23",
+            b"!AIVDM,1,1,,B,H52KMeDU653hhhi0000000000000,0*1A",
+            b"!AIVDM,1,1,,B,B5NJ;PP005l4ot5Isbl03wsUkP06,0*76",
+            b"!AIVDM,1,1,,A,402M3b@000Htt0K0Q0R3T<700t24,0*52",
+        ]
+        for raw in msgs:
+            msg = NMEAMessage(raw)
+            decoded = msg.decode()
+            lazy = msg.decode_lazy()
+
+            self.assertIs(lazy.payload_class, type(decoded))
+            self.assertEqual(lazy.asdict(), decoded.asdict())
+            self.assertEqual(lazy.asdict(enum_as_int=True), decoded.asdict(enum_as_int=True))
+            self.assertEqual(lazy.to_json(), decoded.to_json())
+            self.assertEqual(lazy.materialize(), decoded)
+
+    def test_decode_lazy_can_be_copied_and_pickled(self):
+        lazy = NMEAMessage(b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23").decode_lazy()
+        self.assertEqual(lazy.mmsi, 227006760)
+
+        for clone in (copy.copy(lazy), copy.deepcopy(lazy), pickle.loads(pickle.dumps(lazy))):
+            self.assertIsInstance(clone, LazyPayload)
+            self.assertIs(clone.payload_class, lazy.payload_class)
+            self.assertEqual(clone.asdict(), lazy.asdict())
+
+        # Private names are never looked up as fields
+        with self.assertRaises(AttributeError):
+            LazyPayload.__new__(LazyPayload)._decoded
+
+    def test_decode_lazy_raises_for_unknown_messages(self):
+        with self.assertRaises(UnknownMessageException):
+            NMEAMessage(b"!AIVDM,1,1,,B,h52KMeDU653hhhi0000000000000,0*1A").decode_lazy()
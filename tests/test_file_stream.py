@@ -1,4 +1,5 @@
 import pathlib
+import tempfile
 import time
 import unittest
 from unittest.case import skip
@@ -203,3 +204,53 @@ class TestFileReaderStream(unittest.TestCase):
                     assert str(msg.wrapper_msg.timestamp) == '2009-05-09 00:00:00.010000'
                 else:
                     assert msg.wrapper_msg is None
+
+    def test_read_yields_the_same_lines_as_readlines(self):
+        par_dir = pathlib.Path(__file__).parent.absolute()
+        for name in ("nmea_data_sample.txt", "messages.ais", "timestamped.ais"):
+            nmea_file = par_dir.joinpath(name)
+            with open(nmea_file, "rb") as fd:
+                expected = fd.readlines()
+
+            with FileReaderStream(str(nmea_file)) as stream:
+                self.assertEqual(list(stream.read()), expected)
+
+    def test_read_with_small_chunks(self):
+        content = b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23\r\n\n" \
+                  b"!AIVDM,1,1,,A,133sVfPP00PD>hRMDH@jNOvN20S8,0*7F\n" \
+                  b"!AIVDM,1,1,,B,100h00PP0@PHFV`Mg5gTH?vNPUIp,0*3B"
+
+        with tempfile.NamedTemporaryFile() as fd:
+            fd.write(content)
+            fd.flush()
+
+            for chunk_size in (1, 10, 50, 51, 52, 1000):
+                with FileReaderStream(fd.name) as stream:
+                    stream.CHUNK_SIZE = chunk_size
+                    self.assertEqual(list(stream.read()), content.splitlines(keepends=True))
+
+                with FileReaderStream(fd.name) as stream:
+                    stream.CHUNK_SIZE = chunk_size
+                    self.assertEqual(len(list(stream)), 3)
+
+    def test_read_splits_at_newlines_only(self):
+        content = b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23\r!AIVDM\x0b\x0c\x1c\x1d\x1e\r\n" \
+                  b"!AIVDM,1,1,,A,133sVfPP00PD>hRMDH@jNOvN20S8,0*7F\rfoo\n" \
+                  b"bar\r"
+
+        with tempfile.NamedTemporaryFile() as fd:
+            fd.write(content)
+            fd.flush()
+            with open(fd.name, "rb") as f:
+                expected = f.readlines()
+
+            for chunk_size in (1, 10, 1000):
+                with FileReaderStream(fd.name) as stream:
+                    stream.CHUNK_SIZE = chunk_size
+                    self.assertEqual(list(stream.read()), expected)
+            self.assertEqual(len(expected), 3)
+
+    def test_read_empty_file(self):
+        with tempfile.NamedTemporaryFile() as fd:
+            with FileReaderStream(fd.name) as stream:
+                self.assertEqual(list(stream), [])
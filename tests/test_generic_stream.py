@@ -1,9 +1,10 @@
+import pathlib
 import types
 import unittest
 from typing import List
 
 from pyais import NMEAMessage
-from pyais.stream import BinaryIOStream, IterMessages
+from pyais.stream import BinaryIOStream, FileReaderStream, IterMessages, LineReader, LineSplitter, SocketStream
 
 
 class MockFile:
@@ -110,3 +111,107 @@ class TestIterMessages(unittest.TestCase):
         self.assertEqual(2, len(decoded))
         self.assertTrue(all(d["mmsi"] == 210035000 for d in decoded))
         self.assertTrue(all(d["shipname"] == "NORDIC HAMBURG" for d in decoded))
+
+
+class ChunkedReceiver:
+
+    def __init__(self, chunks: List[bytes]):
+        self.chunks = chunks
+
+    def recv_into(self, view: memoryview) -> int:
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
+
+class TestLineSplitting(unittest.TestCase):
+    CHUNKS = [b"!AIVDM,1", b",1,,A,foo*00\r", b"\n!AIVDM,1,1,,B,bar*00\n\n", b"\r\nbaz\r\n", b"incomplete"]
+    LINES = [b"!AIVDM,1,1,,A,foo*00", b"!AIVDM,1,1,,B,bar*00", b"baz"]
+
+    def test_line_reader(self):
+        reader = LineReader(ChunkedReceiver(list(self.CHUNKS)).recv_into, 16, 64)
+
+        lines = []
+        while True:
+            read = reader.read_lines()
+            if read is None:
+                break
+            lines += read
+
+        self.assertEqual(lines, self.LINES)
+
+    def test_line_reader_reuses_its_buffer(self):
+        chunks = [b"!AIVDM,1,1,,A,foo*00\r\n!AIVDM"] + [b",1,1,,A,foo*00\r\n!AIVDM"] * 100
+        reader = LineReader(ChunkedReceiver(chunks).recv_into, 32, 64)
+
+        lines = []
+        while True:
+            read = reader.read_lines()
+            if read is None:
+                break
+            lines += read
+
+        self.assertEqual(lines, [b"!AIVDM,1,1,,A,foo*00"] * 101)
+        self.assertEqual(reader.dropped, 0)
+
+    def test_line_reader_drops_lines_that_are_too_long(self):
+        reader = LineReader(ChunkedReceiver([b"x" * 16] * 5 + [b"\nfoo\n"]).recv_into, 16, 32)
+
+        lines = []
+        while True:
+            read = reader.read_lines()
+            if read is None:
+                break
+            lines += read
+
+        self.assertEqual(reader.dropped, 64)
+        self.assertEqual(lines, [b"x" * 16, b"foo"])
+
+    def test_line_splitter(self):
+        splitter = LineSplitter()
+        lines = [line for chunk in self.CHUNKS for line in splitter.split(chunk)]
+
+        self.assertEqual(lines, self.LINES)
+        self.assertEqual(splitter.partial, b"incomplete")
+
+    def test_socket_stream_with_recv_only(self):
+        class RecvStream(SocketStream):
+            def __init__(self, chunks):
+                super().__init__(None)
+                self.chunks = chunks
+
+            def recv(self):
+                return self.chunks.pop(0) if self.chunks else b""
+
+        self.assertEqual(list(RecvStream(list(self.CHUNKS)).read()), self.LINES)
+
+
+class TestFilter(unittest.TestCase):
+    FILENAME = pathlib.Path(__file__).parent.joinpath('nmea_data_sample.txt')
+
+    def test_mmsi_is_read_without_decoding(self):
+        for msg in FileReaderStream(self.FILENAME):
+            self.assertEqual(msg.mmsi, msg.decode().mmsi)
+
+    def test_mmsi_of_short_payload(self):
+        msg = NMEAMessage(b"!AIVDM,1,1,,A,15M,0*00")
+        self.assertEqual(msg.mmsi, msg.decode().mmsi)
+
+    def test_filter_by_type_and_mmsi(self):
+        messages = list(FileReaderStream(self.FILENAME))
+        mmsis = {msg.decode().mmsi for msg in messages[:50]}
+
+        expected = [msg.raw for msg in messages if msg.ais_id in (1, 2, 3, 5) and msg.decode().mmsi in mmsis]
+        filtered = [msg.raw for msg in FileReaderStream(self.FILENAME).filter(types=(1, 2, 3, 5), mmsis=mmsis)]
+
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(filtered, expected)
+
+    def test_filter_without_criteria_keeps_all_messages(self):
+        self.assertEqual(
+            [msg.raw for msg in FileReaderStream(self.FILENAME).filter()],
+            [msg.raw for msg in FileReaderStream(self.FILENAME)],
+        )
+        self.assertEqual(list(FileReaderStream(self.FILENAME).filter(types=[])), [])
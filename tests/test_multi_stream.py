@@ -0,0 +1,86 @@
+import socket
+import unittest
+
+from pyais.stream import IterMessages, MultiStream, ReconnectingTCPConnection, TCPConnection, UDPReceiver
+
+STATION_A = [
+    b"!AIVDM,2,1,1,A,538CQ>02A;h?D9QC800pu8@T>0P4l9E8L0000017Ah:;;5r50Ahm5;C0,0*07",
+    b"!AIVDM,2,2,1,A,F@V@00000000000,2*35",
+]
+STATION_B = [
+    b"!AIVDM,2,1,1,A,55?MbV02;H;s<HtKP00EHE:0@T4@Dl0000000000L961O5Gf0NSQEp6ClRh0,0*0B",
+    b"!AIVDM,2,2,1,A,00000000000,2*27",
+]
+SINGLE = b"!AIVDM,1,1,,B,133S0:0P00PCsJ:MECBR0gv:0D8N,0*7F"
+
+
+class TestMultiStream(unittest.TestCase):
+
+    def test_sources_do_not_share_multipart_buffers(self):
+        # Both stations use the same (seq_id, channel) slot at the same time
+        interleaved = [STATION_A[0], STATION_B[0], STATION_A[1], STATION_B[1]]
+        mixed = [msg.decode().mmsi for msg in IterMessages(interleaved)]
+        self.assertNotEqual(sorted(mixed), [210035000, 351759000])
+
+        multi = MultiStream(IterMessages(STATION_A), IterMessages(STATION_B))
+        self.assertEqual(sorted(msg.decode().mmsi for msg in multi), [210035000, 351759000])
+
+    def test_iter_with_source(self):
+        source_a = IterMessages(STATION_A + [SINGLE])
+        source_b = IterMessages(STATION_B)
+
+        with MultiStream(source_a, source_b) as stream:
+            result = [(source, msg.decode().msg_type) for source, msg in stream.iter_with_source()]
+
+        self.assertEqual(result, [(source_a, 5), (source_a, 1), (source_b, 5)])
+
+    def test_lines_are_read_in_turns(self):
+        stream = MultiStream(IterMessages([SINGLE] * 3), IterMessages([SINGLE] * 3))
+        stream.LINES_PER_TURN = 1
+
+        sources = [source for source, _ in stream.iter_with_source()]
+        self.assertEqual(sources, list(stream.sources) * 3)
+
+    def test_reconnecting_connections_are_rejected(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+
+        try:
+            with ReconnectingTCPConnection("127.0.0.1", server.getsockname()[1], max_retries=0) as tcp:
+                with self.assertRaises(TypeError):
+                    MultiStream(IterMessages([SINGLE]), tcp)
+        finally:
+            server.close()
+
+    def test_sockets(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        tcp_port = server.getsockname()[1]
+
+        udp = UDPReceiver("127.0.0.1", 0)
+        udp_port = udp._fobj.getsockname()[1]
+
+        try:
+            tcp = TCPConnection("127.0.0.1", tcp_port)
+            conn, _ = server.accept()
+            with MultiStream(tcp, udp, IterMessages([SINGLE])) as stream:
+                # Send one fragment per source at a time
+                for line_a, line_b in zip(STATION_A, STATION_B):
+                    conn.send(line_a[:20])
+                    conn.send(line_a[20:] + b"\r\n")
+                    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                        sender.sendto(line_b + b"\r\n", ("127.0.0.1", udp_port))
+                conn.close()
+
+                result = []
+                for source, msg in stream.iter_with_source():
+                    result.append((source, msg.decode().mmsi))
+                    if len(result) == 3:
+                        break
+
+            self.assertIn((tcp, 210035000), result)
+            self.assertIn((udp, 351759000), result)
+        finally:
+            server.close()
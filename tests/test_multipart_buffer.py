@@ -0,0 +1,137 @@
+import unittest
+
+from pyais.messages import NMEAMessage
+from pyais.stream import IterMessages, MultipartBuffer
+
+
+def fragment(seq_id, frag_num, frag_cnt=2, channel='A'):
+    return NMEAMessage(f"!AIVDM,{frag_cnt},{frag_num},{seq_id},{channel},00000000000,0*00".encode())
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMultipartBuffer(unittest.TestCase):
+
+    def test_assemble(self):
+        buffer = MultipartBuffer()
+        self.assertIsNone(buffer.add(fragment(1, 2)))
+        self.assertEqual(len(buffer), 1)
+
+        msg = buffer.add(fragment(1, 1))
+        self.assertIsNotNone(msg)
+        self.assertEqual(msg.frag_num, 1)
+        self.assertEqual(len(buffer), 0)
+
+    def test_slots_are_separated_by_seq_id_and_channel(self):
+        buffer = MultipartBuffer()
+        buffer.add(fragment(1, 1, channel='A'))
+        buffer.add(fragment(1, 1, channel='B'))
+        buffer.add(fragment(2, 1, channel='A'))
+
+        self.assertEqual(set(buffer), {(1, 'A'), (1, 'B'), (2, 'A')})
+        self.assertIn((1, 'B'), buffer)
+
+    def test_least_recently_updated_slot_is_evicted(self):
+        buffer = MultipartBuffer(max_slots=2)
+        buffer.add(fragment(1, 1, frag_cnt=3))
+        buffer.add(fragment(2, 1, frag_cnt=3))
+        buffer.add(fragment(1, 2, frag_cnt=3))
+        buffer.add(fragment(3, 1, frag_cnt=3))
+
+        self.assertEqual(list(buffer), [(1, 'A'), (3, 'A')])
+        self.assertEqual(buffer.evicted, 1)
+        self.assertIsNotNone(buffer.add(fragment(1, 3, frag_cnt=3)))
+
+    def test_timeout_in_seconds(self):
+        clock = FakeClock()
+        buffer = MultipartBuffer(timeout=10, clock=clock)
+        buffer.add(fragment(1, 1, frag_cnt=3))
+        clock.now = 5
+        buffer.add(fragment(2, 1))
+        clock.now = 7
+        buffer.add(fragment(1, 2, frag_cnt=3))
+
+        clock.now = 14
+        self.assertEqual(buffer.expire(), 0)
+
+        clock.now = 15.5
+        self.assertEqual(buffer.expire(), 1)
+        self.assertEqual(list(buffer), [(1, 'A')])
+
+        clock.now = 30
+        self.assertIsNone(buffer.add(fragment(1, 3, frag_cnt=3)))
+        self.assertEqual(buffer.expired, 3)
+        self.assertEqual(len(buffer), 1)
+
+    def test_timeout_can_be_set_later(self):
+        clock = FakeClock()
+        clock.now = 100
+        buffer = MultipartBuffer(clock=clock)
+        buffer.add(fragment(1, 1))
+        clock.now = 105
+        buffer.add(fragment(2, 1))
+
+        buffer.timeout = 10
+        clock.now = 112
+        self.assertEqual(buffer.expire(), 1)
+        self.assertEqual(list(buffer), [(2, 'A')])
+
+    def test_timeout_in_fragments(self):
+        buffer = MultipartBuffer(timeout_fragments=2)
+        buffer.add(fragment(1, 1))
+        buffer.add(fragment(2, 1))
+        buffer.add(fragment(3, 1))
+        self.assertEqual(list(buffer), [(1, 'A'), (2, 'A'), (3, 'A')])
+
+        buffer.add(fragment(4, 1))
+        self.assertEqual(list(buffer), [(2, 'A'), (3, 'A'), (4, 'A')])
+        self.assertEqual(buffer.expired, 1)
+
+    def test_invalid_fragments_are_discarded(self):
+        buffer = MultipartBuffer()
+        self.assertIsNone(buffer.add(fragment(1, 3, frag_cnt=2)))
+        self.assertIsNone(buffer.add(fragment(1, 0, frag_cnt=2)))
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.discarded, 2)
+
+        # The fragment count of the slot changed
+        buffer.add(fragment(1, 1, frag_cnt=3))
+        buffer.add(fragment(1, 2, frag_cnt=2))
+        self.assertEqual(buffer.discarded, 3)
+        self.assertIsNotNone(buffer.add(fragment(1, 1, frag_cnt=2)))
+
+    def test_invalid_max_slots(self):
+        with self.assertRaises(ValueError):
+            MultipartBuffer(max_slots=0)
+
+    def test_stream_buffer_can_be_configured(self):
+        stream = IterMessages([
+            b"!AIVDM,2,1,1,A,538CQ>02A;h?D9QC800pu8@T>0P4l9E8L0000017Ah:;;5r50Ahm5;C0,0*07",
+            b"!AIVDM,2,1,2,A,538CQ>02A;h?D9QC800pu8@T>0P4l9E8L0000017Ah:;;5r50Ahm5;C0,0*04",
+            b"!AIVDM,2,2,1,A,F@V@00000000000,2*35",
+        ])
+        stream.buffer = MultipartBuffer(max_slots=1)
+
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream.buffer.evicted, 2)
+        self.assertEqual(list(stream.buffer), [(1, 'A')])
+
+    def test_fragments_in_any_order(self):
+        buffer = MultipartBuffer(max_slots=1)
+        self.assertIsNone(buffer.add(fragment(1, 3, frag_cnt=3)))
+        self.assertIsNone(buffer.add(fragment(1, 1, frag_cnt=3)))
+        # Duplicates replace the previous fragment
+        self.assertIsNone(buffer.add(fragment(1, 3, frag_cnt=3)))
+        self.assertIsNone(buffer.add(fragment(1, 1, frag_cnt=3)))
+
+        msg = buffer.add(fragment(1, 2, frag_cnt=3))
+        self.assertEqual(msg.raw.splitlines(), [fragment(1, i, frag_cnt=3).raw for i in (1, 2, 3)])
+        self.assertEqual(msg.payload, b"0" * 33)
+        self.assertEqual(len(msg.bit_array), 33 * 6)
+        self.assertEqual(buffer.evicted, 0)
@@ -3,9 +3,9 @@ import unittest
 from bitarray import bitarray
 from pyais.decode import _assemble_messages
 
-from pyais.exceptions import InvalidNMEAMessageException
+from pyais.exceptions import InvalidNMEAMessageException, NonPrintableCharacterException
 from pyais.messages import NMEAMessage
-from pyais.util import chk_to_int
+from pyais.util import checksum as util_checksum, chk_to_int, compute_checksum, decode_into_bit_array, tokenize
 
 
 class TestNMEA(unittest.TestCase):
@@ -217,3 +217,53 @@ class TestNMEA(unittest.TestCase):
         ]
         msg = _assemble_messages(*sentences)
         self.assertFalse(msg.is_valid)
+
+    def test_bit_array_is_computed_on_first_access(self):
+        msg = NMEAMessage(b"!AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,0*1B")
+        self.assertIsNone(msg._bit_array)
+        self.assertEqual(msg.ais_id, 1)
+
+        bit_array = msg.bit_array
+        self.assertEqual(bit_array, decode_into_bit_array(msg.payload, msg.fill_bits))
+        self.assertIs(msg.bit_array, bit_array)
+
+    def test_assembled_bit_array_is_decoded_from_joined_payload(self):
+        sentences = [
+            b"!AIVDM,2,1,4,A,55O0W7`00001L@gCWGA2uItLth@DqtL5@F22220j1h742t0Ht0000000,0*08",
+            b"!AIVDM,2,2,4,A,000000000000000,2*20",
+        ]
+        expected = bitarray()
+        for sentence in sentences:
+            expected.extend(NMEAMessage(sentence).bit_array)
+
+        msg = _assemble_messages(*sentences)
+        self.assertEqual(msg.fill_bits, 2)
+        self.assertEqual(msg.bit_array, expected)
+        self.assertEqual(msg.decode().msg_type, 5)
+
+    def test_non_printable_payload_is_rejected_without_decoding(self):
+        with self.assertRaises(NonPrintableCharacterException):
+            NMEAMessage(b"!AIVDM,1,1,,A,15Mj23P000G\x7fq7fK>g:o7@1:0L3S,0*1B")
+
+    def test_tokenize(self):
+        raw = b"!AIVDM,2,1,4,A,55O0W7`00001L@gCWGA2uItLth@DqtL5@F22220j1h742t0Ht0000000,0*08"
+        fields, fill_bits, checksum, body = tokenize(raw)
+
+        self.assertEqual(fields, raw.split(b","))
+        self.assertEqual(fill_bits, 0)
+        self.assertEqual(checksum, 8)
+        self.assertEqual(body, raw[1:-3])
+
+    def test_tokenize_matches_chk_to_int_and_compute_checksum(self):
+        for raw in (
+                b"!AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,0*1B",
+                b"!AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,2*",
+                b"!AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,X*ZZ",
+                b"!AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,0*1B*1B",
+                b"!AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,0",
+                b"!AIVDM,1,1,,A,15Mj23P000G?q7fK>g:o7@1:0L3S,",
+                b"$PGHP,1,2004,12,21,23,59,58,999,219,219,2190047,1,*43",
+        ):
+            fields, fill_bits, checksum, body = tokenize(raw)
+            self.assertEqual((fill_bits, checksum), chk_to_int(fields[-1]))
+            self.assertEqual(util_checksum(body), compute_checksum(raw))
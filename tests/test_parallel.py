@@ -0,0 +1,92 @@
+import pathlib
+import tempfile
+import unittest
+
+from pyais.exceptions import UnknownMessageException
+from pyais.messages import MessageType5
+from pyais.parallel import ParallelFileDecoder, chunk_boundaries
+from pyais.stream import FileReaderStream
+
+
+def decode_sequentially(filename):
+    decoded = []
+    for msg in FileReaderStream(filename):
+        try:
+            decoded.append(msg.decode())
+        except UnknownMessageException:
+            continue
+    return decoded
+
+
+class TestParallelFileDecoder(unittest.TestCase):
+    PAR_DIR = pathlib.Path(__file__).parent.absolute()
+    FILENAME = str(PAR_DIR.joinpath("ais_test_messages"))
+
+    def test_chunk_boundaries(self):
+        with open(self.FILENAME, 'rb') as fd:
+            content = fd.read()
+
+        boundaries = chunk_boundaries(self.FILENAME, 100)
+        self.assertEqual(boundaries[0][0], 0)
+        self.assertEqual(boundaries[-1][1], len(content))
+
+        for (_, end), (start, _) in zip(boundaries, boundaries[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(content[end - 1:end], b'\n')
+
+    def test_decodes_in_the_same_order_as_file_reader_stream(self):
+        for name in ("ais_test_messages", "nmea_data_sample.txt", "messages.ais", "timestamped.ais"):
+            filename = str(self.PAR_DIR.joinpath(name))
+            expected = decode_sequentially(filename)
+
+            for chunk_size in (1, 97, 1000, 1 << 24):
+                decoded = list(ParallelFileDecoder(filename, workers=1, chunk_size=chunk_size))
+                self.assertEqual(decoded, expected)
+
+    def test_multipart_messages_across_chunks(self):
+        lines = [
+            b"!AIVDM,2,1,4,A,55O0W7`00001L@gCWGA2uItLth@DqtL5@F22220j1h742t0Ht0000000,0*08",
+            b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23",
+            b"!AIVDM,2,1,4,A,55?MbV02;H;s<HtKP00EHE:0@T4@Dl0000000000L961O5Gf0NSQEp6ClRh0,0*0B",
+            b"!AIVDM,2,2,4,A,000000000000000,2*20",
+            b"!AIVDM,1,1,,A,133sVfPP00PD>hRMDH@jNOvN20S8,0*7F",
+            b"!AIVDM,2,2,4,A,00000000000,2*21",
+        ]
+
+        with tempfile.NamedTemporaryFile() as fd:
+            fd.write(b"\n".join(lines) + b"\n")
+            fd.flush()
+
+            expected = decode_sequentially(fd.name)
+            self.assertEqual([type(msg) for msg in expected].count(MessageType5), 1)
+
+            for chunk_size in range(1, len(lines[0]) * len(lines)):
+                decoded = list(ParallelFileDecoder(fd.name, workers=1, chunk_size=chunk_size))
+                self.assertEqual(decoded, expected)
+
+    def test_carriage_return_does_not_end_a_line(self):
+        content = (
+            b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23\r"
+            b"!AIVDM,1,1,,A,133sVfPP00PD>hRMDH@jNOvN20S8,0*7F\r\n"
+            b"!AIVDM,1,1,,A,15M67FC000G?ufbE`FepT@3n00Sa,0*5C\r\n"
+        )
+
+        with tempfile.NamedTemporaryFile() as fd:
+            fd.write(content)
+            fd.flush()
+
+            expected = decode_sequentially(fd.name)
+            decoded = list(ParallelFileDecoder(fd.name, workers=1))
+            self.assertEqual(decoded, expected)
+
+    def test_process_pool(self):
+        expected = decode_sequentially(self.FILENAME)
+        decoded = list(ParallelFileDecoder(self.FILENAME, workers=2, chunk_size=256))
+        self.assertEqual(decoded, expected)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(FileNotFoundError):
+            ParallelFileDecoder("doesnotexist")
+
+        with self.assertRaises(ValueError):
+            ParallelFileDecoder(self.FILENAME, chunk_size=0)
@@ -0,0 +1,130 @@
+import asyncio
+import unittest
+
+from pyais.server import NMEAServer
+from pyais.stream import AsyncTCPConnection, IterMessages
+
+MESSAGES = [
+    b"!AIVDM,1,1,,B,133S0:0P00PCsJ:MECBR0gv:0D8N,0*7F",
+    b"!AIVDM,2,1,1,A,538CQ>02A;h?D9QC800pu8@T>0P4l9E8L0000017Ah:;;5r50Ahm5;C0,0*07",
+    b"!AIVDM,1,1,,A,4h2=a@Quho;O306WMpMIK<Q00826,0*42",
+    b"!AIVDM,2,2,1,A,F@V@00000000000,2*35",
+    b"!AIVDM,1,1,,A,402M3b@000Htt0K0Q0R3T<700t24,0*52",
+]
+TAGGED = [
+    b"\\s:2573535,c:1671533231*08\\!BSVDM,2,1,8,B,53nN34?000QFpgRWnQLLSPpF00SO00000000001@000000000000000000000,0*7B",
+    b"$PGHP,1,2004,12,21,23,59,58,999,219,219000001,219000002,1,6D*56",
+    b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23",
+    b"\\s:2573535,c:1671533231*08\\!BSVDM,2,2,8,B,00000000000,2*36",
+    b"\\s:rORBCOMM000,q:u,c:1426032001,T:2015-03-11 00.00.01*58\\!BSVDM,1,1,,A,13nN34?000QFpgRWnQLLSPpF00SO,0*06",
+]
+
+
+class FakeTransport:
+
+    def __init__(self, buffered=0):
+        self.buffered = buffered
+        self.data = b""
+        self.aborted = False
+
+    def is_closing(self):
+        return self.aborted
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+    def write(self, data):
+        self.data += data
+
+    def abort(self):
+        self.aborted = True
+
+
+async def serve_to_clients(server, n_clients):
+    async with server:
+        connections = [await asyncio.open_connection("127.0.0.1", server.port) for _ in range(n_clients)]
+        while len(server.clients) < n_clients:
+            await asyncio.sleep(0.01)
+
+        await server.serve()
+        return [(await reader.read()).splitlines() for reader, _ in connections]
+
+
+class TestNMEAServer(unittest.TestCase):
+
+    def test_fan_out(self):
+        server = NMEAServer(IterMessages(MESSAGES), host="127.0.0.1", port=0)
+        results = asyncio.run(asyncio.wait_for(serve_to_clients(server, 5), 5))
+
+        self.assertEqual(results, [MESSAGES] * 5)
+        self.assertEqual(server.sentences, 5)
+        self.assertEqual(server.clients, set())
+
+    def test_filter(self):
+        server = NMEAServer(
+            IterMessages(MESSAGES), IterMessages(MESSAGES[:1]), host="127.0.0.1", port=0,
+            filter=lambda msg: msg.ais_id == 1,
+        )
+        results = asyncio.run(asyncio.wait_for(serve_to_clients(server, 2), 5))
+
+        self.assertEqual(results, [MESSAGES[:1] * 2] * 2)
+        self.assertEqual(server.sentences, 2)
+
+    def test_async_source(self):
+        async def handle(reader, writer):
+            writer.write(b"".join(msg + b"\r\n" for msg in MESSAGES))
+            await writer.drain()
+            writer.close()
+
+        async def main():
+            upstream = await asyncio.start_server(handle, "127.0.0.1", 0)
+            async with upstream:
+                port = upstream.sockets[0].getsockname()[1]
+                server = NMEAServer(AsyncTCPConnection("127.0.0.1", port), host="127.0.0.1", port=0)
+                return await serve_to_clients(server, 1)
+
+        self.assertEqual(asyncio.run(asyncio.wait_for(main(), 5)), [MESSAGES])
+
+    def test_lines_are_relayed_byte_for_byte(self):
+        lines = [line + b"\r\n" for line in TAGGED] + [b"not an NMEA sentence\n", b"$GPGGA,no,checksum"]
+        server = NMEAServer(IterMessages(lines), host="127.0.0.1", port=0)
+
+        async def main():
+            async with server:
+                reader, _ = await asyncio.open_connection("127.0.0.1", server.port)
+                while not server.clients:
+                    await asyncio.sleep(0.01)
+                await server.serve()
+                return await reader.read()
+
+        received = asyncio.run(asyncio.wait_for(main(), 5))
+        self.assertEqual(received, b"".join(lines) + b"\r\n")
+        self.assertEqual(server.sentences, 7)
+
+    def test_filter_keeps_tag_blocks_and_wrappers(self):
+        server = NMEAServer(IterMessages(TAGGED), host="127.0.0.1", port=0, filter=lambda msg: msg.ais_id != 1 or msg.mmsi == 227006760)
+        results = asyncio.run(asyncio.wait_for(serve_to_clients(server, 1), 5))
+
+        # The multipart message is forwarded once it is complete
+        self.assertEqual(results, [[TAGGED[1], TAGGED[2], TAGGED[0], TAGGED[3]]])
+        self.assertEqual(server.sentences, 4)
+
+    def test_slow_consumers_are_disconnected(self):
+        server = NMEAServer(IterMessages([]), max_queue_size=100)
+        fast, slow = FakeTransport(), FakeTransport(buffered=60)
+        server.clients.update((fast, slow))
+
+        server.broadcast(b"x" * 40)
+        server.broadcast(b"x" * 41)
+        server.broadcast(b"x" * 10)
+
+        self.assertEqual(fast.data, b"x" * 91)
+        self.assertEqual(slow.data, b"x" * 40)
+        self.assertTrue(slow.aborted)
+        self.assertEqual(server.slow_consumers, 1)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            NMEAServer()
+        with self.assertRaises(ValueError):
+            NMEAServer(IterMessages([]), max_queue_size=0)
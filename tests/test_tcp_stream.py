@@ -2,8 +2,9 @@ import socket
 from tests.utils.timeout import time_limit
 from tests.utils.skip import is_linux
 import threading
+import time
 import unittest
-from pyais.stream import TCPConnection
+from pyais.stream import ReconnectingTCPConnection, TCPConnection
 
 MESSAGES = [
     b"!AIVDM,1,1,,B,133S0:0P00PCsJ:MECBR0gv:0D8N,0*7F",
@@ -67,3 +68,133 @@ class TestTCPStream(unittest.TestCase):
                         break
 
         self.server_thread.join()
+
+
+MULTIPART = [
+    b"!AIVDM,2,1,1,A,538CQ>02A;h?D9QC800pu8@T>0P4l9E8L0000017Ah:;;5r50Ahm5;C0,0*07",
+    b"!AIVDM,2,2,1,A,F@V@00000000000,2*35",
+]
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestReconnectingTCPConnection(unittest.TestCase):
+
+    def test_reconnect_keeps_multipart_state(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+
+        def serve():
+            # The connection drops in the middle of a multipart message and a line
+            for data in (MULTIPART[0] + b"\r\n!AIVDM,1,1,,A,13P<G", MULTIPART[1] + b"\r\n" + MESSAGES[0] + b"\r\n"):
+                conn, _ = server.accept()
+                conn.sendall(data)
+                conn.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        try:
+            with ReconnectingTCPConnection("127.0.0.1", port, initial_delay=0.01, timeout=5) as stream:
+                messages = []
+                for msg in stream:
+                    messages.append(msg)
+                    if len(messages) == 2:
+                        break
+        finally:
+            thread.join()
+            server.close()
+
+        self.assertEqual([msg.decode().msg_type for msg in messages], [5, 1])
+        self.assertEqual(messages[0].raw, MULTIPART[0] + b"\n" + MULTIPART[1])
+        self.assertEqual(stream.reconnects, 1)
+        self.assertGreaterEqual(stream.downtime, 0)
+
+    def test_reconnect_discards_incomplete_line(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+
+        def serve():
+            # The first connection drops in the middle of a line
+            for data in (MESSAGES[0] + b"\r\n" + MESSAGES[1][:20], MESSAGES[2] + b"\r\n"):
+                conn, _ = server.accept()
+                conn.sendall(data)
+                conn.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        try:
+            with ReconnectingTCPConnection("127.0.0.1", port, initial_delay=0.01, timeout=5) as stream:
+                lines = stream.read()
+                received = [next(lines), next(lines)]
+        finally:
+            thread.join()
+            server.close()
+
+        self.assertEqual(received, [MESSAGES[0], MESSAGES[2]])
+        self.assertEqual(stream.reconnects, 1)
+
+    def test_stream_ends_after_max_retries(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+
+        stream = ReconnectingTCPConnection("127.0.0.1", port, initial_delay=0.01, max_retries=2)
+        conn, _ = server.accept()
+        conn.sendall(MESSAGES[0] + b"\r\n")
+        conn.close()
+        server.close()
+
+        with stream:
+            self.assertEqual([msg.raw for msg in stream], [MESSAGES[0]])
+        self.assertEqual(stream.reconnects, 0)
+        self.assertIsInstance(stream.last_error, ConnectionRefusedError)
+        self.assertGreater(stream.downtime, 0)
+
+    def test_invalid_endpoint(self):
+        with self.assertRaises(ConnectionRefusedError):
+            ReconnectingTCPConnection("127.0.0.1", free_port(), initial_delay=0.01, max_retries=1)
+
+    def test_server_down_fails_fast(self):
+        start = time.monotonic()
+        with self.assertRaises(ConnectionRefusedError):
+            ReconnectingTCPConnection("127.0.0.1", free_port(), initial_delay=10, max_retries=None)
+        self.assertLess(time.monotonic() - start, 5)
+
+    def test_read_timeout_triggers_reconnect(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(2)
+        port = server.getsockname()[1]
+
+        try:
+            stream = ReconnectingTCPConnection("127.0.0.1", port, initial_delay=0.01, timeout=0.05)
+            # The first connection stays silent
+            silent, _ = server.accept()
+            threading.Timer(0.01, lambda: server.accept()[0].sendall(MESSAGES[0] + b"\r\n")).start()
+
+            with stream:
+                msg = next(iter(stream))
+            silent.close()
+        finally:
+            server.close()
+
+        self.assertEqual(msg.raw, MESSAGES[0])
+        self.assertEqual(stream.reconnects, 1)
+        self.assertIsInstance(stream.last_error, socket.timeout)
+
+    def test_backoff(self):
+        stream = ReconnectingTCPConnection.__new__(ReconnectingTCPConnection)
+        stream.initial_delay, stream.max_delay = 1.0, 10.0
+
+        for attempt, delay in enumerate([1, 2, 4, 8, 10, 10]):
+            for _ in range(20):
+                self.assertTrue(delay / 2 <= stream.backoff(attempt) <= delay)
@@ -1,8 +1,18 @@
+import array
+import dataclasses
+import math
+import os
+import random
+import tempfile
 import time
 import unittest
 
-from pyais.tracker import AISTracker
+from pyais.constants import ShipType, TurnRate
+from pyais.exceptions import InvalidSnapshotException
+from pyais.tracker import MAX_DROPPED, AISTrack, AISTracker, GridIndex, Journal, TrackHistory, distance, message_fields, msg_to_track, \
+    open_snapshot, read_snapshot, write_snapshot
 from pyais.messages import AISSentence
+from pyais.optional import HAS_NUMPY
 
 
 class TrackerTestCase(unittest.TestCase):
@@ -217,3 +227,532 @@ class TrackerTestCase(unittest.TestCase):
         tracker.update(msg, now)
 
         self.assertEqual(len(tracker.tracks), 4)
+
+    def test_that_tracks_are_slotted(self):
+        track = AISTrack(mmsi=1)
+        self.assertFalse(hasattr(track, "__dict__"))
+        with self.assertRaises(AttributeError):
+            track.foo = 1
+
+    def test_that_update_modifies_tracks_in_place(self):
+        tracker = AISTracker(ttl_in_seconds=None)
+        tracker.update(AISSentence(b"!AIVDO,1,1,,A,1U?MbV0003PecbBN`ja@0?w42000,0*58"), 1673259271.0)
+        track = tracker.get_track(351759000)
+
+        tracker.update(AISSentence(b"!AIVDO,1,1,,A,1U?MbV000?Peid0;LK000?w42000,0*73"), 1673259272.0)
+        self.assertIs(tracker.get_track(351759000), track)
+        self.assertEqual((track.lat, track.lon, track.last_updated), (20.0, 10.0, 1673259272.0))
+        self.assertEqual(tracker.tracks_near(20.0, 10.0, 1), [track])
+        self.assertEqual(tracker.oldest_timestamp, 1673259271.0)
+
+    def test_that_update_uses_insert_and_update_track(self):
+        calls = []
+
+        class RecordingTracker(AISTracker):
+            def insert_track(self, mmsi, new):
+                calls.append(("insert", mmsi))
+                super().insert_track(mmsi, new)
+
+            def update_track(self, mmsi, new, ts=None):
+                calls.append(("update", mmsi, type(new).__name__, ts))
+                super().update_track(mmsi, new, ts)
+
+        tracker = RecordingTracker(ttl_in_seconds=None)
+        tracker.update(AISSentence(b"!AIVDO,1,1,,A,1U?MbV0003PecbBN`ja@0?w42000,0*58"), 1673259271.0)
+        tracker.update(AISSentence(b"!AIVDO,1,1,,A,1U?MbV000?Peid0;LK000?w42000,0*73"), 1673259272.0)
+        self.assertEqual(calls, [("insert", 351759000), ("update", 351759000, "MessageType1", 1673259272.0)])
+
+    def test_message_fields(self):
+        decoded = AISSentence(b"!AIVDO,1,1,,A,1U?MbV0003PecbBN`ja@0?w42000,0*58").decode()
+        self.assertEqual(message_fields(decoded), ("mmsi", "turn", "speed", "lon", "lat", "course", "heading"))
+
+        track = msg_to_track(decoded, 1.0)
+        self.assertEqual((track.mmsi, track.speed, track.last_updated, track.shipname), (351759000, 0.3, 1.0, None))
+
+
+class TrackOrderTestCase(unittest.TestCase):
+
+    def test_cleanup_deletes_expired_tracks_while_young_tracks_exist(self):
+        tracker = AISTracker(ttl_in_seconds=60)
+        t = time.time()
+        tracker.insert_or_update(1, AISTrack(mmsi=1, last_updated=t))
+        tracker.insert_or_update(2, AISTrack(mmsi=2, last_updated=t - 120))
+        tracker.insert_or_update(3, AISTrack(mmsi=3, last_updated=t - 90))
+        tracker.insert_or_update(4, AISTrack(mmsi=4, last_updated=t - 30))
+        # Track 3 is updated and thus stays alive
+        tracker.insert_or_update(3, AISTrack(mmsi=3, last_updated=t - 10))
+
+        tracker.cleanup()
+        self.assertEqual(sorted(track.mmsi for track in tracker.tracks), [1, 3, 4])
+        self.assertEqual(tracker.oldest_timestamp, t - 30)
+
+    def test_n_latest_tracks_matches_sorting(self):
+        rnd = random.Random(7)
+        tracker = AISTracker(ttl_in_seconds=None)
+        for i in range(5000):
+            mmsi = rnd.randrange(300)
+            track = tracker.get_track(mmsi)
+            ts = rnd.uniform(track.last_updated if track else 0, 1000)
+            tracker.insert_or_update(mmsi, AISTrack(mmsi=mmsi, last_updated=ts))
+            if i % 100 == 0:
+                tracker.pop_track(rnd.randrange(300))
+
+            if i % 250 == 0:
+                expected = sorted(tracker.tracks, key=lambda track: track.last_updated, reverse=True)[:20]
+                self.assertEqual([track.last_updated for track in tracker.n_latest_tracks(20)], [track.last_updated for track in expected])
+
+        # Outdated heap entries are dropped regularly
+        self.assertLessEqual(len(tracker._expiry), 2 * len(tracker.tracks) + 64)
+        self.assertLessEqual(len(tracker._latest), 2 * len(tracker.tracks) + 64)
+        self.assertEqual(len(tracker.n_latest_tracks(1000)), len(tracker.tracks))
+
+
+class SpatialIndexTestCase(unittest.TestCase):
+
+    def random_tracker(self, n=2000, cell_size=1.0):
+        rnd = random.Random(42)
+        tracker = AISTracker(ttl_in_seconds=None, cell_size=cell_size)
+        for mmsi in range(n):
+            tracker.insert_or_update(mmsi, AISTrack(mmsi=mmsi, lat=rnd.uniform(-90, 90), lon=rnd.uniform(-180, 180), last_updated=0))
+        # Tracks without a valid position are never returned
+        tracker.insert_or_update(n, AISTrack(mmsi=n, lat=91, lon=181, last_updated=0))
+        tracker.insert_or_update(n + 1, AISTrack(mmsi=n + 1, last_updated=0))
+        return tracker
+
+    def assertSameTracks(self, actual, expected):
+        self.assertEqual(sorted(track.mmsi for track in actual), sorted(track.mmsi for track in expected))
+
+    def test_tracks_in_bbox(self):
+        tracker = self.random_tracker()
+        for box in ((50, 0, 60, 15), (-10.5, -20.5, 10.5, 20.5), (-90, -180, 90, 180), (0, 170, 40, -170), (0, 0, 0, 0)):
+            min_lat, min_lon, max_lat, max_lon = box
+            expected = [
+                track for track in tracker.tracks
+                if track.lat is not None and min_lat <= track.lat <= max_lat and (
+                    (min_lon <= track.lon or track.lon <= max_lon) if min_lon > max_lon else (min_lon <= track.lon <= max_lon)
+                ) and track.lat <= 90
+            ]
+            self.assertSameTracks(tracker.tracks_in_bbox(*box), expected)
+
+        self.assertEqual(len(tracker.tracks_in_bbox(-90, -180, 90, 180)), 2000)
+
+    def test_tracks_near(self):
+        tracker = self.random_tracker(cell_size=0.5)
+        for lat, lon, radius in ((54, 10, 300), (0, 179.5, 600), (89, 0, 200), (-45, -60, 1), (10, 10, 20000)):
+            expected = [
+                track for track in tracker.tracks
+                if track.lat is not None and track.lat <= 90 and distance(lat, lon, track.lat, track.lon) <= radius
+            ]
+            near = tracker.tracks_near(lat, lon, radius)
+            self.assertSameTracks(near, expected)
+
+            distances = [distance(lat, lon, track.lat, track.lon) for track in near]
+            self.assertEqual(distances, sorted(distances))
+
+    def test_index_follows_updates(self):
+        tracker = AISTracker(ttl_in_seconds=None)
+        tracker.insert_or_update(1, AISTrack(mmsi=1, lat=54.0, lon=10.0, last_updated=1))
+        self.assertEqual(len(tracker.tracks_near(54.0, 10.0, 1)), 1)
+
+        # Messages without a position (e.g. static data) do not move the track
+        tracker.insert_or_update(1, AISTrack(mmsi=1, shipname="FOO", last_updated=2))
+        self.assertEqual(len(tracker.tracks_near(54.0, 10.0, 1)), 1)
+
+        tracker.insert_or_update(1, AISTrack(mmsi=1, lat=-33.9, lon=18.4, last_updated=3))
+        self.assertEqual(tracker.tracks_near(54.0, 10.0, 1), [])
+        self.assertEqual(tracker.tracks_in_bbox(-34, 18, -33, 19)[0].shipname, "FOO")
+
+        tracker.pop_track(1)
+        self.assertEqual(tracker.tracks_in_bbox(-90, -180, 90, 180), [])
+
+    def test_grid_index(self):
+        index = GridIndex(cell_size=10)
+        index.update(1, 5.0, 5.0)
+        index.update(2, 15.0, 5.0)
+        index.update(3, 91.0, 181.0)
+        self.assertEqual(len(index), 2)
+        self.assertNotIn(3, index)
+        self.assertEqual(sorted(index.query(0, 0, 9, 9)), [1])
+
+        index.update(1, 15.0, 6.0)
+        self.assertEqual(sorted(index.query(10, 0, 19, 9)), [1, 2])
+        self.assertEqual(list(index.query(0, 0, 9, 9)), [])
+
+        index.remove(2)
+        index.remove(2)
+        self.assertEqual(list(index.query(-90, -180, 90, 180)), [1])
+
+        with self.assertRaises(ValueError):
+            GridIndex(cell_size=0)
+
+
+class TrackHistoryTestCase(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        history = TrackHistory(capacity=3)
+        for i in range(5):
+            self.assertTrue(history.append(i, 50.0 + i, 10.0, speed=i, course=None))
+
+        self.assertEqual(len(history), 3)
+        points = list(history)
+        self.assertEqual([p[0] for p in points], [2, 3, 4])
+        self.assertEqual([p[1] for p in points], [52.0, 53.0, 54.0])
+        self.assertEqual(points[0][3], 2.0)
+        self.assertNotEqual(points[0][4], points[0][4])  # NaN
+
+        with self.assertRaises(ValueError):
+            TrackHistory(capacity=1)
+
+    def test_min_interval(self):
+        history = TrackHistory(min_interval=10)
+        self.assertTrue(history.append(0, 50.0, 10.0))
+        self.assertFalse(history.append(5, 50.1, 10.0))
+        self.assertTrue(history.append(10, 50.2, 10.0))
+        self.assertEqual([p[0] for p in history], [0, 10])
+
+    def test_tolerance(self):
+        history = TrackHistory(tolerance=0.1)
+        # Straight course to the north: only the first and the latest position are kept
+        for i in range(10):
+            history.append(i, 50.0 + i / 60, 10.0)
+        self.assertEqual([p[0] for p in history], [0, 9])
+
+        # Turn to the east
+        history.append(10, 50.0 + 9 / 60, 10.1)
+        history.append(11, 50.0 + 9 / 60, 10.2)
+        self.assertEqual([p[0] for p in history], [0, 9, 11])
+
+    def test_tolerance_on_curved_track(self):
+        # U-turn on a circle with a radius of 1 NM in steps of about 0.01 NM
+        tolerance = 0.05
+        history = TrackHistory(capacity=1000, tolerance=tolerance)
+        track = []
+        for i in range(315):
+            angle = i / 100
+            x, y = math.sin(angle), 1 - math.cos(angle)
+            track.append((x, y))
+            history.append(i, y / 60, x / 60)
+
+        kept = [(lon * 60, lat * 60) for _, lat, lon, _, _ in history]
+        self.assertGreater(len(kept), 2)
+
+        def distance_to_segment(p, a, b):
+            dx, dy = b[0] - a[0], b[1] - a[1]
+            t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)))
+            return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+        for p in track:
+            offset = min(distance_to_segment(p, a, b) for a, b in zip(kept, kept[1:]))
+            self.assertLess(offset, tolerance + 1e-6)
+
+    def test_tolerance_drops_a_limited_number_of_positions(self):
+        history = TrackHistory(tolerance=0.1)
+        for i in range(MAX_DROPPED + 3):
+            history.append(i, 50.0 + i / 600, 10.0)
+        self.assertEqual([p[0] for p in history], [0, MAX_DROPPED + 1, MAX_DROPPED + 2])
+
+    def test_tracker_history(self):
+        tracker = AISTracker(ttl_in_seconds=None, history_size=10)
+        tracker.update(AISSentence.from_bytes(b"!AIVDM,1,1,,A,15NG6V0P01G?cFhE`R2IU?wn28R>,0*05"), 1)
+        tracker.update(AISSentence.from_bytes(b"!AIVDM,1,1,,A,15NG6V0P01G?cFhE`R2IU?wn28R>,0*05"), 2)
+        # Static data does not add a position
+        tracker.update(AISSentence.from_bytes(b"!AIVDM,1,1,,B,5`fsP:2000000000000000000000000000000000000000000000000000000000,0*66"), 3)
+        tracker.insert_or_update(1, AISTrack(mmsi=1, shipname="FOO", last_updated=3))
+
+        history = tracker.get_history(367380120)
+        self.assertEqual([p[0] for p in history], [1, 2])
+        self.assertIsNone(tracker.get_history(1))
+
+        tracker.pop_track(367380120)
+        self.assertIsNone(tracker.get_history(367380120))
+
+    def test_unavailable_positions_are_not_recorded(self):
+        tracker = AISTracker(ttl_in_seconds=None, history_size=10)
+        tracker.insert_or_update(1, AISTrack(mmsi=1, lat=91.0, lon=181.0, last_updated=1))
+        self.assertIsNone(tracker.get_history(1))
+
+        tracker.insert_or_update(1, AISTrack(mmsi=1, lat=50.0, lon=10.0, last_updated=2))
+        tracker.insert_or_update(1, AISTrack(mmsi=1, lat=91.0, lon=181.0, last_updated=3))
+        tracker.insert_or_update(1, AISTrack(mmsi=1, speed=5.0, last_updated=4))
+        self.assertEqual([p[0] for p in tracker.get_history(1)], [2])
+
+    def test_no_history_by_default(self):
+        tracker = AISTracker()
+        tracker.insert_or_update(1, AISTrack(mmsi=1, lat=50.0, lon=10.0, last_updated=1))
+        self.assertIsNone(tracker.get_history(1))
+
+    def test_expired_tracks_lose_their_history(self):
+        tracker = AISTracker(ttl_in_seconds=10, history_size=10)
+        now = time.time()
+        tracker.insert_or_update(1, AISTrack(mmsi=1, lat=50.0, lon=10.0, last_updated=now - 20))
+        tracker.insert_or_update(2, AISTrack(mmsi=2, lat=50.0, lon=10.0, last_updated=now))
+        tracker.cleanup()
+        self.assertIsNone(tracker.get_history(1))
+        self.assertEqual(len(tracker.get_history(2)), 1)
+
+    @unittest.skipIf(not HAS_NUMPY, "NumPy is not installed")
+    def test_export(self):
+        tracker = AISTracker(ttl_in_seconds=None, history_size=3)
+        for ts in range(5):
+            tracker.insert_or_update(1, AISTrack(mmsi=1, lat=50.0 + ts, lon=10.0, speed=ts, last_updated=ts))
+        tracker.insert_or_update(2, AISTrack(mmsi=2, lat=-10.0, lon=-20.0, last_updated=7))
+
+        columns = tracker.get_history(1).to_numpy()
+        self.assertEqual(columns['ts'].tolist(), [2, 3, 4])
+        self.assertEqual(columns['speed'].tolist(), [2, 3, 4])
+
+        columns = tracker.export_history()
+        self.assertEqual(columns['mmsi'].tolist(), [1, 1, 1, 2])
+        self.assertEqual(columns['lat'].tolist(), [52.0, 53.0, 54.0, -10.0])
+        self.assertEqual(set(columns), {'mmsi', 'ts', 'lat', 'lon', 'speed', 'course'})
+        self.assertEqual(AISTracker(history_size=3).export_history()['ts'].tolist(), [])
+
+
+def static_message():
+    return AISSentence.assemble_from_iterable([
+        AISSentence(b"!AIVDM,2,1,0,B,55?MbV02;H;s<HtKP00EHE:0@T4@Dl0000000000L961O5Gf0NSQEp6ClRh0,0*0B"),
+        AISSentence(b"!AIVDM,2,2,0,B,00000000000,2*27"),
+    ])
+
+
+class SnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.directory.name, "tracks.snapshot")
+        self.journal = os.path.join(self.directory.name, "tracks.journal")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def populated_tracker(self, **kwargs):
+        now = time.time()
+        tracker = AISTracker(**kwargs)
+        tracker.update(AISSentence(b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23"), now - 3)
+        tracker.update(static_message(), now - 2)
+        tracker.update(AISSentence(b"!AIVDM,1,1,,A,15M67FC000G?ufbE`FepT@3n00Sa,0*5C"), now - 1)
+        tracker.insert_or_update(1, AISTrack(mmsi=1, lat=50.0, lon=10.0, turn=-1.5, imo=0, callsign="", last_updated=now))
+        return tracker
+
+    def assertSameTracks(self, first, second):
+        self.assertEqual(
+            [dataclasses.astuple(t) for t in sorted(first.tracks)],
+            [dataclasses.astuple(t) for t in sorted(second.tracks)],
+        )
+        # Enums (e.g. ShipType or TurnRate) are restored as well
+        self.assertEqual(
+            [[type(v) for v in dataclasses.astuple(t)] for t in sorted(first.tracks)],
+            [[type(v) for v in dataclasses.astuple(t)] for t in sorted(second.tracks)],
+        )
+
+    def test_snapshot_and_restore(self):
+        tracker = self.populated_tracker()
+        tracker.snapshot(self.snapshot)
+
+        restored = AISTracker()
+        restored.restore(self.snapshot)
+        self.assertSameTracks(tracker, restored)
+        self.assertEqual(restored.get_track(351759000).shipname, "EVER DIADEM")
+        self.assertEqual(restored.get_track(1).callsign, "")
+        self.assertIsNone(restored.get_track(1).shipname)
+        self.assertEqual([t.mmsi for t in restored.n_latest_tracks(2)], [1, 366053209])
+        self.assertEqual(len(restored.tracks_near(50.0, 10.0, 1)), 1)
+
+    def test_restore_keeps_newer_tracks_and_drops_expired_ones(self):
+        tracker = AISTracker(ttl_in_seconds=None)
+        tracker.insert_or_update(1, AISTrack(mmsi=1, shipname="OLD", last_updated=time.time() - 10))
+        tracker.insert_or_update(2, AISTrack(mmsi=2, last_updated=1))
+        tracker.snapshot(self.snapshot)
+
+        restored = AISTracker(ttl_in_seconds=60)
+        restored.insert_or_update(1, AISTrack(mmsi=1, shipname="NEW", last_updated=time.time()))
+        restored.restore(self.snapshot)
+        self.assertEqual([t.shipname for t in restored.tracks], ["NEW"])
+
+    def test_read_snapshot(self):
+        self.populated_tracker().snapshot(self.snapshot)
+        columns = read_snapshot(self.snapshot)
+
+        self.assertEqual(sorted(columns["mmsi"]), [1, 227006760, 351759000, 366053209])
+        self.assertEqual(len(columns["lat"]), 4)
+        self.assertEqual(columns["lat"].format, "d")
+        self.assertEqual(columns["shipname.len"].tolist().count(-1), 3)
+        self.assertEqual(columns["shipname"].tobytes(), b"EVER DIADEM")
+
+    def test_open_snapshot(self):
+        self.populated_tracker().snapshot(self.snapshot)
+        with open_snapshot(self.snapshot) as columns:
+            self.assertEqual(columns["mmsi"].obj.__class__.__name__, "mmap")
+            self.assertEqual(sorted(columns["mmsi"]), sorted(read_snapshot(self.snapshot)["mmsi"]))
+
+        # The file is unmapped
+        with self.assertRaises(ValueError):
+            columns["mmsi"].tolist()
+
+    def test_missing_columns(self):
+        write_snapshot(self.snapshot, [("mmsi", array.array("I", [1]))], 1)
+        with self.assertRaises(InvalidSnapshotException):
+            AISTracker().restore(self.snapshot)
+
+    def test_history_is_restored(self):
+        tracker = AISTracker(ttl_in_seconds=None, history_size=3)
+        for ts in range(5):
+            tracker.insert_or_update(1, AISTrack(mmsi=1, lat=50.0 + ts, lon=10.0, course=ts, last_updated=ts))
+        tracker.snapshot(self.snapshot)
+
+        restored = AISTracker(ttl_in_seconds=None, history_size=3)
+        restored.restore(self.snapshot)
+        # Speed is NaN
+        self.assertEqual([p[:3] + p[4:] for p in restored.get_history(1)], [p[:3] + p[4:] for p in tracker.get_history(1)])
+        self.assertEqual([p[0] for p in restored.get_history(1)], [2, 3, 4])
+
+        restored = AISTracker(ttl_in_seconds=None)
+        restored.restore(self.snapshot)
+        self.assertIsNone(restored.get_history(1))
+
+    def test_invalid_snapshots(self):
+        with open(self.snapshot, "wb") as fd:
+            fd.write(b"")
+        with self.assertRaises(InvalidSnapshotException):
+            read_snapshot(self.snapshot)
+
+        with open(self.snapshot, "wb") as fd:
+            fd.write(b"NOTASNAPSHOT" * 4)
+        with self.assertRaises(InvalidSnapshotException):
+            read_snapshot(self.snapshot)
+
+        self.populated_tracker().snapshot(self.snapshot)
+        with open(self.snapshot, "rb") as fd:
+            data = fd.read()
+        with open(self.snapshot, "wb") as fd:
+            fd.write(data[:-8])
+        with self.assertRaises(InvalidSnapshotException):
+            read_snapshot(self.snapshot)
+
+        with open(self.snapshot, "wb") as fd:
+            fd.write(data[:8] + b"\xff\xff" + data[10:])
+        with self.assertRaises(InvalidSnapshotException):
+            read_snapshot(self.snapshot)
+
+    def test_journal(self):
+        with AISTracker() as tracker:
+            tracker.snapshot(self.snapshot)
+            tracker.open_journal(self.journal)
+            populated = self.populated_tracker()
+            for track in sorted(populated.tracks, key=lambda t: t.last_updated):
+                tracker.insert_or_update(track.mmsi, AISTrack(**dataclasses.asdict(track)))
+            # Updates in place are journaled as well
+            tracker.update(AISSentence(b"!AIVDM,1,1,,A,15M67FC000G?ufbE`FepT@3n00Sa,0*5C"), time.time())
+            tracker.insert_or_update(2, AISTrack(mmsi=2))
+            tracker.pop_track(2)
+
+        restored = AISTracker()
+        restored.restore(self.snapshot)
+        self.assertEqual(restored.replay_journal(self.journal), 7)
+        self.assertSameTracks(tracker, restored)
+
+    def test_enums_are_restored(self):
+        tracker = self.populated_tracker()
+        tracker.snapshot(self.snapshot)
+        with tracker.open_journal(self.journal):
+            tracker.update(static_message(), time.time())
+            tracker.update(AISSentence(b"!AIVDM,1,1,,A,13HOI:0P0000VOHLCnHQKwvL05Ip,0*23"), time.time())
+
+        restored = AISTracker()
+        restored.restore(self.snapshot)
+        self.assertIs(restored.get_track(351759000).ship_type, ShipType.NotAvailable)
+        self.assertIs(restored.get_track(227006760).turn, TurnRate.NO_TI_DEFAULT)
+        self.assertEqual(type(restored.get_track(1).turn), float)
+
+        restored = AISTracker()
+        self.assertEqual(restored.replay_journal(self.journal), 2)
+        self.assertIs(restored.get_track(351759000).ship_type, ShipType.NotAvailable)
+        self.assertIs(restored.get_track(227006760).turn, TurnRate.NO_TI_DEFAULT)
+
+    def test_long_strings_are_cut_at_a_character(self):
+        tracker = AISTracker()
+        with tracker.open_journal(self.journal):
+            tracker.insert_or_update(1, AISTrack(mmsi=1, shipname="\u00e4" * 200))
+
+        restored = AISTracker()
+        restored.replay_journal(self.journal)
+        self.assertEqual(restored.get_track(1).shipname, "\u00e4" * 127)
+
+    def test_expired_tracks_are_journaled(self):
+        now = time.time()
+        tracker = AISTracker(ttl_in_seconds=10)
+        # insert_or_update() does not clean up, so the track is part of the snapshot
+        tracker.insert_or_update(1, AISTrack(mmsi=1, shipname="OLD", last_updated=now - 20))
+        tracker.snapshot(self.snapshot)
+
+        with tracker.open_journal(self.journal):
+            tracker.insert_or_update(2, AISTrack(mmsi=2, shipname="NEW", last_updated=now))
+            tracker.cleanup()
+        self.assertEqual([t.mmsi for t in tracker.tracks], [2])
+
+        restored = AISTracker(ttl_in_seconds=None)
+        restored.restore(self.snapshot)
+        self.assertEqual(restored.replay_journal(self.journal), 2)
+        self.assertEqual([t.mmsi for t in restored.tracks], [2])
+
+    def test_journal_records_are_flushed(self):
+        tracker = AISTracker()
+        journal = tracker.open_journal(self.journal)
+        tracker.insert_or_update(1, AISTrack(mmsi=1, shipname="FOO"))
+        # Read while the journal is still open
+        self.assertEqual(AISTracker().replay_journal(self.journal), 1)
+
+        with journal:
+            tracker.insert_or_update(2, AISTrack(mmsi=2, shipname="BAR"))
+        self.assertTrue(journal.closed)
+        # Updates after the journal was closed are not journaled
+        tracker.insert_or_update(3, AISTrack(mmsi=3, shipname="BAZ"))
+        self.assertEqual(AISTracker().replay_journal(self.journal), 2)
+
+        buffered = AISTracker().open_journal(self.journal, flush=False)
+        self.assertIsInstance(buffered, Journal)
+        buffered.close()
+
+    def test_snapshot_truncates_journal(self):
+        with self.populated_tracker() as tracker:
+            tracker.open_journal(self.journal)
+            tracker.update(static_message(), time.time())
+            tracker.snapshot(self.snapshot)
+            tracker.insert_or_update(2, AISTrack(mmsi=2, shipname="FOO"))
+
+        restored = AISTracker()
+        restored.restore(self.snapshot)
+        self.assertEqual(restored.replay_journal(self.journal), 1)
+        self.assertSameTracks(tracker, restored)
+
+    def test_truncated_journal(self):
+        tracker = AISTracker()
+        tracker.open_journal(self.journal)
+        tracker.insert_or_update(1, AISTrack(mmsi=1, shipname="FOO"))
+        tracker.insert_or_update(2, AISTrack(mmsi=2, shipname="BAR"))
+        tracker.close_journal()
+
+        with open(self.journal, "rb") as fd:
+            data = fd.read()
+        with open(self.journal, "wb") as fd:
+            fd.write(data[:-2])
+
+        restored = AISTracker()
+        self.assertEqual(restored.replay_journal(self.journal), 1)
+        self.assertEqual([t.shipname for t in restored.tracks], ["FOO"])
+
+        with open(self.journal, "wb") as fd:
+            fd.write(b"garbage")
+        with self.assertRaises(InvalidSnapshotException):
+            restored.replay_journal(self.journal)
+
+        # Invalid UTF-8 in a string and a header without a version
+        with open(self.journal, "wb") as fd:
+            fd.write(data.replace(b"FOO", b"\xff\xfe\xfd"))
+        with self.assertRaises(InvalidSnapshotException):
+            restored.replay_journal(self.journal)
+
+        with open(self.journal, "wb") as fd:
+            fd.write(data[:8])
+        with self.assertRaises(InvalidSnapshotException):
+            restored.replay_journal(self.journal)
@@ -55,3 +55,44 @@ class TestOutOfOrder(unittest.TestCase):
                         break
 
             self.server_thread.join()
+
+
+class TestBatchedReceive(unittest.TestCase):
+
+    @unittest.skipIf(not is_linux(), "MSG_DONTWAIT is not available on all systems")
+    def test_recv_drains_all_queued_datagrams(self):
+        with UDPReceiver("127.0.0.1", 0) as receiver:
+            port = receiver._fobj.getsockname()[1]
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                for msg in MESSAGES:
+                    sender.sendto(msg + b"\r\n", ("127.0.0.1", port))
+
+            time.sleep(0.1)
+            body = receiver.recv()
+
+            self.assertEqual(body, b"".join(msg + b"\r\n" for msg in MESSAGES))
+            self.assertEqual(receiver.datagrams, len(MESSAGES))
+
+    def test_recv_respects_ring_size(self):
+        class SmallBatchReceiver(UDPReceiver):
+            RING_SIZE = UDPReceiver.BUF_SIZE
+
+        with SmallBatchReceiver("127.0.0.1", 0) as receiver:
+            port = receiver._fobj.getsockname()[1]
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+                for msg in MESSAGES:
+                    sender.sendto(msg + b"\r\n", ("127.0.0.1", port))
+
+            time.sleep(0.1)
+            # Only a single datagram fits into the buffer
+            for msg in MESSAGES:
+                self.assertEqual(receiver.recv(), msg + b"\r\n")
+
+    def test_rcvbuf(self):
+        with UDPReceiver("127.0.0.1", 0, rcvbuf=1 << 16) as receiver:
+            self.assertGreaterEqual(receiver.rcvbuf, 1 << 16)
+
+    @unittest.skipIf(not is_linux(), "Drop counters are only available on Linux")
+    def test_drops(self):
+        with UDPReceiver("127.0.0.1", 0) as receiver:
+            self.assertEqual(receiver.drops, 0)